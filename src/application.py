@@ -1,13 +1,16 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
-from PyQt5.QtCore import Qt, QStandardPaths, pyqtSignal, pyqtSlot
+from PyQt5.QtCore import Qt, QStandardPaths, QTimer, pyqtSignal, pyqtSlot
 from PyQt5.QtGui import QKeySequence
 from PyQt5.QtWidgets import QApplication, QMessageBox
 
-from model.backup import Backup
+from model.aggregates import StatsCache
 from model.config import Config
 from model.storage import Database
 from model.plan import PlanTableModel, PlanHandler, Activity
-from model.tasklist import TasklistTableModel, Task
+from model.tasklist import TasklistTableModel, DeadlineNotifier, Task
+from profiling import profiler
+from single_instance import InstanceServer
+from ui.importing import ReplaceOption
 from ui.main_window import MainWindow
 
 class Application(QApplication):
@@ -17,38 +20,73 @@ class Application(QApplication):
     PATH_DB = PATH_APPDATA + "/collection.db"
     PATH_BACKUPS = PATH_APPDATA + "/backups"
 
-    EXIT_CODE_RESTART = 6
+    def __init__(self, *args, options=None, **kwargs):
+        """`options` are the command-line options of `main.py`."""
 
-    def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self.database = Database(self.PATH_DB)
-        if not self.database.connect():
-            self.db_open_failed_dialog()
-
-        self.config = Config(self.database)
-        self.backup = Backup(
-            self.PATH_BACKUPS,
-            self.database,
-            self.config
-        )
-
-        self.plan = PlanTableModel(
-            self,
-            self.database,
-            self.config
-        )
-        self.tasklist = TasklistTableModel(
-            self,
-            self.database,
-            self.config
-        )
+        with profiler.phase("connect to database"):
+            self.database = Database(self.PATH_DB, backend=(options or {}).get("storage_backend"))
+            if not self.database.connect():
+                self.db_open_failed_dialog()
+
+        with profiler.phase("read config"):
+            self.config = Config(self.database)
+
+        # Backups are only needed once one is made, exported or restored
+        self._backup = None
+
+        with profiler.phase("load plan"):
+            self.plan = PlanTableModel(
+                self,
+                self.database,
+                self.config
+            )
+        with profiler.phase("load tasklist"):
+            self.tasklist = TasklistTableModel(
+                self,
+                self.database,
+                self.config
+            )
         self.plan_handler = PlanHandler(self.plan)
+        self.stats_cache = StatsCache()
+        self.deadline_notifier = DeadlineNotifier(self.tasklist)
+
+        with profiler.phase("create main window"):
+            self.main_window = MainWindow(self, self.config)
 
-        self.main_window = MainWindow(self, self.config)
+        self.instance_server = InstanceServer(parent=self)
 
         self._connectSlots()
-        self.main_window.show()
+        with profiler.phase("show main window"):
+            self.main_window.show()
+        self.deadline_notifier.start()
+
+        # Later launches hand their options to this instance
+        self.instance_server.listen()
+        self.handle_options(options or {})
+
+        # Queued behind the events painting the window
+        QTimer.singleShot(0, self._startup_finished)
+
+    def _startup_finished(self):
+        profiler.mark("first paint")
+        profiler.report()
+
+    @property
+    def backup(self):
+        if self._backup is None:
+            from model.backup import Backup
+
+            self._backup = Backup(
+                self.PATH_BACKUPS,
+                self.database,
+                self.config
+            )
+            self._backup.progressChanged.connect(self.main_window.backup_progress)
+            self._backup.backupWritten.connect(self.main_window.backup_written)
+            self._backup.backupFailed.connect(self.main_window.backup_failed)
+        return self._backup
 
     # Qt Slots/Signals
     ################################################################################
@@ -74,13 +112,20 @@ class Application(QApplication):
         self.main_window.planCutActivities.connect(self.plan.cut_activities)
         self.main_window.planCopyActivities.connect(self.plan.copy_activities)
         self.main_window.planPasteActivities.connect(self.plan.paste_activities)
+        self.main_window.planBulkEditActivities.connect(self.plan.bulk_edit)
 
         self.main_window.tasklistNewTask.connect(self.tasklist.add_task)
         self.main_window.tasklistDeleteTasks.connect(self.tasklist.delete_tasks)
+        self.main_window.tasklistBulkEditTasks.connect(self.tasklist.bulk_edit)
 
-        self.main_window.backupExportRequested.connect(self.backup.export)
+        self.main_window.backupExportRequested.connect(lambda path: self.backup.export_async(path))
         self.main_window.backupRestoreRequested.connect(self.restore_backup)
+        self.main_window.statsRebuildRequested.connect(self.rebuild_stats)
         self.main_window.appExitRequested.connect(self.exit_app)
+        self.aboutToQuit.connect(self.config.flush)
+        self.aboutToQuit.connect(self.stop_backups)
+        self.aboutToQuit.connect(self.instance_server.close)
+        self.instance_server.optionsReceived.connect(self.activate)
 
         # Plan Handler
         self.plan_handler.countdownToStart.connect(self.main_window.countdown_to_start)
@@ -90,7 +135,40 @@ class Application(QApplication):
         self.plan_handler.activityExpired.connect(self.main_window.activity_expired)
         self.plan_handler.activityStopped.connect(self.main_window.activity_stopped)
         if self.config.get_setting("user.backup/on_plan_complete", False):
-            self.plan_handler.completed.connect(self.backup.create)
+            self.plan_handler.completed.connect(lambda: self.backup.create_async())
+
+        # Plan
+        self.plan.logArchived.connect(self.stats_cache.log_changed)
+
+        # Deadline Notifier
+        self.deadline_notifier.deadlinesReached.connect(self.main_window.deadlines_reached)
+
+    def activate(self, options):
+        """Brings the window to the front for a later launch and carries
+        out its options.
+        """
+
+        self.main_window.showNormal()
+        self.main_window.raise_()
+        self.main_window.activateWindow()
+
+        # A bad file from another launch must not end this one
+        try:
+            self.handle_options(options)
+        except (OSError, ValueError, KeyError) as e:
+            self.main_window.statusbar.showMessage(f"Cannot carry out the options of another launch: {e}")
+
+    def handle_options(self, options):
+        import_options = {
+            "replace_option": ReplaceOption[options.get("replace", "ignore").upper()]
+        }
+        if options.get("import_plan"):
+            self.plan.import_activities(options["import_plan"], import_options)
+        if options.get("import_tasks"):
+            self.tasklist.import_tasks(options["import_tasks"], import_options)
+        if options.get("start_plan") and not self.plan_handler.timer_countdown.isActive() \
+                and self.plan.rowCount() > 1:
+            self.plan_handler.start()
 
     # Dialogs
     ################################################################################
@@ -111,12 +189,39 @@ class Application(QApplication):
 
     def exit_app(self):
         if self.config.get_setting("user.backup/on_exit", True):
-            self.backup.create()
-        super().exit(0)
+            # The window is already hidden, so exiting only waits for
+            # the backups to be written
+            self.backup.backupsFinished.connect(lambda: super(Application, self).exit(0))
+            self.backup.create_async()
+        else:
+            super().exit(0)
 
     def exit_app_unexpected(self):
         super().exit(1)
 
+    def stop_backups(self):
+        if self._backup is not None:
+            self._backup.stop_worker()
+
+    def rebuild_stats(self):
+        self.database.rebuild_rollups()
+        # Cached chart rows were computed from the old rollups
+        self.stats_cache.clear()
+
     def restore_backup(self, path):
-        self.backup.restore(path)
-        super().exit(self.EXIT_CODE_RESTART)
+        from model.backup import BackupIntegrityError
+
+        if self.plan_handler.timer_countdown.isActive():
+            self.plan_handler.abort()
+
+        try:
+            self.backup.restore(path)
+        except BackupIntegrityError as e:
+            self.main_window.restore_failed(str(e))
+            return
+
+        self.config.reload()
+        self.plan.reload()
+        self.tasklist.reload()
+        self.stats_cache.clear()
+        self.deadline_notifier.schedule()
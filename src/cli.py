@@ -0,0 +1,236 @@
+"""Runs LibrePlan's operations on its database without the GUI.
+
+Examples, suitable for scripts and cron jobs:
+
+    python cli.py import-tasks tasks.json --replace add
+    python cli.py archive --clear
+    python cli.py backup
+    python cli.py report --format csv --output reports/
+    python cli.py batch nightly.txt
+
+A batch file lists one command per line, e.g. `export-tasks tasks.json`,
+and runs all of them on a single connection. Empty lines and lines
+starting with `#` are skipped.
+"""
+
+import argparse
+import os
+import shlex
+import sqlite3
+import sys
+
+from PyQt5.QtCore import QCoreApplication
+from PyQt5.QtWidgets import QApplication
+
+from model.backup import BackupIntegrityError
+from model.config import Config
+from model.storage import Database, DbConnectionError, QueryError
+from model.storage.backends import BACKENDS
+
+class Session:
+    """The models of one database, each created when a command first needs it."""
+
+    def __init__(self, database_path, backup_path, backend=None):
+        self.database = Database(database_path, backend=backend)
+        self.database.connect()
+        self.config = Config(self.database)
+        self.backup_path = backup_path
+        self._plan = None
+        self._tasklist = None
+        self._backup = None
+
+    @property
+    def plan(self):
+        if self._plan is None:
+            from model.plan import PlanTableModel
+            self._plan = PlanTableModel(None, self.database, self.config)
+        return self._plan
+
+    @property
+    def tasklist(self):
+        if self._tasklist is None:
+            from model.tasklist import TasklistTableModel
+            self._tasklist = TasklistTableModel(None, self.database, self.config)
+        return self._tasklist
+
+    @property
+    def backup(self):
+        if self._backup is None:
+            from model.backup import Backup
+            os.makedirs(self.backup_path, exist_ok=True)
+            self._backup = Backup(self.backup_path, self.database, self.config)
+        return self._backup
+
+    def close(self):
+        self.config.flush()
+        # Queries still prepared on the connection would keep it in use
+        self.config = self._plan = self._tasklist = self._backup = None
+        self.database.disconnect()
+
+# Commands
+################################################################################
+
+def _import_options(args):
+    from ui.importing import ReplaceOption
+    return {"replace_option": ReplaceOption[args.replace.upper()]}
+
+def import_plan(session, args):
+    session.plan.import_activities(args.file, _import_options(args))
+
+def export_plan(session, args):
+    session.plan.export_activities(args.file)
+
+def import_tasks(session, args):
+    session.tasklist.import_tasks(args.file, _import_options(args))
+
+def export_tasks(session, args):
+    session.tasklist.export_tasks(args.file)
+
+def archive(session, args):
+    if session.plan.rowCount() < 2:
+        raise ValueError("The plan has no activities to archive")
+
+    session.plan.complete()
+    if args.clear:
+        session.plan.clear()
+
+def backup(session, args):
+    if args.output:
+        session.backup.export(args.output)
+    else:
+        session.backup.create()
+
+def restore(session, args):
+    session.backup.restore(args.file)
+    session.config.reload()
+    for model in [session._plan, session._tasklist]:
+        if model is not None:
+            model.reload()
+
+def write_report(session, args):
+    import report
+    report_args = report.parse_args(args.report_arguments)
+    if report_args.charts and not isinstance(QCoreApplication.instance(), QApplication):
+        raise ValueError("Charts can only be rendered by a report command of its own, not in a batch")
+
+    # Written from the session's own connection, so the report sees the
+    # same database whichever storage backend it is in
+    status = report.write_report(report_args, session.database)
+    if status:
+        raise ValueError("The report could not be written")
+
+def batch(session, args):
+    parser = build_parser(for_batch=True)
+    lines = sys.stdin if args.file == "-" else open(args.file)
+    with lines:
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            try:
+                command_args = parse_command(parser, shlex.split(line))
+            except SystemExit:
+                raise ValueError(f"Line {number}: invalid command: {line}")
+            command_args.command(session, command_args)
+
+# Command line
+################################################################################
+
+def build_parser(for_batch=False):
+    """Builds the parser of the command line, or of a line of a batch
+    file, which cannot choose another database or start another batch.
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="cli.py" if not for_batch else "batch",
+        description="Run LibrePlan's operations without the GUI."
+    )
+    if not for_batch:
+        parser.add_argument("--database", help="path of the database (default: the application's database)")
+        parser.add_argument("--backups", help="directory of the backups (default: the application's backup directory)")
+        parser.add_argument(
+            "--storage-backend",
+            choices=list(BACKENDS),
+            help="driver the database is accessed through (default: qtsql)"
+        )
+
+    commands = parser.add_subparsers(required=True, metavar="command")
+
+    def add_command(name, function, help):
+        command = commands.add_parser(name, help=help)
+        command.set_defaults(command=function)
+        return command
+
+    for name, function, help in [
+        ("import-plan", import_plan, "import activities into the plan"),
+        ("import-tasks", import_tasks, "import tasks into the tasklist"),
+    ]:
+        command = add_command(name, function, help)
+        command.add_argument("file")
+        command.add_argument(
+            "--replace",
+            choices=["ignore", "replace", "add"],
+            default="ignore",
+            help="what to do with imported items that already exist"
+        )
+
+    add_command("export-plan", export_plan, "export the plan").add_argument("file")
+    add_command("export-tasks", export_tasks, "export the tasklist").add_argument("file")
+
+    command = add_command("archive", archive, "add the plan to the activity log")
+    command.add_argument("--clear", action="store_true", help="clear the plan afterwards")
+
+    command = add_command("backup", backup, "make a backup, rotating old ones")
+    command.add_argument("--output", help="write a single copy to this path instead")
+
+    add_command("restore", restore, "replace the database with a backup").add_argument("file")
+
+    # The options of a report are passed on to report.py
+    add_command("report", write_report, "write a statistics report, see report.py --help")
+
+    if not for_batch:
+        command = add_command("batch", batch, "run the commands in a file, or - for standard input")
+        command.add_argument("file")
+
+    return parser
+
+def parse_command(parser, argv):
+    args, report_arguments = parser.parse_known_args(argv)
+    if report_arguments and args.command is not write_report:
+        parser.error(f"unrecognized arguments: {' '.join(report_arguments)}")
+    args.report_arguments = report_arguments
+    return args
+
+def main(argv=None):
+    args = parse_command(build_parser(), sys.argv[1:] if argv is None else argv)
+    if "--charts" in args.report_arguments:
+        # Charts are rendered with widgets, like report.py does
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        app = QApplication.instance() or QApplication(sys.argv[:1])
+    else:
+        app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+
+    if args.database is None or args.backups is None:
+        from application import Application
+        args.database = args.database or Application.PATH_DB
+        args.backups = args.backups or Application.PATH_BACKUPS
+
+    try:
+        session = Session(args.database, args.backups, args.storage_backend)
+    except DbConnectionError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    try:
+        args.command(session, args)
+    except (OSError, ValueError, KeyError, QueryError, BackupIntegrityError, sqlite3.Error) as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        session.close()
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,47 @@
+import argparse
+import os
 import sys
 
-from PyQt5.QtCore import QProcess
+import profiling
 
-from application import Application
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="A simple, free and open-source day planner and to-do list."
+    )
+    parser.add_argument("--import-plan", type=os.path.abspath, metavar="FILE", help="import activities into the plan")
+    parser.add_argument("--import-tasks", type=os.path.abspath, metavar="FILE", help="import tasks into the tasklist")
+    parser.add_argument(
+        "--replace",
+        choices=["ignore", "replace", "add"],
+        default="ignore",
+        help="what to do with imported items that already exist"
+    )
+    parser.add_argument("--start-plan", action="store_true", help="start the current activity of the plan")
+    # The names in `model.storage.backends.BACKENDS`, which is not
+    # imported before a running instance is looked for. The in-memory
+    # backend is left out, as nothing entered would be kept.
+    parser.add_argument(
+        "--storage-backend",
+        choices=["qtsql", "sqlite3"],
+        help="driver the database is accessed through (default: qtsql)"
+    )
+    parser.add_argument(profiling.FLAG, action="store_true", help="print how long each phase of startup takes")
+
+    # Options of Qt itself are left to QApplication
+    args, _ = parser.parse_known_args(argv)
+    return args
 
 if __name__ == "__main__":
-    app = Application(sys.argv)
-    exit_code = app.exec_()
+    options = vars(parse_args(sys.argv[1:]))
+    profiler = profiling.enable_from(sys.argv)
 
-    if exit_code == Application.EXIT_CODE_RESTART:
-        QProcess.startDetached(sys.executable, sys.argv)
+    # A running instance is sent the options instead of starting another
+    import single_instance
+    if single_instance.send_to_running_instance(options):
         sys.exit(0)
-    else:
-        sys.exit(exit_code)
+
+    with profiler.phase("import modules"):
+        from application import Application
+
+    app = Application(sys.argv, options=options)
+    sys.exit(app.exec_())
@@ -0,0 +1,423 @@
+from collections import OrderedDict
+from enum import Enum, auto
+
+from PyQt5.QtCore import QByteArray, QDate
+
+from model.digest import TDigest
+from model.search import SearchIndex
+from model.storage import Database
+
+import model.aggregates.queries as queries
+
+class FilterMode(Enum):
+    CONTAINS = 0
+    PREFIX = auto()
+    EXACT = auto()
+    ANY_OF = auto()
+
+class Granularity(Enum):
+    """Length of the periods that trend charts average over.
+
+    Periods above a day are read from the period rollups, whose
+    granularities are named by the values.
+    """
+
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+    QUARTER = "quarter"
+    YEAR = "year"
+
+    @classmethod
+    def for_range(cls, date_from, date_to, max_periods=120):
+        """Returns the finest granularity that keeps the number of
+        periods in the range within `max_periods`.
+        """
+
+        days = date_from.daysTo(date_to) + 1
+        for granularity, period_days in [
+            (cls.DAY, 1),
+            (cls.WEEK, 7),
+            (cls.MONTH, 30.44),
+            (cls.QUARTER, 91.31),
+        ]:
+            if days / period_days <= max_periods:
+                return granularity
+        return cls.YEAR
+
+    def period_start(self, date):
+        if self == Granularity.WEEK:
+            return date.addDays(1 - date.dayOfWeek())
+        if self == Granularity.MONTH:
+            return QDate(date.year(), date.month(), 1)
+        if self == Granularity.QUARTER:
+            return QDate(date.year(), (date.month() - 1) // 3 * 3 + 1, 1)
+        if self == Granularity.YEAR:
+            return QDate(date.year(), 1, 1)
+        return date
+
+    def next_period_start(self, date):
+        start = self.period_start(date)
+        if self == Granularity.WEEK:
+            return start.addDays(7)
+        if self == Granularity.MONTH:
+            return start.addMonths(1)
+        if self == Granularity.QUARTER:
+            return start.addMonths(3)
+        if self == Granularity.YEAR:
+            return start.addYears(1)
+        return start.addDays(1)
+
+class StatsCache:
+    """LRU cache of chart rows keyed by `(chart, activity ids, date_from, date_to)`.
+
+    The cache outlives the statistics dialog. Archiving a day's log
+    only invalidates the entries whose range includes that day, so
+    ranges entirely in the past are served without touching SQLite.
+    The generation counter is bumped on every change to the log, and
+    rows read before a change are not stored.
+    """
+
+    MAX_ROWS = 50000
+
+    def __init__(self, max_rows=MAX_ROWS):
+        self.max_rows = max_rows
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._row_count = 0
+
+    def get(self, key):
+        rows = self._entries.get(key)
+        if rows is not None:
+            self._entries.move_to_end(key)
+        return rows
+
+    def put(self, key, rows, generation):
+        if generation != self.generation or len(rows) > self.max_rows:
+            return
+
+        self._discard(key)
+        self._entries[key] = rows
+        self._row_count += len(rows)
+
+        while self._row_count > self.max_rows:
+            _, evicted = self._entries.popitem(last=False)
+            self._row_count -= len(evicted)
+
+    def log_changed(self, date):
+        """Invalidates the entries whose date range includes `date`."""
+
+        self.generation += 1
+        for key in [k for k in self._entries if k[2] <= date <= k[3]]:
+            self._discard(key)
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+        self._row_count = 0
+
+    def _discard(self, key):
+        rows = self._entries.pop(key, None)
+        if rows is not None:
+            self._row_count -= len(rows)
+
+    def __len__(self):
+        return len(self._entries)
+
+class StatsReader:
+    """Reads the summarized chart data from the activity log rollups.
+
+    Rows are returned as plain tuples so they can be handed from a
+    worker thread to the GUI thread.
+    """
+
+    COLUMNS = {
+        "pie": ["name", "total_actual_length"],
+        "perf": ["name", "avg_length", "avg_actual_length", "avg_percent"],
+        "daily": ["date", "avg_actual_length", "avg_length", "avg_percent"],
+        "circadian": ["hour", "avg_percent"],
+        "quantiles": [
+            "name",
+            "count",
+            "median_actual_length",
+            "p90_actual_length",
+            "p99_actual_length",
+            "median_percent",
+            "p90_percent",
+            "p99_percent",
+        ],
+    }
+    CHARTS = list(COLUMNS)
+
+    # Separates the names matched by `FilterMode.ANY_OF`
+    NAME_SEPARATOR = ","
+
+    def __init__(self, database):
+        self.database = database
+        self._setupQueries()
+        self._name_index = None
+
+    def _setupQueries(self):
+        self.query_activity_names = self.database.get_prepared_query(queries.get_activity_names)
+        self.query_activities = self.database.get_prepared_query(queries.get_activities)
+        self.query_log_date_range = self.database.get_prepared_query(queries.get_log_date_range)
+
+        # The temp tables must exist before the queries reading them are prepared
+        self.database.execute_query(self.database.get_prepared_query(queries.create_filter_table))
+        self.query_clear_filter = self.database.get_prepared_query(queries.clear_filter)
+        self.query_insert_into_filter = self.database.get_prepared_query(queries.insert_into_filter)
+
+        self.database.execute_query(self.database.get_prepared_query(queries.create_selection_table))
+        self.query_clear_selection = self.database.get_prepared_query(queries.clear_selection)
+        self.query_select_log_range = self.database.get_prepared_query(queries.select_log_range)
+
+        self.query_pie = self.database.get_prepared_query(queries.get_pie_chart)
+        self.query_perf = self.database.get_prepared_query(queries.get_perf_chart)
+        self.query_daily_avg = self.database.get_prepared_query(queries.get_daily_avg)
+        self.query_period_avg = self.database.get_prepared_query(queries.get_period_avg)
+        self.query_circadian = self.database.get_prepared_query(queries.get_circadian_chart)
+        self.query_digests = self.database.get_prepared_query(queries.get_digests)
+
+    def get_activity_names(self):
+        names = []
+        self.database.execute_query(self.query_activity_names)
+        while self.query_activity_names.next():
+            names.append(self.query_activity_names.value("name"))
+
+        return names
+
+    def get_log_date_range(self):
+        self.database.execute_query(self.query_log_date_range)
+        self.query_log_date_range.first()
+        if self.query_log_date_range.value(0) != "":
+            return (
+                Database.from_day(self.query_log_date_range.value("min_date")),
+                Database.from_day(self.query_log_date_range.value("max_date")),
+            )
+        return QDate.currentDate(), QDate.currentDate()
+
+    def reload_names(self):
+        """Makes the next filter see activities added since the last one."""
+
+        self._name_index = None
+
+    def resolve_filter(self, text, mode=FilterMode.CONTAINS):
+        """Returns the sorted ids of the activities whose names match `text`.
+
+        Names are matched against an in-memory index, so the chart
+        queries only have to look up the matching ids.
+        """
+
+        if self._name_index is None:
+            self._name_index = SearchIndex()
+            self.database.execute_query(self.query_activities)
+            while self.query_activities.next():
+                self._name_index.add(
+                    self.query_activities.value("id"),
+                    self.query_activities.value("name")
+                )
+
+        if mode == FilterMode.PREFIX:
+            ids = self._name_index.search_prefix(text)
+        elif mode == FilterMode.EXACT:
+            ids = self._name_index.search_exact(text)
+        elif mode == FilterMode.ANY_OF:
+            ids = set()
+            for name in text.split(self.NAME_SEPARATOR):
+                if name.strip():
+                    ids |= self._name_index.search_exact(name.strip())
+        else:
+            ids = self._name_index.search(text)
+
+        return sorted(ids)
+
+    def select(self, activity_ids, date_from, date_to, granularity=Granularity.DAY):
+        """Selects the log range that the following reads summarize.
+
+        The rollup rows of `activity_ids` within the date range are
+        selected once and shared by every chart that is based on daily
+        totals. The trend chart averages over periods of `granularity`.
+        """
+
+        self._date_from = date_from
+        self._date_to = date_to
+        self._granularity = granularity
+
+        with self.database.transaction():
+            self.database.execute_query(self.query_clear_filter)
+            if activity_ids:
+                self.query_insert_into_filter.bindValue(":activity_id", list(activity_ids))
+                self.database.execute_batch_query(self.query_insert_into_filter)
+
+            self.database.execute_query(self.query_clear_selection)
+            self.query_select_log_range.bindValue(":date_from", Database.to_day(date_from))
+            self.query_select_log_range.bindValue(":date_to", Database.to_day(date_to))
+            self.database.execute_query(self.query_select_log_range)
+
+    def read(self, chart):
+        """Returns the rows of one of the `CHARTS` for the selected range."""
+
+        if chart == "quantiles":
+            return self._read_quantiles()
+
+        if chart == "circadian":
+            self.query_circadian.bindValue(":date_from", Database.to_day(self._date_from))
+            self.query_circadian.bindValue(":date_to", Database.to_day(self._date_to))
+
+        if chart == "daily" and self._granularity != Granularity.DAY:
+            query = self.query_period_avg
+            self._bind_periods(query)
+        else:
+            query = {
+                "pie": self.query_pie,
+                "perf": self.query_perf,
+                "daily": self.query_daily_avg,
+                "circadian": self.query_circadian,
+            }[chart]
+        columns = self.COLUMNS[chart]
+
+        self.database.execute_query(query)
+        rows = []
+        while query.next():
+            rows.append(tuple(
+                Database.from_day(query.value(column)) if column == "date" else query.value(column)
+                for column in columns
+            ))
+        query.finish()
+        return rows
+
+    def _bind_periods(self, query):
+        """Binds the whole periods of the selected range.
+
+        Whole periods are read from the period rollup; the partial
+        periods at either end are summed from the selected days.
+        """
+
+        granularity = self._granularity
+        full_from = granularity.period_start(self._date_from)
+        if full_from != self._date_from:
+            full_from = granularity.next_period_start(self._date_from)
+        full_to = max(granularity.period_start(self._date_to.addDays(1)), full_from)
+
+        query.bindValue(":granularity", granularity.value)
+        query.bindValue(":full_from", Database.to_day(full_from))
+        query.bindValue(":full_to", Database.to_day(full_to))
+
+    def _read_quantiles(self):
+        """Merges the daily digests of each activity into quantiles of its
+        actual length and of its actual length as a percent of planned.
+        """
+
+        self.query_digests.bindValue(":date_from", Database.to_day(self._date_from))
+        self.query_digests.bindValue(":date_to", Database.to_day(self._date_to))
+        self.database.execute_query(self.query_digests)
+
+        digests = {}
+        while self.query_digests.next():
+            name = self.query_digests.value("name")
+            actual_length_digest, percent_digest = digests.setdefault(name, (TDigest(), TDigest()))
+
+            actual_length_digest.merge(TDigest.from_bytes(self.query_digests.value("actual_length_digest").data()))
+            percent_data = self.query_digests.value("percent_digest")
+            if percent_data:
+                percent_digest.merge(TDigest.from_bytes(percent_data.data()))
+        self.query_digests.finish()
+
+        rows = []
+        for name, (actual_length_digest, percent_digest) in digests.items():
+            rows.append((
+                name,
+                int(actual_length_digest.count),
+                *(actual_length_digest.quantile(q) for q in DigestStore.QUANTILES),
+                *(percent_digest.quantile(q) for q in DigestStore.QUANTILES),
+            ))
+        return rows
+
+    def report(self, activity_ids, date_from, date_to):
+        """Returns the per-activity, per-day and per-hour aggregates of
+        a log range as lists of dictionaries.
+        """
+
+        self.select(activity_ids, date_from, date_to)
+        rows = {
+            chart: [dict(zip(self.COLUMNS[chart], row)) for row in self.read(chart)]
+            for chart in self.CHARTS
+        }
+
+        activities = {}
+        for chart in ["pie", "perf", "quantiles"]:
+            for row in rows[chart]:
+                activities.setdefault(row["name"], {"total_actual_length": 0}).update(row)
+
+        return {
+            "date_from": date_from.toString(Database.DATE_FORMAT),
+            "date_to": date_to.toString(Database.DATE_FORMAT),
+            "activities": sorted(
+                activities.values(),
+                key=lambda a: a["total_actual_length"],
+                reverse=True
+            ),
+            "days": [
+                dict(row, date=row["date"].toString(Database.DATE_FORMAT))
+                for row in rows["daily"]
+            ],
+            "hours": rows["circadian"],
+        }
+
+class DigestStore:
+    """Keeps a digest of each activity's actual lengths, and of its actual
+    lengths as a percent of planned, for every logged day.
+
+    Quantiles of any date range are found by merging the daily digests,
+    without sorting the raw log.
+    """
+
+    QUANTILES = [0.5, 0.9, 0.99]
+
+    def __init__(self, database):
+        self.database = database
+        self.query_get_log_values = self.database.get_prepared_query(queries.get_log_values)
+        self.query_get_archived_log_values = self.database.get_prepared_query(queries.get_archived_log_values)
+        self.query_replace = self.database.get_prepared_query(queries.replace_daily_digest)
+        self.query_delete_all = self.database.get_prepared_query(queries.delete_daily_digests)
+
+    def refresh(self, date):
+        """Recalculates the digests of the day being archived."""
+
+        self.query_get_archived_log_values.bindValue(":date", Database.to_day(date))
+        self._store(self.query_get_archived_log_values)
+
+    def rebuild(self):
+        """Recalculates the digests of every logged day."""
+
+        with self.database.transaction():
+            self.database.execute_query(self.query_delete_all)
+            self._store(self.query_get_log_values)
+
+    def _store(self, query):
+        digests = {}
+        self.database.execute_query(query)
+        while query.next():
+            key = (query.value("date"), query.value("activity_id"))
+            actual_length_digest, percent_digest = digests.setdefault(key, (TDigest(), TDigest()))
+
+            length = query.value("length")
+            actual_length = query.value("actual_length")
+            actual_length_digest.add(actual_length)
+            if length != 0:
+                percent_digest.add(actual_length * 100 / length)
+        query.finish()
+
+        if not digests:
+            return
+
+        self.query_replace.bindValue(":date", [date for date, _ in digests])
+        self.query_replace.bindValue(":activity_id", [activity_id for _, activity_id in digests])
+        self.query_replace.bindValue(":actual_length_digest", [
+            QByteArray(actual_length_digest.to_bytes()) for actual_length_digest, _ in digests.values()
+        ])
+        self.query_replace.bindValue(":percent_digest", [
+            QByteArray(percent_digest.to_bytes()) if percent_digest.count else None
+            for _, percent_digest in digests.values()
+        ])
+        self.database.execute_batch_query(self.query_replace)
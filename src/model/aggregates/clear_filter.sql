@@ -0,0 +1 @@
+DELETE FROM "stats_filter"
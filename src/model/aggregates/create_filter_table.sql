@@ -0,0 +1,3 @@
+CREATE TEMP TABLE IF NOT EXISTS "stats_filter" (
+    "activity_id" INTEGER PRIMARY KEY
+)
@@ -0,0 +1,9 @@
+CREATE TEMP TABLE IF NOT EXISTS "stats_selection" (
+    "date" INTEGER NOT NULL,
+    "name" TEXT NOT NULL,
+    "count" INTEGER NOT NULL,
+    "sum_length" INTEGER NOT NULL,
+    "sum_actual_length" INTEGER NOT NULL,
+    "sum_percent" REAL NOT NULL,
+    "total_actual_length" INTEGER NOT NULL
+)
@@ -0,0 +1,8 @@
+SELECT
+    "date",
+    "activity_id",
+    "length",
+    "actual_length"
+FROM "activity_log"
+WHERE "date" = :date
+ORDER BY "activity_id"
@@ -0,0 +1,10 @@
+SELECT
+    "hour",
+    SUM("sum_percent")/CAST(SUM("count") AS REAL) AS "avg_percent"
+FROM "log_hourly_rollup" AS r
+    INNER JOIN "activities" AS a
+        ON a.id = r.activity_id
+WHERE "date" BETWEEN :date_from AND :date_to
+    AND "activity_id" IN (SELECT "activity_id" FROM "stats_filter")
+GROUP BY "hour"
+ORDER BY "hour" ASC
@@ -0,0 +1,10 @@
+SELECT
+    "name",
+    "actual_length_digest",
+    "percent_digest"
+FROM "log_daily_digest" AS d
+    INNER JOIN "activities" AS a
+        ON a.id = d.activity_id
+WHERE "date" BETWEEN :date_from AND :date_to
+    AND "activity_id" IN (SELECT "activity_id" FROM "stats_filter")
+ORDER BY "name"
@@ -0,0 +1,7 @@
+SELECT
+    "date",
+    "activity_id",
+    "length",
+    "actual_length"
+FROM "activity_log"
+ORDER BY "date", "activity_id"
@@ -0,0 +1,9 @@
+SELECT
+    "name",
+    SUM("sum_length")/CAST(SUM("count") AS REAL) AS "avg_length",
+    SUM("sum_actual_length")/CAST(SUM("count") AS REAL) AS "avg_actual_length",
+    SUM("sum_percent")/CAST(SUM("count") AS REAL) AS "avg_percent"
+FROM "stats_selection"
+WHERE "count" > 0
+GROUP BY "name"
+ORDER BY "avg_actual_length" DESC
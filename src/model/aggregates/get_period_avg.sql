@@ -0,0 +1,40 @@
+SELECT
+    "period" AS "date",
+    SUM("sum_actual_length")/CAST(SUM("count") AS REAL) AS "avg_actual_length",
+    SUM("sum_length")/CAST(SUM("count") AS REAL) AS "avg_length",
+    SUM("sum_percent")/CAST(SUM("count") AS REAL) AS "avg_percent"
+FROM (
+    -- Whole periods within the range are read from the period rollup
+    SELECT
+        "period_start" AS "period",
+        "count",
+        "sum_length",
+        "sum_actual_length",
+        "sum_percent"
+    FROM "log_period_rollup"
+    WHERE "granularity" = :granularity
+        AND "period_start" >= :full_from
+        AND "period_start" < :full_to
+        AND "activity_id" IN (SELECT "activity_id" FROM "stats_filter")
+
+    UNION ALL
+
+    -- Periods cut off by the range are summed from its days
+    SELECT
+        CASE :granularity
+            WHEN 'week' THEN "date" - "date" % 7
+            WHEN 'month' THEN CAST(julianday("date", 'start of month') + 0.5 AS INTEGER)
+            WHEN 'quarter' THEN CAST(julianday("date", 'start of month', '-' || ((cast(strftime('%m', "date") AS INTEGER) - 1) % 3) || ' months') + 0.5 AS INTEGER)
+            WHEN 'year' THEN CAST(julianday("date", 'start of year') + 0.5 AS INTEGER)
+        END,
+        "count",
+        "sum_length",
+        "sum_actual_length",
+        "sum_percent"
+    FROM "stats_selection"
+    WHERE "date" < :full_from
+        OR "date" >= :full_to
+)
+GROUP BY "period"
+HAVING SUM("count") > 0
+ORDER BY "period" ASC
@@ -0,0 +1,7 @@
+SELECT
+    "name",
+    SUM("total_actual_length") AS "total_actual_length"
+FROM "stats_selection"
+GROUP BY "name"
+HAVING SUM("total_actual_length") > 0
+ORDER BY "total_actual_length" DESC
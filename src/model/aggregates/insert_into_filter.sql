@@ -0,0 +1,2 @@
+INSERT INTO "stats_filter" ("activity_id")
+VALUES (:activity_id)
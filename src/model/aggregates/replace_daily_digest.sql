@@ -0,0 +1,12 @@
+INSERT OR REPLACE INTO "log_daily_digest" (
+    "date",
+    "activity_id",
+    "actual_length_digest",
+    "percent_digest"
+)
+VALUES (
+    :date,
+    :activity_id,
+    :actual_length_digest,
+    :percent_digest
+)
@@ -0,0 +1,22 @@
+INSERT INTO "stats_selection" (
+    "date",
+    "name",
+    "count",
+    "sum_length",
+    "sum_actual_length",
+    "sum_percent",
+    "total_actual_length"
+)
+SELECT
+    "date",
+    "name",
+    "count",
+    "sum_length",
+    "sum_actual_length",
+    "sum_percent",
+    "total_actual_length"
+FROM "log_daily_rollup" AS r
+    INNER JOIN "activities" AS a
+        ON a.id = r.activity_id
+WHERE "date" BETWEEN :date_from AND :date_to
+    AND "activity_id" IN (SELECT "activity_id" FROM "stats_filter")
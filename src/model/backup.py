@@ -1,54 +1,472 @@
-from PyQt5.QtCore import QDir, QFile, QDateTime
+import gzip
+import json
+import lzma
+import os
+import shutil
+import sqlite3
+import struct
+import time
+import zlib
+from collections import namedtuple
+from enum import Enum, auto
 
-class Backup:
+from PyQt5.QtCore import QDir, QFile, QDateTime, QObject, QThread, pyqtSignal, pyqtSlot
+
+from model.chunk_store import ChunkStore
+
+class Compression(Enum):
+    """Compression of backup files, chosen by their extension."""
+
+    NONE = 0
+    GZIP = auto()
+    XZ = auto()
+
+    @property
+    def extension(self):
+        return {
+            Compression.NONE: "",
+            Compression.GZIP: ".gz",
+            Compression.XZ: ".xz",
+        }[self]
+
+    @classmethod
+    def for_path(cls, path):
+        for compression in [cls.GZIP, cls.XZ]:
+            if path.endswith(compression.extension):
+                return compression
+        return cls.NONE
+
+    def open(self, path, mode, level=None):
+        if self == Compression.GZIP:
+            return gzip.open(path, mode, **({"compresslevel": level} if level else {}))
+        if self == Compression.XZ:
+            return lzma.open(path, mode, **({"preset": level} if level else {}))
+        return open(path, mode)
+
+def compress_file(source_path, destination_path, compression, level=None):
+    """Streams a file into a compressed one.
+
+    Returns the compressed size as a fraction of the original size, and
+    the seconds it took.
+    """
+
+    start = time.perf_counter()
+    partial_path = destination_path + ".part"
+    with open(source_path, "rb") as source, compression.open(partial_path, "wb", level) as destination:
+        shutil.copyfileobj(source, destination)
+    os.replace(partial_path, destination_path)
+    seconds = time.perf_counter() - start
+
+    source_size = os.path.getsize(source_path)
+    ratio = os.path.getsize(destination_path) / source_size if source_size else 1.0
+    return ratio, seconds
+
+class DecompressionError(Exception):
+    def __init__(self, path, error):
+        super().__init__(f"The backup {path} could not be decompressed: {error}")
+
+def decompress_file(source_path, destination_path):
+    """Streams a backup file, compressed or not, into a plain one.
+
+    Raises a `DecompressionError` if the backup is truncated or not
+    validly compressed, removing what was written of the plain file.
+    """
+
+    try:
+        with Compression.for_path(source_path).open(source_path, "rb") as source, open(destination_path, "wb") as destination:
+            shutil.copyfileobj(source, destination)
+    except (EOFError, lzma.LZMAError, gzip.BadGzipFile, zlib.error) as e:
+        QFile.remove(destination_path)
+        raise DecompressionError(source_path, e) from e
+
+def copy_database(source_path, destination_path, progress=None, pages_per_step=256):
+    """Copies a database with SQLite's online backup API.
+
+    Pages are copied a few at a time, so other connections can keep
+    writing in between, and the copy is consistent even if they do.
+    `progress` is called with the number of pages copied and the total
+    after every step. The copy is written next to the destination and
+    only renamed into place once it is complete.
+    """
+
+    partial_path = destination_path + ".part"
+    QFile.remove(partial_path)
+
+    source = sqlite3.connect(source_path)
+    destination = sqlite3.connect(partial_path)
+    try:
+        source.backup(
+            destination,
+            pages=pages_per_step,
+            progress=(lambda status, remaining, total: progress(total - remaining, total)) if progress else None
+        )
+    finally:
+        destination.close()
+        source.close()
+
+    QFile.remove(destination_path)
+    QFile.rename(partial_path, destination_path)
+
+class BackupIntegrityError(Exception):
+    def __init__(self, path, problems):
+        message = f"The backup {path} is damaged:\n" + "\n".join(problems)
+        super().__init__(message)
+
+def check_integrity(path, backup_path=None):
+    """Raises a `BackupIntegrityError` unless SQLite finds the database
+    at `path` intact.
+
+    `backup_path` names the backup in the error, if it was unpacked to
+    `path`.
+    """
+
+    connection = sqlite3.connect(path)
+    try:
+        problems = [row[0] for row in connection.execute("PRAGMA integrity_check")]
+    except sqlite3.DatabaseError as e:
+        problems = [str(e)]
+    finally:
+        connection.close()
+
+    if problems != ["ok"]:
+        raise BackupIntegrityError(backup_path or path, problems)
+
+class RetentionPolicy(namedtuple("RetentionPolicy", ["recent", "days", "weeks", "months"])):
+    """Grandfather-father-son retention of backups.
+
+    The `recent` newest backups are kept, and so is the newest backup of
+    each of the last `days` days, `weeks` weeks and `months` months that
+    have backups at all, so a long break does not empty the history.
+    """
+
+    def select(self, names):
+        """Returns the names of the backups to keep.
+
+        Backups are dated by their names, which sort by when they were
+        made, so a single pass over them newest first classifies each
+        one without looking at the files.
+        """
+
+        kept = set()
+        periods = [
+            (self.days, lambda date: date.toJulianDay(), set()),
+            (self.weeks, lambda date: date.weekNumber()[::-1], set()),
+            (self.months, lambda date: (date.year(), date.month()), set()),
+        ]
+
+        for index, name in enumerate(sorted(names, reverse=True)):
+            if index < self.recent:
+                kept.add(name)
+
+            date = Backup.date_of(name)
+            if not date.isValid():
+                continue
+
+            for limit, key, seen in periods:
+                period = key(date)
+                if period not in seen and len(seen) < limit:
+                    seen.add(period)
+                    kept.add(name)
+
+        return kept
+
+class BackupWorker(QObject):
+    """Writes backups on a worker thread, one request at a time."""
+
+    progressChanged = pyqtSignal(int, int)
+    backupWritten = pyqtSignal(str)
+    backupFailed = pyqtSignal(str)
+
+    def __init__(self, backup):
+        super().__init__()
+        self.backup = backup
+
+    @pyqtSlot(object, bool, int, int)
+    def create(self, retention, deduplicate, compression, level):
+        self._write(lambda: self.backup._write_backup(
+            retention,
+            deduplicate,
+            Compression(compression),
+            level,
+            self.progressChanged.emit
+        ))
+
+    @pyqtSlot(str, int)
+    def export(self, path, level):
+        self._write(lambda: self.backup._write_copy(path, self.progressChanged.emit, level))
+
+    def _write(self, write):
+        try:
+            path = write()
+        # Anything escaping the slot would keep `backupsFinished` from
+        # ever being emitted, e.g. a damaged snapshot manifest
+        except (sqlite3.Error, OSError, ValueError) as e:
+            self.backupFailed.emit(str(e))
+        else:
+            self.backupWritten.emit(path)
+
+    @pyqtSlot()
+    def stop(self):
+        QThread.currentThread().quit()
+
+class Backup(QObject):
+    """Creates, rotates and restores copies of the database.
+
+    The `*_async` methods write on a worker thread and report their
+    progress, so the GUI is never blocked by a large database.
+    `backupsFinished` is emitted once every requested backup is done.
+
+    Backups are either full copies, optionally compressed, or, if
+    deduplication is enabled, snapshots in a `ChunkStore` that share
+    their unchanged chunks. Exports are compressed if their path ends
+    in the extension of a `Compression`.
+
+    The names of the backups are listed in a manifest, so naming and
+    pruning them, which happens after every backup, does not have to
+    list and stat the backup directory.
+    """
+
+    MANIFEST = "backups.json"
     DATETIME_FORMAT = "yyyy-MM-dd-hh-mm-ss"
+    NAME_FILTERS = [
+        "backup-????-??-??-??-??-??*.db",
+        "backup-????-??-??-??-??-??*.db.gz",
+        "backup-????-??-??-??-??-??*.db.xz",
+        "backup-????-??-??-??-??-??*" + ChunkStore.EXTENSION,
+    ]
+
+    progressChanged = pyqtSignal(int, int)
+    backupWritten = pyqtSignal(str)
+    backupFailed = pyqtSignal(str)
+    backupsFinished = pyqtSignal()
+    backupCompressed = pyqtSignal(float, float)
+    _createRequested = pyqtSignal(object, bool, int, int)
+    _exportRequested = pyqtSignal(str, int)
+    _stopRequested = pyqtSignal()
 
     def __init__(self, path, database, config):
+        if not database.backend.stores_file:
+            raise ValueError(f"Backups need a database file, not the {database.backend_name} storage backend")
+
+        super().__init__()
         self.path = path
         self.database = database
         self.config = config
+        self.chunk_store = ChunkStore(path)
+        self.manifest_path = os.path.join(path, self.MANIFEST)
+        self._worker = None
+        self._pending = 0
+
+        # Compressing on the worker thread reports back to this one
+        self.backupCompressed.connect(self._save_compression_stats)
 
-    def create_backup_name(self):
-        """Creates a unique name for a backup file."""
+    def create_backup_name(self, extension=".db", names=None):
+        """Creates a unique name for a backup file.
+
+        `names` are the backups that already exist, read from the
+        manifest if not given.
+        """
 
         datetime_str = QDateTime.currentDateTime().toString(
             self.DATETIME_FORMAT
         )
 
+        prefix = f"backup-{datetime_str}-"
+        taken = {
+            name[len(prefix):len(prefix) + 4]
+            for name in (self.read_manifest() if names is None else names)
+            if name.startswith(prefix)
+        }
+
         number = 0
-        name = f"{self.path}/backup-{datetime_str}-{number:04}.db"
-        while QFile.exists(name):
+        while f"{number:04}" in taken:
             number += 1
-            name = f"{self.path}/backup-{datetime_str}-{number:04}.db"
 
-        return name
+        return f"{self.path}/{prefix}{number:04}{extension}"
+
+    @classmethod
+    def date_of(cls, name):
+        """Returns the date a backup was made, as stated by its name."""
+
+        return QDateTime.fromString(name[7:26], cls.DATETIME_FORMAT).date()
+
+    def read_manifest(self):
+        """Returns the names of the backups.
+
+        If there is no manifest yet, it is built from the backup
+        directory once.
+        """
+
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)["backups"]
+        except (OSError, ValueError, KeyError):
+            return QDir(self.path).entryList(self.NAME_FILTERS, QDir.Files)
+
+    def write_manifest(self, names):
+        partial_path = self.manifest_path + ".part"
+        with open(partial_path, "w") as f:
+            json.dump({"backups": sorted(names)}, f, indent=4)
+        os.replace(partial_path, self.manifest_path)
 
     def export(self, path):
-        db_file = QFile(self.database.path)
-        db_file.copy(path)
+        level = self._compression_level()
+        # Settings waiting to be written belong in the copy
+        self.config.flush()
+        self._write_copy(path, level=level)
 
     def create(self):
-        # Make copy of database
+        retention, deduplicate, compression, level = self._backup_settings()
+        self.config.flush()
+        self._write_backup(retention, deduplicate, Compression(compression), level)
 
-        db_file = QFile(self.database.path)
-        db_file.copy(self.create_backup_name())
+    def export_async(self, path):
+        level = self._compression_level()
+        self.config.flush()
+        self._request(self._exportRequested, path, level)
 
-        # Delete old backups
+    def create_async(self):
+        settings = self._backup_settings()
+        self.config.flush()
+        self._request(self._createRequested, *settings)
 
-        number_of_backups = self.config.get_setting("user.backup/number_of_backups", 50)
+    def restore(self, path):
+        """Replaces the database with a backup and reconnects to it.
 
-        backup_dir = QDir(self.path)
-        backup_dir.setFilter(QDir.Files)
-        backup_dir.setNameFilters(["backup-????-??-??-??-??-??*.db"])
-        backup_dir.setSorting(QDir.Time | QDir.Reversed)
+        The backup is unpacked next to the database and checked before
+        anything is replaced, raising a `BackupIntegrityError` if it is
+        damaged or cannot be unpacked. A backup of the current database
+        is made first. Models reading the database have to be reloaded
+        afterwards.
+        """
 
-        backups = backup_dir.entryInfoList()
-        if len(backups) >= number_of_backups:
-            for backup in backups[:-number_of_backups]:
-                QFile.remove(backup.absoluteFilePath())
+        restore_path = self.database.path + ".restore"
+        try:
+            self._unpack(path, restore_path)
+            check_integrity(restore_path, path)
+        except:
+            QFile.remove(restore_path)
+            raise
 
-    def restore(self, path):
+        self.stop_worker()
         self.create()
-        self.database.disconnect()
-        QFile.remove(self.database.path)
-        QFile.copy(path, self.database.path)
+        self.database.backend.close()
+        os.replace(restore_path, self.database.path)
+        self.database.reconnect()
+
+    def _unpack(self, path, restore_path):
+        try:
+            if path.endswith(ChunkStore.EXTENSION):
+                self.chunk_store.read_snapshot(path, restore_path)
+            else:
+                decompress_file(path, restore_path)
+        # A missing chunk or file, a truncated archive or a malformed
+        # manifest all mean the backup cannot be restored
+        except (OSError, EOFError, lzma.LZMAError, ValueError, struct.error, DecompressionError) as e:
+            raise BackupIntegrityError(path, [str(e)]) from e
+
+    def _save_compression_stats(self, ratio, seconds):
+        self.config.set_setting("user.backup/last_compression_ratio", ratio)
+        self.config.set_setting("user.backup/last_compression_seconds", seconds)
+
+    def _backup_settings(self):
+        return (
+            RetentionPolicy(
+                self.config.get_setting("user.backup/number_of_backups", 50),
+                self.config.get_setting("user.backup/keep_days", 7),
+                self.config.get_setting("user.backup/keep_weeks", 4),
+                self.config.get_setting("user.backup/keep_months", 12),
+            ),
+            self.config.get_setting("user.backup/deduplicate", False),
+            self.config.get_setting("user.backup/compression", Compression.NONE.value),
+            self._compression_level(),
+        )
+
+    def _compression_level(self):
+        return self.config.get_setting("user.backup/compression_level", 6)
+
+    # Worker thread
+    ################################################################################
+
+    def start_worker(self):
+        self._worker_thread = QThread()
+        self._worker = BackupWorker(self)
+        self._worker.moveToThread(self._worker_thread)
+
+        self._createRequested.connect(self._worker.create)
+        self._exportRequested.connect(self._worker.export)
+        self._stopRequested.connect(self._worker.stop)
+        self._worker.progressChanged.connect(self.progressChanged)
+        # Each result is passed on before `backupsFinished` is emitted
+        self._worker.backupWritten.connect(self.backupWritten)
+        self._worker.backupWritten.connect(self._backup_done)
+        self._worker.backupFailed.connect(self.backupFailed)
+        self._worker.backupFailed.connect(self._backup_done)
+
+        self._worker_thread.start()
+
+    def stop_worker(self):
+        """Waits for the requested backups to be written and stops the worker."""
+
+        if self._worker is None:
+            return
+
+        self._stopRequested.emit()
+        self._worker_thread.wait()
+        self._worker = None
+
+    def _request(self, signal, *args):
+        if self._worker is None:
+            self.start_worker()
+        self._pending += 1
+        signal.emit(*args)
+
+    def _backup_done(self, _):
+        self._pending -= 1
+        if self._pending == 0:
+            self.backupsFinished.emit()
+
+    # Writing backups, on either thread
+    ################################################################################
+
+    def _write_copy(self, path, progress=None, level=None):
+        compression = Compression.for_path(path)
+        if compression == Compression.NONE:
+            copy_database(self.database.path, path, progress)
+            return path
+
+        copy_path = path + ".db.part"
+        copy_database(self.database.path, copy_path, progress)
+        try:
+            self.backupCompressed.emit(*compress_file(copy_path, path, compression, level))
+        finally:
+            QFile.remove(copy_path)
+        return path
+
+    def _write_backup(self, retention, deduplicate=False, compression=Compression.NONE, level=None, progress=None):
+        names = self.read_manifest()
+
+        if deduplicate:
+            name = self.create_backup_name(ChunkStore.EXTENSION, names)
+            # The consistent copy is only kept until it is split into chunks
+            copy_path = self._write_copy(name + ".db.part", progress)
+            try:
+                self.chunk_store.write_snapshot(copy_path, name)
+            finally:
+                QFile.remove(copy_path)
+        else:
+            name = self._write_copy(self.create_backup_name(".db" + compression.extension, names), progress, level)
+
+        # Delete old backups
+
+        names.append(os.path.basename(name))
+        kept = retention.select(names)
+        for old_name in names:
+            if old_name not in kept:
+                QFile.remove(os.path.join(self.path, old_name))
+        self.write_manifest(kept)
+
+        if deduplicate or QDir(self.chunk_store.chunk_path).exists():
+            self.chunk_store.collect_garbage()
+
+        return name
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import struct
+
+class ChunkStore:
+    """Content-addressed store of database snapshots.
+
+    A snapshot is split into fixed-size chunks, each stored once under
+    the hash of its contents. The snapshot itself is a manifest listing
+    the hashes of its chunks in order, so consecutive backups share
+    every chunk that did not change and only the changed pages are
+    written again.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+    EXTENSION = ".snapshot"
+
+    _MAGIC = b"LPSS"
+    _HEADER = struct.Struct("<4sIQ")
+    _DIGEST_SIZE = hashlib.sha256().digest_size
+
+    def __init__(self, path):
+        self.path = path
+        self.chunk_path = os.path.join(path, "chunks")
+
+    def _chunk_file(self, digest):
+        name = digest.hex()
+        return os.path.join(self.chunk_path, name[:2], name)
+
+    def write_snapshot(self, source_path, manifest_path):
+        """Stores the file at `source_path` as a snapshot described by
+        the manifest at `manifest_path`.
+
+        Returns the number of chunks that were not already stored.
+        """
+
+        digests = []
+        new_chunks = 0
+        with open(source_path, "rb") as source:
+            while chunk := source.read(self.CHUNK_SIZE):
+                digest = hashlib.sha256(chunk).digest()
+                digests.append(digest)
+
+                chunk_file = self._chunk_file(digest)
+                if not os.path.exists(chunk_file):
+                    os.makedirs(os.path.dirname(chunk_file), exist_ok=True)
+                    self._write_atomically(chunk_file, chunk)
+                    new_chunks += 1
+
+        size = os.path.getsize(source_path)
+        self._write_atomically(
+            manifest_path,
+            self._HEADER.pack(self._MAGIC, self.CHUNK_SIZE, size) + b"".join(digests)
+        )
+        return new_chunks
+
+    def read_snapshot(self, manifest_path, destination_path):
+        """Rebuilds the snapshot described by a manifest, one chunk at a time."""
+
+        with open(destination_path, "wb") as destination:
+            for digest in self.read_manifest(manifest_path):
+                with open(self._chunk_file(digest), "rb") as chunk:
+                    destination.write(chunk.read())
+
+    def read_manifest(self, manifest_path):
+        """Returns the chunk hashes of a snapshot in order.
+
+        Raises a `ValueError` if the file is not a complete manifest.
+        """
+
+        with open(manifest_path, "rb") as f:
+            data = f.read()
+
+        if len(data) < self._HEADER.size:
+            raise ValueError(f"Not a snapshot manifest: {manifest_path}")
+        magic, chunk_size, size = self._HEADER.unpack_from(data)
+        if magic != self._MAGIC:
+            raise ValueError(f"Not a snapshot manifest: {manifest_path}")
+
+        # One digest for every chunk of the snapshot, the last one partial
+        digest_data = data[self._HEADER.size:]
+        if not chunk_size or len(digest_data) != -(-size // chunk_size) * self._DIGEST_SIZE:
+            raise ValueError(f"Truncated snapshot manifest: {manifest_path}")
+
+        return [
+            digest_data[i:i + self._DIGEST_SIZE]
+            for i in range(0, len(digest_data), self._DIGEST_SIZE)
+        ]
+
+    def collect_garbage(self):
+        """Deletes the chunks that no remaining snapshot refers to.
+
+        The chunks of a snapshot whose manifest cannot be read are
+        deleted too, since the snapshot cannot be rebuilt without it.
+        """
+
+        referenced = set()
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(self.EXTENSION):
+                try:
+                    digests = self.read_manifest(entry.path)
+                except ValueError:
+                    continue
+                referenced.update(digest.hex() for digest in digests)
+
+        if not os.path.isdir(self.chunk_path):
+            return
+
+        for directory in os.scandir(self.chunk_path):
+            for entry in os.scandir(directory.path):
+                if entry.name not in referenced:
+                    os.remove(entry.path)
+
+    @staticmethod
+    def _write_atomically(path, data):
+        partial_path = path + ".part"
+        with open(partial_path, "wb") as f:
+            f.write(data)
+        os.replace(partial_path, path)
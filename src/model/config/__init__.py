@@ -1,38 +1,81 @@
+from PyQt5.QtCore import QTimer
+
 from model.storage import Database
 
 from model.config import queries
 
 class Config:
-    """Interface for application settings"""
+    """Interface for application settings
+
+    The settings are read from the database once and then served from
+    memory. Changed settings are written back together shortly after
+    they change, or as soon as `flush` is called.
+    """
+
+    FLUSH_DELAY = 1000
 
     def __init__(self, database):
         self.database = database
-        self.query_get = self.database.get_prepared_query(queries.get_setting)
-        self.query_has = self.database.get_prepared_query(queries.has_setting)
+
+        self._settings = {}
+        self._dirty = set()
+
+        self._flush_timer = QTimer()
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.FLUSH_DELAY)
+        self._flush_timer.timeout.connect(self.flush)
+
+        self._prepare_queries()
+        self._read_settings()
+
+    def reload(self):
+        """Reads the settings again after the database was reconnected,
+        discarding the ones that were not written yet.
+        """
+
+        self._flush_timer.stop()
+        self._settings.clear()
+        self._dirty.clear()
+        self._prepare_queries()
+        self._read_settings()
+
+    def _prepare_queries(self):
+        self.query_get_all = self.database.get_prepared_query(queries.get_settings)
         self.query_set = self.database.get_prepared_query(queries.insert_setting)
 
+    def _read_settings(self):
+        self.database.execute_query(self.query_get_all)
+        while self.query_get_all.next():
+            self._settings[self.query_get_all.value("key")] = self.query_get_all.value("value")
+        self.query_get_all.finish()
+
     def has_setting(self, key):
-        self.query_has.bindValue(":key", key)
-        self.database.execute_query(self.query_has)
-        self.query_has.first()
-        return bool(self.query_has.value("count"))
+        return key in self._settings
 
     def get_setting(self, key, default_value):
         if not self.has_setting(key):
             self.set_setting(key, default_value)
 
-        self.query_get.bindValue(":key", key)
-        self.database.execute_query(self.query_get)
-        self.query_get.first()
-        value = self.query_get.value("value")
-
         # Cast value to type of default value
-        return type(default_value)(value)
+        return type(default_value)(self._settings[key])
 
     def set_setting(self, key, value):
-        self.query_set.bindValue(":key", key)
-        self.query_set.bindValue(":value", value)
-        self.database.execute_query(self.query_set)
+        self._settings[key] = value
+        self._dirty.add(key)
+        self._flush_timer.start()
+
+    def flush(self):
+        """Writes the settings changed since the last flush to the database."""
+
+        self._flush_timer.stop()
+        if not self._dirty:
+            return
+
+        keys = sorted(self._dirty)
+        self.query_set.bindValue(":key", keys)
+        self.query_set.bindValue(":value", [self._settings[key] for key in keys])
+        self.database.execute_batch_query(self.query_set)
+        self._dirty.clear()
 
     def restore_state(self, widget):
         key = f"ui.{widget.objectName()}/state"
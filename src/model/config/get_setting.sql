@@ -1,3 +0,0 @@
-SELECT "value"
-FROM "config"
-WHERE "key" = :key
@@ -0,0 +1,4 @@
+SELECT
+    "key",
+    "value"
+FROM "config"
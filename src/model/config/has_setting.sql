@@ -1,3 +0,0 @@
-SELECT COUNT(*) as "count"
-FROM "config"
-WHERE "key" = :key
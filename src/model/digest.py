@@ -0,0 +1,117 @@
+import math
+import struct
+
+class TDigest:
+    """Mergeable sketch of a distribution for estimating its quantiles.
+
+    Values are summarized by a bounded number of weighted centroids,
+    which are kept small near the tails so that extreme quantiles stay
+    accurate. Digests of separate days can be merged to answer a query
+    over any date range without reading the values again.
+    """
+
+    COMPRESSION = 100
+
+    _HEADER = struct.Struct("<dd")
+    _CENTROID = struct.Struct("<dd")
+
+    def __init__(self, compression=COMPRESSION):
+        self.compression = compression
+        self._centroids = []
+        self._buffer = []
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def count(self):
+        self._compress()
+        return sum(weight for _, weight in self._centroids)
+
+    def add(self, value, weight=1):
+        self._buffer.append((value, weight))
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def merge(self, other):
+        other._compress()
+        self._buffer.extend(other._centroids)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def _k(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inverse(self, k):
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def _compress(self):
+        if not self._buffer:
+            return
+
+        points = sorted(self._centroids + self._buffer)
+        self._buffer = []
+        total = sum(weight for _, weight in points)
+
+        centroids = [list(points[0])]
+        cumulative = 0
+        limit = total * self._k_inverse(self._k(0) + 1)
+
+        for mean, weight in points[1:]:
+            current = centroids[-1]
+            if cumulative + current[1] + weight <= limit:
+                # Weighted running mean of the merged centroid
+                current[1] += weight
+                current[0] += (mean - current[0]) * weight / current[1]
+            else:
+                cumulative += current[1]
+                limit = total * self._k_inverse(self._k(cumulative / total) + 1)
+                centroids.append([mean, weight])
+
+        self._centroids = [tuple(c) for c in centroids]
+
+    def quantile(self, q):
+        """Returns the estimated value at quantile `q`, or `None` if empty."""
+
+        self._compress()
+        if not self._centroids:
+            return None
+        if len(self._centroids) == 1:
+            return self._centroids[0][0]
+
+        total = sum(weight for _, weight in self._centroids)
+        target = q * total
+
+        # Each centroid's mean sits at the middle of its weight
+        cumulative = 0
+        previous_mean, previous_center = self.min, 0
+        for mean, weight in self._centroids:
+            center = cumulative + weight / 2
+            if target < center:
+                fraction = (target - previous_center) / (center - previous_center)
+                return previous_mean + fraction * (mean - previous_mean)
+            cumulative += weight
+            previous_mean, previous_center = mean, center
+
+        fraction = (target - previous_center) / (total - previous_center)
+        return previous_mean + fraction * (self.max - previous_mean)
+
+    def to_bytes(self):
+        self._compress()
+        return self._HEADER.pack(self.min, self.max) + b"".join(
+            self._CENTROID.pack(mean, weight) for mean, weight in self._centroids
+        )
+
+    @classmethod
+    def from_bytes(cls, data, compression=COMPRESSION):
+        digest = cls(compression)
+        digest.min, digest.max = cls._HEADER.unpack_from(data)
+        digest._centroids = [
+            centroid for centroid in cls._CENTROID.iter_unpack(data[cls._HEADER.size:])
+        ]
+        return digest
@@ -9,6 +9,7 @@ from PyQt5.QtCore import (
     QModelIndex,
     QTimer,
     QTime,
+    QDate,
     QDateTime,
 
     QByteArray,
@@ -21,6 +22,7 @@ from PyQt5.QtCore import (
 )
 from PyQt5.QtWidgets import QApplication
 
+from model.aggregates import DigestStore
 from model.storage import Database
 from ui.importing import ReplaceOption
 from ui.item_delegates import (
@@ -39,12 +41,14 @@ class Activity:
             "label": "F",
             "user_editable": True,
             "delegate": BoolDelegate,
+            "bulk_edit_type": bool,
         },
         {
             "attr": "is_rigid",
             "label": "R",
             "user_editable": True,
             "delegate": BoolDelegate,
+            "bulk_edit_type": bool,
         },
         {
             "attr": "start_time",
@@ -63,6 +67,7 @@ class Activity:
             "label": "Length",
             "user_editable": True,
             "delegate": GenericDelegate,
+            "bulk_edit_type": int,
         },
         {
             "attr": "actual_length",
@@ -90,6 +95,11 @@ class Activity:
 
     ENCODABLE_COLUMNS = EDITABLE_COLUMNS
 
+    BULK_EDIT_FIELDS = [
+        (col["attr"], col["label"], col["bulk_edit_type"])
+        for col in COLUMNS if "bulk_edit_type" in col
+    ]
+
     MIME_TYPE = "application/x-activity"
 
 
@@ -148,6 +158,8 @@ class Activity:
         )
 
 class PlanTableModel(QAbstractTableModel):
+    logArchived = pyqtSignal(QDate)
+
     def __init__(self, parent, database, config, *args):
         QAbstractTableModel.__init__(self, parent, *args)
         self._activities = []
@@ -155,7 +167,22 @@ class PlanTableModel(QAbstractTableModel):
         self.database = database
         self._current_activity_index = self.config.get_setting("current_activity_index", 0)
         self._is_running = False
+        self._last_id = 0
+
+        self._prepare_queries()
+        self._read_activities()
+
+    def reload(self):
+        """Reads the plan again after the database was reconnected."""
 
+        self.beginResetModel()
+        self._current_activity_index = self.config.get_setting("current_activity_index", 0)
+        self._is_running = False
+        self._prepare_queries()
+        self._read_activities()
+        self.endResetModel()
+
+    def _prepare_queries(self):
         self.query_count = self.database.get_prepared_query(queries.count)
         self.query_insert = self.database.get_prepared_query(queries.insert_activity)
         self.query_increment = self.database.get_prepared_query(queries.reorder_after_insertion)
@@ -166,10 +193,11 @@ class PlanTableModel(QAbstractTableModel):
         self.query_clear = self.database.get_prepared_query(queries.delete_all_activities)
         self.query_archive_name = self.database.get_prepared_query(queries.insert_into_activities)
         self.query_insert_into_log = self.database.get_prepared_query(queries.insert_into_log)
+        self.query_refresh_daily_rollup = self.database.get_prepared_query(queries.refresh_daily_rollup)
+        self.query_refresh_hourly_rollup = self.database.get_prepared_query(queries.refresh_hourly_rollup)
+        self.digests = DigestStore(self.database)
         self.query_all_names = self.database.get_prepared_query(queries.get_all_names)
 
-        self._read_activities()
-
     # CRUD operations
     ################################################################################
 
@@ -193,14 +221,17 @@ class PlanTableModel(QAbstractTableModel):
             self.query_increment.bindValue(":offset", len(activities))
             self.database.execute_query(self.query_increment)
 
-            max_id = QDateTime.currentDateTime().toMSecsSinceEpoch()
+            # Ids are creation times, kept unique when several are
+            # created within the same millisecond
+            max_id = max(QDateTime.currentDateTime().toMSecsSinceEpoch(), self._last_id + 1)
+            self._last_id = max_id + len(activities) - 1
 
             for i, activity in enumerate(activities):
                 activity.id = max_id + i
 
             self.query_insert.bindValue(":id", [a.id for a in activities])
             self.query_insert.bindValue(":order", [index + i for i in range(len(activities))])
-            self.query_insert.bindValue(":start_time", [QTime.toString(a.start_time, Database.TIME_FORMAT) for a in activities])
+            self.query_insert.bindValue(":start_time", [Database.to_minute(a.start_time) for a in activities])
             self.query_insert.bindValue(":name", [a.name for a in activities])
             self.query_insert.bindValue(":length", [a.length for a in activities])
             self.query_insert.bindValue(":is_fixed", [a.is_fixed for a in activities])
@@ -250,6 +281,39 @@ class PlanTableModel(QAbstractTableModel):
         self.calculate()
         self.layoutChanged.emit()
 
+    def bulk_edit(self, indices, options):
+        """Applies one change to all of the given activities at once.
+
+        The activities are written with a single batched update in one
+        transaction, followed by one recalculation of the plan.
+        """
+
+        valid_indices = [i for i in indices if i >= self._current_activity_index]
+        if not valid_indices:
+            return
+
+        attr = options["attr"]
+        activities = [self._activities[i] for i in valid_indices]
+        for activity in activities:
+            setattr(activity, attr, options["operation"].apply(getattr(activity, attr), options["value"]))
+
+        self.query_update.bindValue(":id", [a.id for a in activities])
+        self.query_update.bindValue(":order", valid_indices)
+        self.query_update.bindValue(":start_time", [Database.to_minute(a.start_time) for a in activities])
+        self.query_update.bindValue(":name", [a.name for a in activities])
+        self.query_update.bindValue(":length", [a.length for a in activities])
+        self.query_update.bindValue(":actual_length", [a.actual_length for a in activities])
+        self.query_update.bindValue(":is_fixed", [a.is_fixed for a in activities])
+        self.query_update.bindValue(":is_rigid", [a.is_rigid for a in activities])
+        self.database.execute_batch_query(self.query_update)
+
+        self.calculate()
+        # Recalculation can change every activity after the first edited one
+        self.dataChanged.emit(
+            self.index(min(valid_indices), 0),
+            self.index(len(self._activities) - 1, self.columnCount() - 1)
+        )
+
     def clear(self):
         self.layoutAboutToBeChanged.emit()
         self.set_current_activity_index(0)
@@ -277,7 +341,10 @@ class PlanTableModel(QAbstractTableModel):
             query_import.bindValue(":order", list(range(len(activities_json))))
             query_import.bindValue(":name", [a["name"] for a in activities_json])
             query_import.bindValue(":length", [a["length"] for a in activities_json])
-            query_import.bindValue(":start_time", [a["start_time"] for a in activities_json])
+            query_import.bindValue(":start_time", [
+                Database.to_minute(QTime.fromString(a["start_time"], Database.TIME_FORMAT))
+                for a in activities_json
+            ])
             query_import.bindValue(":is_fixed", [a["is_fixed"] for a in activities_json])
             query_import.bindValue(":is_rigid", [a["is_rigid"] for a in activities_json])
 
@@ -488,7 +555,7 @@ class PlanTableModel(QAbstractTableModel):
             id=self.query_read.value("id"),
             name=self.query_read.value("name"),
             length=self.query_read.value("length"),
-            start_time=QTime.fromString(self.query_read.value("start_time"), Database.TIME_FORMAT),
+            start_time=Database.from_minute(self.query_read.value("start_time")),
             is_fixed=bool(self.query_read.value("is_fixed")),
             is_rigid=bool(self.query_read.value("is_rigid")),
         )
@@ -511,18 +578,35 @@ class PlanTableModel(QAbstractTableModel):
 
     def _archive(self):
         activities = self._activities[:-1]
-        self.query_archive_name.bindValue(":name", [a.name for a in activities])
-        self.database.execute_batch_query(self.query_archive_name)
-
-        self.query_insert_into_log.bindValue(":order", [i for i, a in enumerate(activities)])
-        self.query_insert_into_log.bindValue(":start_time", [a.start_time.toString(Database.TIME_FORMAT) for a in activities])
-        self.query_insert_into_log.bindValue(":name", [a.name for a in activities])
-        self.query_insert_into_log.bindValue(":length", [a.length for a in activities])
-        self.query_insert_into_log.bindValue(":actual_length", [a.actual_length for a in activities])
-        self.query_insert_into_log.bindValue(":optimal_length", [a.optimal_length for a in activities])
-        self.query_insert_into_log.bindValue(":is_fixed", [int(a.is_fixed) for a in activities])
-        self.query_insert_into_log.bindValue(":is_rigid", [int(a.is_rigid) for a in activities])
-        self.database.execute_batch_query(self.query_insert_into_log)
+
+        # The log is dated in UTC, as it was when SQLite dated it
+        log_date = QDateTime.currentDateTimeUtc().date()
+        log_day = Database.to_day(log_date)
+
+        # The rollups must never disagree with the log they summarize
+        with self.database.transaction():
+            self.query_archive_name.bindValue(":name", [a.name for a in activities])
+            self.database.execute_batch_query(self.query_archive_name)
+
+            self.query_insert_into_log.bindValue(":date", [log_day for a in activities])
+            self.query_insert_into_log.bindValue(":order", [i for i, a in enumerate(activities)])
+            self.query_insert_into_log.bindValue(":start_time", [Database.to_minute(a.start_time) for a in activities])
+            self.query_insert_into_log.bindValue(":name", [a.name for a in activities])
+            self.query_insert_into_log.bindValue(":length", [a.length for a in activities])
+            self.query_insert_into_log.bindValue(":actual_length", [a.actual_length for a in activities])
+            self.query_insert_into_log.bindValue(":optimal_length", [a.optimal_length for a in activities])
+            self.query_insert_into_log.bindValue(":is_fixed", [int(a.is_fixed) for a in activities])
+            self.query_insert_into_log.bindValue(":is_rigid", [int(a.is_rigid) for a in activities])
+            self.database.execute_batch_query(self.query_insert_into_log)
+
+            self.query_refresh_daily_rollup.bindValue(":date", log_day)
+            self.database.execute_query(self.query_refresh_daily_rollup)
+            self.query_refresh_hourly_rollup.bindValue(":date", log_day)
+            self.database.execute_query(self.query_refresh_hourly_rollup)
+            self.database.update_period_rollups(log_date)
+            self.digests.refresh(log_date)
+
+        self.logArchived.emit(log_date)
 
     # Qt API Implementation
     ################################################################################
@@ -566,7 +650,7 @@ class PlanTableModel(QAbstractTableModel):
 
             self.query_update.bindValue(":id", activity.id)
             self.query_update.bindValue(":order", index.row())
-            self.query_update.bindValue(":start_time", QTime.toString(activity.start_time, Database.TIME_FORMAT))
+            self.query_update.bindValue(":start_time", Database.to_minute(activity.start_time))
             self.query_update.bindValue(":name", activity.name)
             self.query_update.bindValue(":length", activity.length)
             self.query_update.bindValue(":actual_length", activity.actual_length)
@@ -10,7 +10,7 @@ INSERT INTO "activity_log" (
     "is_rigid"
 )
 SELECT
-    date(),
+    :date,
     :order,
     :start_time,
     "id",
@@ -0,0 +1,20 @@
+INSERT OR REPLACE INTO "log_daily_rollup" (
+    "date",
+    "activity_id",
+    "count",
+    "sum_length",
+    "sum_actual_length",
+    "sum_percent",
+    "total_actual_length"
+)
+SELECT
+    "date",
+    "activity_id",
+    COUNT(CASE WHEN "length" <> 0 THEN 1 END),
+    TOTAL(CASE WHEN "length" <> 0 THEN "length" END),
+    TOTAL(CASE WHEN "length" <> 0 THEN "actual_length" END),
+    TOTAL(CASE WHEN "length" <> 0 THEN "actual_length" * 100/CAST("length" AS REAL) END),
+    TOTAL(CASE WHEN "actual_length" > 0 THEN "actual_length" END)
+FROM "activity_log"
+WHERE "date" = :date
+GROUP BY "date", "activity_id"
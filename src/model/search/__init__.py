@@ -0,0 +1,150 @@
+import unicodedata
+from collections import defaultdict, namedtuple
+
+import model.search.queries as queries
+
+SearchHit = namedtuple("SearchHit", ["source", "id", "name", "rank"])
+
+class SearchIndex:
+    """In-memory trigram index over item names.
+
+    Names are normalized and case-folded once when they are added, so
+    plain-text substring searches only have to look at the items that
+    share every trigram of the query instead of scanning every name.
+    """
+
+    GRAM_SIZE = 3
+
+    def __init__(self):
+        self._names = {}
+        self._postings = defaultdict(set)
+
+    @staticmethod
+    def normalize(text):
+        return unicodedata.normalize("NFKC", text).casefold()
+
+    @classmethod
+    def grams(cls, text):
+        return {
+            text[i:i + cls.GRAM_SIZE]
+            for i in range(len(text) - cls.GRAM_SIZE + 1)
+        }
+
+    def add(self, id, name):
+        if id in self._names:
+            self.remove(id)
+
+        normalized = self.normalize(name)
+        self._names[id] = normalized
+        for gram in self.grams(normalized):
+            self._postings[gram].add(id)
+
+    def add_all(self, items):
+        for id, name in items:
+            self.add(id, name)
+
+    def remove(self, id):
+        normalized = self._names.pop(id, None)
+        if normalized is None:
+            return
+
+        for gram in self.grams(normalized):
+            posting = self._postings[gram]
+            posting.discard(id)
+            if not posting:
+                del self._postings[gram]
+
+    def clear(self):
+        self._names.clear()
+        self._postings.clear()
+
+    def search(self, text, candidates=None):
+        """Returns the set of ids whose names contain `text`.
+
+        If `candidates` is given, only those ids are considered. This
+        lets a longer query refine the results of a shorter one.
+        """
+
+        query = self.normalize(text)
+        query_grams = self.grams(query)
+
+        if query_grams:
+            postings = sorted(
+                (self._postings.get(gram, set()) for gram in query_grams),
+                key=len
+            )
+            matches = postings[0].intersection(*postings[1:])
+            if candidates is not None:
+                matches.intersection_update(candidates)
+        elif candidates is not None:
+            matches = set(candidates)
+        else:
+            matches = set(self._names)
+
+        if not query:
+            return matches & self._names.keys()
+
+        # Trigrams can match out of order, so confirm the substring
+        return {id for id in matches if query in self._names.get(id, "")}
+
+    def search_prefix(self, text):
+        """Returns the set of ids whose names start with `text`."""
+
+        query = self.normalize(text)
+        return {id for id in self.search(text) if self._names[id].startswith(query)}
+
+    def search_exact(self, text):
+        """Returns the set of ids whose names equal `text`, ignoring case."""
+
+        query = self.normalize(text)
+        return {id for id in self.search(text) if self._names[id] == query}
+
+    def __contains__(self, id):
+        return id in self._names
+
+    def __len__(self):
+        return len(self._names)
+
+class FullTextSearch:
+    """Ranked full-text search over task, plan and activity names.
+
+    The `*_search` FTS5 tables are kept in sync with their content
+    tables by triggers, so searching never has to scan the tables
+    themselves.
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self.query_search = self.database.get_prepared_query(queries.search)
+
+    @staticmethod
+    def to_match_expression(text):
+        """Turns user input into an FTS5 query matching every word as a prefix."""
+
+        words = text.split()
+        return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+
+    def search(self, text, limit=100):
+        """Returns the best matching `SearchHit`s, best match first.
+
+        The `source` of a hit is the name of the table it came from:
+        "tasks", "plan" or "activities".
+        """
+
+        match_expression = self.to_match_expression(text)
+        if not match_expression:
+            return []
+
+        self.query_search.bindValue(":query", match_expression)
+        self.query_search.bindValue(":limit", limit)
+        self.database.execute_query(self.query_search)
+
+        hits = []
+        while self.query_search.next():
+            hits.append(SearchHit(
+                self.query_search.value("source"),
+                self.query_search.value("id"),
+                self.query_search.value("name"),
+                self.query_search.value("rank"),
+            ))
+        return hits
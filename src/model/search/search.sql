@@ -0,0 +1,32 @@
+SELECT *
+FROM (
+    SELECT
+        'tasks' AS "source",
+        "rowid" AS "id",
+        "name",
+        bm25("tasks_search") AS "rank"
+    FROM "tasks_search"
+    WHERE "tasks_search" MATCH :query
+
+    UNION ALL
+
+    SELECT
+        'plan' AS "source",
+        "rowid" AS "id",
+        "name",
+        bm25("plan_search") AS "rank"
+    FROM "plan_search"
+    WHERE "plan_search" MATCH :query
+
+    UNION ALL
+
+    SELECT
+        'activities' AS "source",
+        "rowid" AS "id",
+        "name",
+        bm25("activities_search") AS "rank"
+    FROM "activities_search"
+    WHERE "activities_search" MATCH :query
+)
+ORDER BY "rank"
+LIMIT :limit
@@ -11,35 +11,131 @@ from PyQt5.QtChart import (
     QDateTimeAxis,
     QValueAxis
 )
-from PyQt5.QtCore import Qt, QDate, QTime, QDateTime
-from PyQt5.QtSql import QSqlQuery
-from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QDate, QTime, QDateTime, QObject, QPointF, QThread, pyqtSignal, pyqtSlot
+from PyQt5.QtGui import QStandardItem, QStandardItemModel
 
+from model.aggregates import FilterMode, Granularity, StatsCache, StatsReader
 from model.storage import Database
 
-import model.stats.queries as queries
-
-class StatsModel:
+def downsample(points, threshold):
+    """Reduces `points` to at most `threshold` points that keep the
+    shape of the line, using Largest-Triangle-Three-Buckets.
+
+    `points` is a list of `(x, y)` tuples sorted by `x`. The first and
+    last points are always kept.
+    """
+
+    if threshold >= len(points) or threshold < 3:
+        return points
+
+    sampled = [points[0]]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # The average of the next bucket is the third triangle corner
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, len(points))
+        next_bucket = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(x for x, _ in next_bucket) / len(next_bucket)
+        avg_y = sum(y for _, y in next_bucket) / len(next_bucket)
+
+        # Keep the point of this bucket forming the largest triangle
+        ax, ay = points[a]
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        a = max(
+            range(start, end),
+            key=lambda j: abs(
+                (ax - avg_x) * (points[j][1] - ay)
+                - (ax - points[j][0]) * (avg_y - ay)
+            )
+        )
+        sampled.append(points[a])
+
+    sampled.append(points[-1])
+    return sampled
+
+class StatsWorker(QObject):
+    """Reads chart data on a worker thread through its own read-only
+    connection, so the GUI stays responsive over a long history.
+
+    Requests carry a generation number. A request that has been
+    superseded by a newer one is abandoned between charts.
+    """
+
+    chartReady = pyqtSignal(int, str, object)
+
+    def __init__(self, database_path, backend=None):
+        super().__init__()
+        self.database_path = database_path
+        self.backend = backend
+        self.latest_generation = 0
+        self.database = None
+
+    @pyqtSlot(int, list, list, QDate, QDate, str)
+    def compute(self, generation, charts, activity_ids, date_from, date_to, granularity):
+        if generation != self.latest_generation:
+            return
+
+        if self.database is None:
+            self.database = Database(
+                self.database_path,
+                name=f"{self.database_path}#stats{id(self)}",
+                read_only=True,
+                backend=self.backend
+            )
+            self.database.connect()
+            self.reader = StatsReader(self.database)
+
+        self.reader.select(activity_ids, date_from, date_to, Granularity(granularity))
+        for chart in charts:
+            if generation != self.latest_generation:
+                return
+            self.chartReady.emit(generation, chart, self.reader.read(chart))
+
+    @pyqtSlot()
+    def stop(self):
+        if self.database is not None:
+            del self.reader
+            self.database.disconnect()
+            self.database = None
+        QThread.currentThread().quit()
+
+class StatsModel(QObject):
     """Provides charts and other summarized statistical data from the activity log."""
 
-    def __init__(self, database):
+    # Line series are downsampled to about one point per pixel, and
+    # charts with more points than this are not animated
+    DEFAULT_POINT_BUDGET = 1000
+    ANIMATION_POINT_LIMIT = 200
+
+    chartLoading = pyqtSignal(str)
+    chartLoaded = pyqtSignal(str)
+    _computeRequested = pyqtSignal(int, list, list, QDate, QDate, str)
+    _stopRequested = pyqtSignal()
+
+    def __init__(self, database, cache=None, animated=True):
+        super().__init__()
         self.database = database
-        self._filter_text = ""
+        self.animated = animated
+        self.reader = StatsReader(database)
+        self.cache = cache if cache is not None else StatsCache()
+        self._activity_ids = self.reader.resolve_filter("")
+        self.point_budget = self.DEFAULT_POINT_BUDGET
+        self._granularity = None
+        self._generation = 0
+        self._worker = None
         self._setupAxes()
         self._setupSeries()
-        self._setupQueries()
-        self._get_log_date_range()
+        self._setupQuantileModel()
+        self.min_date, self.max_date = self.reader.get_log_date_range()
 
     # Static values
     ################################################################################
 
     def get_activity_names(self):
-        names = []
-        self.database.execute_query(self.query_activity_names)
-        while self.query_activity_names.next():
-            names.append(self.query_activity_names.value("name"))
-
-        return names
+        return self.reader.get_activity_names()
 
     def get_earliest_log_date(self):
         return self.min_date
@@ -101,9 +197,24 @@ class StatsModel:
         self.circadian_percent_series = QLineSeries()
         self.circadian_percent_series.setName("Percent")
 
+    def _setupQuantileModel(self):
+        # Columns sort by the numbers behind the displayed text
+        self.quantile_model = QStandardItemModel()
+        self.quantile_model.setSortRole(Qt.UserRole)
+        self.quantile_model.setHorizontalHeaderLabels([
+            "Activity",
+            "Count",
+            "Median Actual Length",
+            "90th Percentile",
+            "99th Percentile",
+            "Median Percent",
+            "90th Percentile",
+            "99th Percentile",
+        ])
+
     def get_pie_chart(self):
         chart = QChart()
-        chart.setAnimationOptions(QChart.SeriesAnimations)
+        chart.setAnimationOptions(QChart.SeriesAnimations if self.animated else QChart.NoAnimation)
         chart.setAnimationDuration(500)
         chart.legend().setVisible(True)
         chart.legend().setAlignment(Qt.AlignRight)
@@ -116,7 +227,7 @@ class StatsModel:
     def get_perf_chart(self):
         # Chart
         chart = QChart()
-        chart.setAnimationOptions(QChart.SeriesAnimations)
+        chart.setAnimationOptions(QChart.SeriesAnimations if self.animated else QChart.NoAnimation)
         chart.setAnimationDuration(500)
         chart.legend().setVisible(True)
         chart.legend().setAlignment(Qt.AlignBottom)
@@ -139,7 +250,7 @@ class StatsModel:
     def get_daily_chart(self):
         # Chart
         chart = QChart()
-        chart.setAnimationOptions(QChart.SeriesAnimations)
+        chart.setAnimationOptions(QChart.SeriesAnimations if self.animated else QChart.NoAnimation)
         chart.setAnimationDuration(500)
         chart.legend().setVisible(True)
         chart.legend().setAlignment(Qt.AlignBottom)
@@ -165,7 +276,7 @@ class StatsModel:
     def get_circadian_chart(self):
         # Chart
         chart = QChart()
-        chart.setAnimationOptions(QChart.SeriesAnimations)
+        chart.setAnimationOptions(QChart.SeriesAnimations if self.animated else QChart.NoAnimation)
         chart.setAnimationDuration(500)
         chart.legend().setVisible(True)
         chart.legend().setAlignment(Qt.AlignBottom)
@@ -184,116 +295,184 @@ class StatsModel:
     ## Plot data
     ################################################################################
 
-    def _setupQueries(self):
-        self.query_activity_names = self.database.get_prepared_query(queries.get_activity_names)
-        self.query_log_date_range = self.database.get_prepared_query(queries.get_log_date_range)
+    def set_filter(self, text, mode=FilterMode.CONTAINS):
+        self._activity_ids = self.reader.resolve_filter(text, mode)
 
-        self.query_pie = self.database.get_prepared_query(queries.get_pie_chart)
+    def set_date_range(self, date_from, date_to):
+        self._date_from = date_from
+        self._date_to = date_to
 
-        self.query_perf_axis_range = self.database.get_prepared_query(queries.get_perf_axis_range)
-        self.query_perf = self.database.get_prepared_query(queries.get_perf_chart)
+    def set_granularity(self, granularity):
+        """Sets the periods the trend chart averages over. `None` picks
+        them from the length of the date range.
+        """
 
-        self.query_daily_axis_range = self.database.get_prepared_query(queries.get_daily_axis_range)
-        self.query_daily_avg = self.database.get_prepared_query(queries.get_daily_avg)
+        self._granularity = granularity
 
-        self.query_circadian_axis_range = self.database.get_prepared_query(queries.get_circadian_axis_range)
-        self.query_circadian = self.database.get_prepared_query(queries.get_circadian_chart)
+    def get_granularity(self):
+        if self._granularity is not None:
+            return self._granularity
+        return Granularity.for_range(self._date_from, self._date_to)
 
-    def set_filter(self, text):
-        self._filter_text = text
+    def _cache_key(self, chart):
+        return (chart, tuple(self._activity_ids), self._date_from, self._date_to, self.get_granularity())
 
-    def set_date_range(self, date_from, date_to):
-        self._date_from = date_from
-        self._date_to = date_to
+    def _plot_cached(self):
+        """Plots the charts that are cached and returns the rest."""
 
-    def _get_log_date_range(self):
-        self.database.execute_query(self.query_log_date_range)
-        self.query_log_date_range.first()
-        if self.query_log_date_range.value(0) != "":
-            self.min_date = QDate.fromString(
-                self.query_log_date_range.value("min_date"),
-                Database.DATE_FORMAT
-            )
-            self.max_date = QDate.fromString(
-                self.query_log_date_range.value("max_date"),
-                Database.DATE_FORMAT
-            )
-        else:
-            self.min_date = QDate.currentDate()
-            self.max_date = QDate.currentDate()
+        missing = []
+        for chart in StatsReader.CHARTS:
+            rows = self.cache.get(self._cache_key(chart))
+            if rows is None:
+                missing.append(chart)
+            else:
+                self.plot(chart, rows)
+        return missing
 
     def update_plots(self):
-        self._plot_pie_chart()
-        self._plot_activity_perf_chart()
-        self._plot_activity_circadian_chart()
-        self._plot_daily_avg_chart()
+        """Reads and plots every chart on the calling thread."""
 
-    def _plot_pie_chart(self):
+        missing = self._plot_cached()
+        if not missing:
+            return
+
+        self.reader.select(self._activity_ids, self._date_from, self._date_to, self.get_granularity())
+        for chart in missing:
+            rows = self.reader.read(chart)
+            self.cache.put(self._cache_key(chart), rows, self.cache.generation)
+            self.plot(chart, rows)
+
+    # Background computation
+    ################################################################################
+
+    def start_worker(self):
+        self._worker_thread = QThread()
+        self._worker = StatsWorker(self.database.path, self.database.backend_name)
+        self._worker.moveToThread(self._worker_thread)
+
+        self._computeRequested.connect(self._worker.compute)
+        self._stopRequested.connect(self._worker.stop)
+        self._worker.chartReady.connect(self._chart_ready)
+
+        self._worker_thread.start()
+
+    def stop_worker(self):
+        if self._worker is None:
+            return
+
+        self._worker.latest_generation = -1
+        self._stopRequested.emit()
+        self._worker_thread.wait()
+        self._worker = None
+
+    def request_plots(self):
+        """Plots every chart once the worker has read its data.
+
+        Cached charts are plotted at once, and any request still in
+        progress is cancelled. Falls back to `update_plots` if the
+        worker was never started.
+        """
+
+        if self._worker is None:
+            self.update_plots()
+            return
+
+        self._generation += 1
+        self._worker.latest_generation = self._generation
+        self._cache_generation = self.cache.generation
+
+        missing = self._plot_cached()
+        if not missing:
+            return
+
+        for chart in missing:
+            self.chartLoading.emit(chart)
+        self._computeRequested.emit(
+            self._generation,
+            missing,
+            self._activity_ids,
+            self._date_from,
+            self._date_to,
+            self.get_granularity().value
+        )
+
+    def _chart_ready(self, generation, chart, rows):
+        if generation == self._generation:
+            self.cache.put(self._cache_key(chart), rows, self._cache_generation)
+            self.plot(chart, rows)
+
+    def plot(self, chart, rows):
+        {
+            "pie": self._plot_pie_chart,
+            "perf": self._plot_activity_perf_chart,
+            "daily": self._plot_daily_avg_chart,
+            "circadian": self._plot_activity_circadian_chart,
+            "quantiles": self._plot_quantile_table,
+        }[chart](rows)
+        self.chartLoaded.emit(chart)
+
+    def set_point_budget(self, width):
+        """Limits line series to `width` points, e.g. the chart width in pixels."""
+
+        self.point_budget = max(width, 3)
+
+    def _replace_points(self, series, points):
+        """Replaces the points of a line series in one step."""
+
+        points = downsample(points, self.point_budget)
+        chart = series.chart()
+        if chart is not None:
+            chart.setAnimationOptions(
+                QChart.SeriesAnimations
+                if self.animated and len(points) <= self.ANIMATION_POINT_LIMIT
+                else QChart.NoAnimation
+            )
+        series.replace([QPointF(x, y) for x, y in points])
+
+    @staticmethod
+    def _get_axis_range(values, default):
+        """Returns the range of `values` padded by one unit on each side."""
+
+        if not values:
+            return default
+        return min(values) - 1, max(values) + 1
+
+    def _plot_pie_chart(self, rows):
         # Clear previous chart data
         self.pie_series.clear()
 
-        # Populate the datasets in chart
-        self.query_pie.bindValue(":name", f"%{self._filter_text}%")
-        self.query_pie.bindValue(":date_from", self._date_from)
-        self.query_pie.bindValue(":date_to", self._date_to)
-        self.database.execute_query(self.query_pie)
-
         # Slices are appended in bulk to prevent re-rendering slowdown
         slices = []
-        while self.query_pie.next():
-            total_actual_length = self.query_pie.value("total_actual_length")
-            name = f'{self.query_pie.value("name")} ({total_actual_length} min.)'
-            slices.append(QPieSlice(name, total_actual_length))
+        for name, total_actual_length in rows:
+            slices.append(QPieSlice(f"{name} ({total_actual_length} min.)", total_actual_length))
         self.pie_series.append(slices)
 
-    def _plot_activity_perf_chart(self):
+    def _plot_activity_perf_chart(self, rows):
         # Clear previous chart data
         self.perf_length_series.clear()
         self.perf_percent_series.clear()
         self.perf_x_axis.clear()
 
-        # Set axis range
-        self.query_perf_axis_range.bindValue(":name", f"%{self._filter_text}%")
-        self.query_perf_axis_range.bindValue(":date_from", self._date_from)
-        self.query_perf_axis_range.bindValue(":date_to", self._date_to)
-        self.database.execute_query(self.query_perf_axis_range)
-
-        self.query_perf_axis_range.first()
-        if self.query_perf_axis_range.value(0) != "":
-            min_actual_length = self.query_perf_axis_range.value("min_actual_length") - 1
-            max_actual_length = self.query_perf_axis_range.value("max_actual_length") + 1
-            min_percent = self.query_perf_axis_range.value("min_percent") - 1
-            max_percent = self.query_perf_axis_range.value("max_percent") + 1
-        else:
-            min_actual_length = 0
-            max_actual_length = 0
-            min_percent = 0
-            max_percent = 0
-
-        self.perf_minute_axis.setRange(min_actual_length, max_actual_length)
-        self.perf_percent_axis.setRange(min_percent, max_percent)
-
         # Create and append sets to chart
         length_set = QBarSet("Planned Length")
         actual_length_set = QBarSet("Actual Length")
         percent_set = QBarSet("Percent")
 
-        self.query_perf.bindValue(":name", f"%{self._filter_text}%")
-        self.query_perf.bindValue(":date_from", self._date_from)
-        self.query_perf.bindValue(":date_to", self._date_to)
-        self.database.execute_query(self.query_perf)
-
         # Names are appended in bulk to prevent the slowdown caused by re-rendering
         names = []
-        while self.query_perf.next():
-            names.append(self.query_perf.value("name"))
-            length = self.query_perf.value("avg_length")
-            actual_length = self.query_perf.value("avg_actual_length")
-            percent = self.query_perf.value("avg_percent")
-
+        actual_lengths = []
+        percents = []
+        for name, length, actual_length, percent in rows:
+            names.append(name)
             length_set.append(length)
             actual_length_set.append(actual_length)
             percent_set.append(percent)
+            actual_lengths.append(actual_length)
+            percents.append(percent)
+
+        # Set axis range
+        self.perf_minute_axis.setRange(*self._get_axis_range(actual_lengths, (0, 0)))
+        self.perf_percent_axis.setRange(*self._get_axis_range(percents, (0, 0)))
 
         self.perf_x_axis.append(names)
 
@@ -301,86 +480,63 @@ class StatsModel:
         self.perf_length_series.append(actual_length_set)
         self.perf_percent_series.append(percent_set)
 
-    def _plot_daily_avg_chart(self):
-        # Clear previous chart data
-        self.daily_length_series.clear()
-        self.daily_actual_length_series.clear()
-        self.daily_percent_series.clear()
+    def _plot_daily_avg_chart(self, rows):
+        actual_length_points = []
+        length_points = []
+        percent_points = []
+        for date, actual_length, length, percent in rows:
+            msecs = QDateTime(date, QTime(0,0,0)).toMSecsSinceEpoch()
 
-        # Set axis range
-        self.query_daily_axis_range.bindValue(":name", f"%{self._filter_text}%")
-        self.query_daily_axis_range.bindValue(":date_from", self._date_from)
-        self.query_daily_axis_range.bindValue(":date_to", self._date_to)
-        self.database.execute_query(self.query_daily_axis_range)
+            actual_length_points.append((msecs, actual_length))
+            length_points.append((msecs, length))
+            percent_points.append((msecs, percent))
 
-        self.query_daily_axis_range.first()
-        if self.query_daily_axis_range.value(0) != "":
+        # Set axis range
+        granularity = self.get_granularity()
+        if rows:
+            # The first period may start before the range does
             self.daily_date_axis.setRange(
-                QDateTime(self._date_from),
+                QDateTime(granularity.period_start(self._date_from)),
                 QDateTime(self._date_to)
             )
-
-            min_minute = self.query_daily_axis_range.value("min_minute") - 1
-            max_minute = self.query_daily_axis_range.value("max_minute") + 1
-            min_percent = self.query_daily_axis_range.value("min_percent") - 1
-            max_percent = self.query_daily_axis_range.value("max_percent") + 1
-
-        else:
-            min_minute = -1
-            max_minute = 1
-            min_percent = -1
-            max_percent = 1
-
-        self.daily_minute_axis.setRange(min_minute, max_minute)
-        self.daily_percent_axis.setRange(min_percent, max_percent)
-
-        # Populate the datasets in chart
-        self.query_daily_avg.bindValue(":name", f"%{self._filter_text}%")
-        self.query_daily_avg.bindValue(":date_from", self._date_from)
-        self.query_daily_avg.bindValue(":date_to", self._date_to)
-        self.database.execute_query(self.query_daily_avg)
-
-        while self.query_daily_avg.next():
-            date = QDateTime(QDate.fromString(
-                self.query_daily_avg.value("date"),
-                Database.DATE_FORMAT
-            ), QTime(0,0,0))
-            actual_length = self.query_daily_avg.value("avg_actual_length")
-            length = self.query_daily_avg.value("avg_length")
-            percent = self.query_daily_avg.value("avg_percent")
-
-            self.daily_actual_length_series.append(date.toMSecsSinceEpoch(), actual_length)
-            self.daily_length_series.append(date.toMSecsSinceEpoch(), length)
-            self.daily_percent_series.append(date.toMSecsSinceEpoch(), percent)
-
-    def _plot_activity_circadian_chart(self):
-        # Clear previous chart data
-        self.circadian_percent_series.clear()
+        self.daily_date_axis.setFormat({
+            Granularity.DAY: "dd MMM",
+            Granularity.WEEK: "dd MMM yyyy",
+            Granularity.MONTH: "MMM yyyy",
+            Granularity.QUARTER: "MMM yyyy",
+            Granularity.YEAR: "yyyy",
+        }[granularity])
+
+        minutes = [y for _, y in actual_length_points + length_points]
+        percents = [y for _, y in percent_points]
+        self.daily_minute_axis.setRange(*self._get_axis_range(minutes, (-1, 1)))
+        self.daily_percent_axis.setRange(*self._get_axis_range(percents, (-1, 1)))
+
+        # Points are replaced in bulk to prevent re-rendering slowdown
+        self._replace_points(self.daily_actual_length_series, actual_length_points)
+        self._replace_points(self.daily_length_series, length_points)
+        self._replace_points(self.daily_percent_series, percent_points)
+
+    def _plot_activity_circadian_chart(self, rows):
+        percents = [percent for _, percent in rows]
 
         # Set axis range
-        self.query_circadian_axis_range.bindValue(":name", f"%{self._filter_text}%")
-        self.query_circadian_axis_range.bindValue(":date_from", self._date_from)
-        self.query_circadian_axis_range.bindValue(":date_to", self._date_to)
-        self.database.execute_query(self.query_circadian_axis_range)
-
-        self.query_circadian_axis_range.first()
-        if self.query_circadian_axis_range.value(0) != "":
-            min_percent = self.query_circadian_axis_range.value("min_percent") - 1
-            max_percent = self.query_circadian_axis_range.value("max_percent") + 1
-        else:
-            min_percent = 0
-            max_percent = 0
-
-        self.circadian_percent_axis.setRange(min_percent, max_percent)
-
-        # Populate the datasets in chart
-        self.query_circadian.bindValue(":name", f"%{self._filter_text}%")
-        self.query_circadian.bindValue(":date_from", self._date_from)
-        self.query_circadian.bindValue(":date_to", self._date_to)
-        self.database.execute_query(self.query_circadian)
-
-        while self.query_circadian.next():
-            start_hour = self.query_circadian.value("hour")
-            percent = self.query_circadian.value("avg_percent")
-
-            self.circadian_percent_series.append(start_hour, percent)
+        self.circadian_percent_axis.setRange(*self._get_axis_range(percents, (0, 0)))
+
+        self._replace_points(self.circadian_percent_series, rows)
+
+    def _plot_quantile_table(self, rows):
+        self.quantile_model.removeRows(0, self.quantile_model.rowCount())
+
+        for name, count, *quantiles in rows:
+            items = [QStandardItem(name), QStandardItem(str(count))]
+            items[0].setData(name, Qt.UserRole)
+            items[1].setData(count, Qt.UserRole)
+
+            lengths, percents = quantiles[:3], quantiles[3:]
+            for value, suffix in [(v, " min.") for v in lengths] + [(v, "%") for v in percents]:
+                item = QStandardItem("" if value is None else f"{value:.0f}{suffix}")
+                item.setData(value, Qt.UserRole)
+                items.append(item)
+
+            self.quantile_model.appendRow(items)
@@ -1,11 +1,14 @@
-from PyQt5.QtSql import QSqlDatabase, QSqlQuery
+from contextlib import contextmanager
+
+from PyQt5.QtCore import QDate, QTime
 
 from model.storage import queries
+from model.storage.backends import BACKENDS
+from profiling import profiler
 
 class DbConnectionError(Exception):
-    def __init__(self, connection):
-        e = connection.lastError()
-        message = f"Failed to connect from database: {e.nativeErrorCode()} {e.type()} {e.text()}"
+    def __init__(self, backend):
+        message = f"Failed to connect from database: {backend.error_text()}"
         super().__init__(message)
 
 class QueryError(Exception):
@@ -19,14 +22,105 @@ class QueryError(Exception):
             f"was bound to these values: {b}"
         super().__init__(message)
 
+def _encode_dates_and_times(database):
+    # SQLite cannot change the type of a column, so the tables are set
+    # aside, created again and refilled
+    encoded_tables = {
+        "plan": queries.encode_plan_times,
+        "tasks": queries.encode_task_dates,
+        "activity_log": queries.encode_log_dates,
+    }
+    for table in encoded_tables:
+        database.execute_query(database.get_prepared_query(f'ALTER TABLE "{table}" RENAME TO "{table}_text"'))
+    for table in database.ROLLUP_TABLES:
+        database.execute_query(database.get_prepared_query(f'DROP TABLE "{table}"'))
+
+    database._create_schema()
+    for table, sql in encoded_tables.items():
+        database.execute_query(database.get_prepared_query(sql))
+        database.execute_query(database.get_prepared_query(f'DROP TABLE "{table}_text"'))
+
+    # The triggers of the old tables were dropped along with them.
+    # Indices are created after the migrations.
+    database._create_schema()
+    database.rebuild_rollups()
+
+def _rebuild_digests(database):
+    # Digests are built in Python, by a model that depends on this one
+    from model.aggregates import DigestStore
+    DigestStore(database).rebuild()
+
 class Database:
     """Data access object (DAO) for the application's database"""
 
+    # Formats of dates and times outside the database, e.g. in
+    # exported files. Inside it, dates are stored as Julian day numbers
+    # and times as minutes since midnight.
     DATE_FORMAT = "yyyy-MM-dd"
     TIME_FORMAT = "hh:mm"
 
-    def __init__(self, path):
+    # Each entry upgrades the schema of an existing database by one
+    # version, running SQL strings and calling functions with the
+    # database. New databases are created at the latest version.
+    MIGRATIONS = [
+        # 1: Full-text search over task, plan and activity names
+        [
+            queries.rebuild_task_search,
+            queries.rebuild_plan_search,
+            queries.rebuild_activity_search,
+        ],
+        # 2: Stored task priorities for sorted, paged loading. Tasks
+        # with deadlines are refreshed by the tasklist model.
+        [
+            queries.add_task_priority_column,
+            queries.set_task_base_priority,
+        ],
+        # 3: Daily and hourly rollups of the activity log for statistics
+        [],
+        # 4: Daily quantile digests of the activity log for statistics
+        [],
+        # 5: Weekly, monthly, quarterly and yearly rollups for trend charts
+        [],
+        # 6: Integer dates and times in the plan, tasks and activity log.
+        # The rollups and digests of migrations 3 to 5 are built here,
+        # since the queries building them expect the integer encoding.
+        [
+            _encode_dates_and_times,
+        ],
+    ]
+    SCHEMA_VERSION = len(MIGRATIONS)
+
+    # Granularities of the rollups above a single day
+    PERIOD_GRANULARITIES = ["week", "month", "quarter", "year"]
+
+    # Tables summarizing the activity log, which can be rebuilt from it
+    ROLLUP_TABLES = [
+        "log_daily_rollup",
+        "log_hourly_rollup",
+        "log_daily_digest",
+        "log_period_rollup",
+    ]
+
+    # Name of the backend in `BACKENDS` connected through by default
+    DEFAULT_BACKEND = "qtsql"
+
+    def __init__(self, path, name=None, read_only=False, backend=None):
+        """`name` identifies the connection and defaults to `path`.
+
+        A `read_only` connection can be opened alongside the main
+        connection, e.g. by a worker thread, and never changes the
+        schema.
+
+        `backend` is the name of the storage backend to connect
+        through, `DEFAULT_BACKEND` if not given.
+        """
+
         self.path = path
+        self.name = name or path
+        self.read_only = read_only
+        self.backend_name = backend or self.DEFAULT_BACKEND
+        self.backend = BACKENDS[self.backend_name](self.path, self.name, read_only)
+        self._transaction_depth = 0
 
     def connect(self):
         """Connects to the Database.
@@ -36,33 +130,45 @@ class Database:
         connection cannot be made.
         """
 
-        if QSqlDatabase.contains(self.path):
+        if self.backend.exists():
             return False
 
-        self.connection = QSqlDatabase.addDatabase("QSQLITE", self.path)
-        self.connection.setHostName("libreplan")
+        return self._open()
 
-        if self.connection.isOpen():
-            return False
+    def reconnect(self):
+        """Opens the database file again, e.g. after it was replaced.
 
-        self.connection.setDatabaseName(self.path)
-        if self.connection.open():
-            self._create_tables()
+        The connection keeps its name, and an older schema is migrated
+        like in `connect`. Queries prepared before have to be prepared
+        again.
+        """
+
+        self.backend.close()
+        self._transaction_depth = 0
+        return self._open()
+
+    def _open(self):
+        if not self.backend.open():
+            raise DbConnectionError(self.backend)
+        if self.read_only:
             return True
-        else:
-            raise DbConnectionError(self.connection)
+
+        # Replacing rows must fire delete triggers to keep the search
+        # tables in sync
+        self.backend.execute("PRAGMA recursive_triggers = ON")
+        with profiler.phase("create tables"):
+            self._create_tables()
+        return True
 
     def disconnect(self):
-        if self.connection.isOpen():
-            self.connection.close()
-            QSqlDatabase.removeDatabase(self.path)
+        if self.backend.is_open():
+            self.backend.close()
+            self.backend.remove()
         else:
             print("Database connection is not open")
 
     def get_prepared_query(self, sql):
-        query = QSqlQuery(self.connection)
-        query.prepare(sql)
-        return query
+        return self.backend.prepare(sql)
 
     def execute_query(self, query):
         """Executes a query with parameters bound to a single value.
@@ -70,17 +176,14 @@ class Database:
         This method is good for running `SELECT` queries and queries
         with no parameters.
 
-        Wrapper for `QSqlQuery.exec_()` with additional error and
+        Wrapper for the query's `exec_()` with additional error and
         transaction handling.
         """
 
-        self.connection.transaction()
-        query_successful = query.exec_()
-        if query_successful:
-            self.connection.commit()
-        else:
-            self.connection.rollback()
-            raise QueryError(query)
+        with self.transaction():
+            query_successful = query.exec_()
+            if not query_successful:
+                raise QueryError(query)
         return query_successful
 
     def execute_batch_query(self, query):
@@ -88,27 +191,184 @@ class Database:
 
         Good for running `INSERT`, `UPDATE`, and `DELETE` queries.
 
-        Wrapper for `QSqlQuery.execBatch()` with additional error and
+        Wrapper for the query's `execBatch()` with additional error and
         transaction handling.
         """
 
-        self.connection.transaction()
-        query_successful = query.execBatch()
-        if query_successful:
-            self.connection.commit()
-        else:
-            self.connection.rollback()
-            raise QueryError(query)
+        with self.transaction():
+            query_successful = query.execBatch()
+            if not query_successful:
+                raise QueryError(query)
         return query_successful
 
+    @contextmanager
+    def transaction(self):
+        """Groups the queries executed inside the block into a single
+        transaction.
+
+        Transactions can be nested; only the outermost one commits, and
+        an exception anywhere inside it rolls all of them back.
+        """
+
+        if self._transaction_depth == 0:
+            self.backend.begin()
+        self._transaction_depth += 1
+
+        try:
+            yield
+        except:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self.backend.rollback()
+            raise
+        else:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self.backend.commit()
+
+    @staticmethod
+    def to_day(date):
+        """Returns the Julian day number a `QDate` is stored as, or
+        `None` if it is invalid.
+        """
+
+        return date.toJulianDay() if date.isValid() else None
+
+    @staticmethod
+    def from_day(day):
+        """Returns the `QDate` of a stored day, which is invalid if the
+        day is `NULL`.
+        """
+
+        if day in (None, ""):
+            return QDate()
+        return QDate.fromJulianDay(day)
+
+    @staticmethod
+    def to_minute(time):
+        """Returns the minutes since midnight a `QTime` is stored as, or
+        `None` if it is invalid.
+        """
+
+        return time.msecsSinceStartOfDay() // 60000 if time.isValid() else None
+
+    @staticmethod
+    def from_minute(minute):
+        """Returns the `QTime` of a stored minute, which is invalid if
+        the minute is `NULL`.
+        """
+
+        if minute in (None, ""):
+            return QTime()
+        return QTime(minute // 60, minute % 60)
+
+    def rebuild_rollups(self):
+        """Recalculates the activity log rollups and digests used for
+        statistics from scratch.
+        """
+
+        with self.transaction():
+            for sql in [
+                queries.delete_daily_rollup,
+                queries.delete_hourly_rollup,
+                queries.rebuild_daily_rollup,
+                queries.rebuild_hourly_rollup,
+                queries.delete_period_rollup,
+            ]:
+                self.execute_query(self.get_prepared_query(sql))
+            self.update_period_rollups()
+            _rebuild_digests(self)
+
+    def update_period_rollups(self, since=None):
+        """Recalculates the period rollups from the daily rollup.
+
+        If `since` is given, only the periods from the one containing
+        that date onwards are updated.
+        """
+
+        query = self.get_prepared_query(queries.update_period_rollup)
+        with self.transaction():
+            for granularity in self.PERIOD_GRANULARITIES:
+                query.bindValue(":granularity", granularity)
+                query.bindValue(":since", self.to_day(since) if since else None)
+                self.execute_query(query)
+
+    def get_schema_version(self):
+        query = self.get_prepared_query(queries.get_schema_version)
+        self.execute_query(query)
+        query.first()
+        return query.value(0)
+
+    def _set_schema_version(self, version):
+        query = self.get_prepared_query(f"PRAGMA user_version = {int(version)}")
+        self.execute_query(query)
+
     def _create_tables(self):
+        query_count_tables = self.get_prepared_query(queries.count_tables)
+        self.execute_query(query_count_tables)
+        query_count_tables.first()
+        is_new_database = query_count_tables.value("count") == 0
+        # An unfinished read keeps migrations from dropping tables
+        query_count_tables.finish()
+
+        with self.transaction():
+            self._create_schema()
+
+            if is_new_database:
+                self._set_schema_version(self.SCHEMA_VERSION)
+            else:
+                self._migrate_tables()
+
+            # Indices may cover columns added by migrations
+            for sql in [
+                queries.create_task_priority_index,
+                queries.create_task_deadline_index,
+                queries.create_log_date_index,
+                queries.create_log_activity_index,
+                queries.create_daily_rollup_activity_index,
+                queries.create_hourly_rollup_activity_index,
+            ]:
+                self.execute_query(self.get_prepared_query(sql))
+
+    def _create_schema(self):
+        """Creates the tables and triggers that do not exist yet."""
+
         table_queries = [
-            self.get_prepared_query(queries.create_plan_table),
-            self.get_prepared_query(queries.create_tasklist_table),
-            self.get_prepared_query(queries.create_activity_table),
-            self.get_prepared_query(queries.create_log_table),
-            self.get_prepared_query(queries.create_config_table),
+            queries.create_plan_table,
+            queries.create_tasklist_table,
+            queries.create_activity_table,
+            queries.create_log_table,
+            queries.create_config_table,
+            queries.create_daily_rollup_table,
+            queries.create_hourly_rollup_table,
+            queries.create_daily_digest_table,
+            queries.create_period_rollup_table,
+
+            queries.create_task_search_table,
+            queries.create_task_search_insert_trigger,
+            queries.create_task_search_delete_trigger,
+            queries.create_task_search_update_trigger,
+            queries.create_plan_search_table,
+            queries.create_plan_search_insert_trigger,
+            queries.create_plan_search_delete_trigger,
+            queries.create_plan_search_update_trigger,
+            queries.create_activity_search_table,
+            queries.create_activity_search_insert_trigger,
+            queries.create_activity_search_delete_trigger,
+            queries.create_activity_search_update_trigger,
         ]
 
-        for query in table_queries:
-            self.execute_query(query)
+        # Queries are prepared one at a time, since triggers can only
+        # be prepared once the tables they refer to exist
+        for sql in table_queries:
+            self.execute_query(self.get_prepared_query(sql))
+
+    def _migrate_tables(self):
+        version = self.get_schema_version()
+        for i, migration in enumerate(self.MIGRATIONS[version:], start=version + 1):
+            for step in migration:
+                if callable(step):
+                    step(self)
+                else:
+                    self.execute_query(self.get_prepared_query(step))
+            self._set_schema_version(i)
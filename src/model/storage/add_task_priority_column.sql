@@ -0,0 +1,2 @@
+ALTER TABLE "tasks"
+ADD COLUMN "priority" REAL NOT NULL DEFAULT 0
@@ -0,0 +1,337 @@
+import os
+import re
+import sqlite3
+from abc import ABC, abstractmethod
+from urllib.parse import quote
+
+from PyQt5.QtCore import QByteArray
+from PyQt5.QtSql import QSqlDatabase, QSqlQuery
+
+class StorageBackend(ABC):
+    """Connection to a SQLite database through one of several drivers.
+
+    Queries prepared by a backend support the part of the `QSqlQuery`
+    API the models use: `bindValue`, `exec_`, `execBatch`, `next`,
+    `first`, `value` and `finish`. Values are read as QtSql reads them,
+    so `NULL` is an empty string and a blob is a `QByteArray`, whichever
+    backend is used.
+    """
+
+    # Whether the database is kept in the file at `path`, which backups
+    # copy and restores replace
+    stores_file = True
+
+    def __init__(self, path, name, read_only=False):
+        self.path = path
+        self.name = name
+        self.read_only = read_only
+
+    def exists(self):
+        """Returns whether another connection already goes by this name."""
+
+        return False
+
+    @abstractmethod
+    def open(self):
+        """Opens the connection, returning `False` if it failed."""
+
+    @abstractmethod
+    def error_text(self):
+        """Describes why the connection could not be opened."""
+
+    @abstractmethod
+    def is_open(self):
+        pass
+
+    @abstractmethod
+    def close(self):
+        """Closes the connection, which can be opened again."""
+
+    def remove(self):
+        """Releases the closed connection for good."""
+
+    @abstractmethod
+    def prepare(self, sql):
+        pass
+
+    def execute(self, sql):
+        """Runs a statement without parameters or results."""
+
+        query = self.prepare(sql)
+        query.exec_()
+
+    @abstractmethod
+    def begin(self):
+        pass
+
+    @abstractmethod
+    def commit(self):
+        pass
+
+    @abstractmethod
+    def rollback(self):
+        pass
+
+class QtSqlBackend(StorageBackend):
+    """Connects through QtSql's SQLite driver.
+
+    Like any QtSql connection, it can only be used by the thread that
+    opened it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connection = QSqlDatabase()
+
+    def exists(self):
+        return QSqlDatabase.contains(self.name)
+
+    def open(self):
+        if not QSqlDatabase.contains(self.name):
+            self.connection = QSqlDatabase.addDatabase("QSQLITE", self.name)
+            self.connection.setHostName("libreplan")
+            self.connection.setDatabaseName(self.path)
+            if self.read_only:
+                self.connection.setConnectOptions("QSQLITE_OPEN_READONLY;QSQLITE_BUSY_TIMEOUT=1000")
+        return self.connection.open()
+
+    def error_text(self):
+        e = self.connection.lastError()
+        return f"{e.nativeErrorCode()} {e.type()} {e.text()}"
+
+    def is_open(self):
+        return self.connection.isOpen()
+
+    def close(self):
+        self.connection.close()
+
+    def remove(self):
+        # Holding on to the connection would keep it in use
+        self.connection = QSqlDatabase()
+        QSqlDatabase.removeDatabase(self.name)
+
+    def prepare(self, sql):
+        query = QSqlQuery(self.connection)
+        query.prepare(sql)
+        return query
+
+    def begin(self):
+        self.connection.transaction()
+
+    def commit(self):
+        self.connection.commit()
+
+    def rollback(self):
+        self.connection.rollback()
+
+class Sqlite3Error:
+    """The `QSqlError` of a failed `Sqlite3Query`."""
+
+    def __init__(self, error=None):
+        self.error = error
+
+    def nativeErrorCode(self):
+        return str(getattr(self.error, "sqlite_errorcode", ""))
+
+    def type(self):
+        return type(self.error).__name__ if self.error else ""
+
+    def text(self):
+        return str(self.error) if self.error else ""
+
+class Sqlite3Record:
+    """The `QSqlRecord` of a `Sqlite3Query`'s columns."""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def count(self):
+        return len(self.columns)
+
+    def fieldName(self, index):
+        return self.columns[index]
+
+class Sqlite3Query:
+    """A prepared statement of a `Sqlite3Backend`, used like a `QSqlQuery`.
+
+    Results are read as soon as the statement runs, so the connection
+    is free again for the next one.
+    """
+
+    # Named parameters, but not the `::` of a cast or a time in a string
+    _PARAMETER = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+
+    def __init__(self, connection, sql):
+        self.connection = connection
+        self.sql = sql
+        # Parameters that are never bound are NULL, as in QtSql
+        self._values = dict.fromkeys(self._PARAMETER.findall(sql))
+        self._columns = {}
+        self._rows = []
+        self._row = -1
+        self._error = Sqlite3Error()
+
+    def bindValue(self, name, value):
+        self._values[name.lstrip(":")] = value
+
+    def boundValues(self):
+        return {f":{name}": value for name, value in self._values.items()}
+
+    def executedQuery(self):
+        return self.sql
+
+    def lastError(self):
+        return self._error
+
+    def exec_(self):
+        try:
+            cursor = self.connection.execute(self.sql, self._parameters(self._values))
+            self._columns = {
+                column[0]: i for i, column in enumerate(cursor.description or [])
+            }
+            self._rows = cursor.fetchall()
+        except sqlite3.Error as e:
+            self._error = Sqlite3Error(e)
+            self.finish()
+            return False
+
+        self._row = -1
+        return True
+
+    def execBatch(self):
+        """Runs the statement once for each value in the bound lists."""
+
+        lengths = [len(value) for value in self._values.values() if isinstance(value, list)]
+        count = max(lengths, default=0)
+        rows = [
+            self._parameters({
+                name: value[i] if isinstance(value, list) else value
+                for name, value in self._values.items()
+            })
+            for i in range(count)
+        ]
+
+        try:
+            self.connection.executemany(self.sql, rows)
+        except sqlite3.Error as e:
+            self._error = Sqlite3Error(e)
+            return False
+        self.finish()
+        return True
+
+    def next(self):
+        if self._row < len(self._rows):
+            self._row += 1
+        return self._row < len(self._rows)
+
+    def first(self):
+        self._row = 0
+        return bool(self._rows)
+
+    def value(self, column):
+        index = column if isinstance(column, int) else self._columns[column]
+        value = self._rows[self._row][index]
+        if value is None:
+            return ""
+        if isinstance(value, bytes):
+            return QByteArray(value)
+        return value
+
+    def record(self):
+        return Sqlite3Record(list(self._columns))
+
+    def finish(self):
+        self._rows = []
+        self._row = -1
+
+    @staticmethod
+    def _parameters(values):
+        return {
+            name: bytes(value) if isinstance(value, QByteArray) else value
+            for name, value in values.items()
+        }
+
+class Sqlite3Backend(StorageBackend):
+    """Connects through Python's `sqlite3` module.
+
+    The connection is not tied to a thread, so it can be opened on one
+    thread and used by a worker on another, one thread at a time.
+    """
+
+    # Names of the connections that were opened and not removed yet,
+    # like the connections QtSql keeps by name
+    _names = set()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connection = None
+        self._error = ""
+
+    def exists(self):
+        return self.name in self._names
+
+    def _uri(self):
+        uri = "file:" + quote(os.path.abspath(self.path))
+        return uri + "?mode=ro" if self.read_only else uri
+
+    def open(self):
+        try:
+            self.connection = sqlite3.connect(
+                self._uri(),
+                uri=True,
+                timeout=1 if self.read_only else 5,
+                # Transactions are started explicitly by `begin`
+                isolation_level=None,
+                check_same_thread=False
+            )
+        except sqlite3.Error as e:
+            self._error = str(e)
+            return False
+
+        self._names.add(self.name)
+        return True
+
+    def error_text(self):
+        return self._error
+
+    def is_open(self):
+        return self.connection is not None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def remove(self):
+        self._names.discard(self.name)
+
+    def prepare(self, sql):
+        return Sqlite3Query(self.connection, sql)
+
+    def begin(self):
+        self.connection.execute("BEGIN")
+
+    def commit(self):
+        self.connection.execute("COMMIT")
+
+    def rollback(self):
+        self.connection.execute("ROLLBACK")
+
+class MemoryBackend(Sqlite3Backend):
+    """Keeps the database in memory, e.g. for tests and benchmarks.
+
+    The path only names the database. Connections to the same path
+    share it, and it is gone once the last of them is closed. Since
+    there is no file, backups cannot be made of it.
+    """
+
+    stores_file = False
+
+    def _uri(self):
+        return f"file:{quote(self.path)}?mode=memory&cache=shared"
+
+BACKENDS = {
+    "qtsql": QtSqlBackend,
+    "sqlite3": Sqlite3Backend,
+    "memory": MemoryBackend,
+}
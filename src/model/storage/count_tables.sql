@@ -0,0 +1,3 @@
+SELECT COUNT(*) AS "count"
+FROM "sqlite_master"
+WHERE "type" = 'table'
@@ -0,0 +1,6 @@
+CREATE TRIGGER IF NOT EXISTS "activities_search_delete"
+AFTER DELETE ON "activities"
+BEGIN
+    INSERT INTO "activities_search"("activities_search", "rowid", "name")
+    VALUES ('delete', old."id", old."name");
+END
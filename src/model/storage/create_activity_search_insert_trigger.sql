@@ -0,0 +1,6 @@
+CREATE TRIGGER IF NOT EXISTS "activities_search_insert"
+AFTER INSERT ON "activities"
+BEGIN
+    INSERT INTO "activities_search"("rowid", "name")
+    VALUES (new."id", new."name");
+END
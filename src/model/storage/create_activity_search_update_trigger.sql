@@ -0,0 +1,8 @@
+CREATE TRIGGER IF NOT EXISTS "activities_search_update"
+AFTER UPDATE OF "id", "name" ON "activities"
+BEGIN
+    INSERT INTO "activities_search"("activities_search", "rowid", "name")
+    VALUES ('delete', old."id", old."name");
+    INSERT INTO "activities_search"("rowid", "name")
+    VALUES (new."id", new."name");
+END
@@ -0,0 +1,9 @@
+CREATE TABLE IF NOT EXISTS "log_daily_digest" (
+    "date" INTEGER NOT NULL,
+    "activity_id" INTEGER NOT NULL,
+    "actual_length_digest" BLOB NOT NULL,
+    "percent_digest" BLOB,
+
+    PRIMARY KEY("date", "activity_id"),
+    FOREIGN KEY("activity_id") REFERENCES activities("id")
+) WITHOUT ROWID
@@ -0,0 +1,2 @@
+CREATE INDEX IF NOT EXISTS "log_daily_rollup_activity_date"
+ON "log_daily_rollup"("activity_id", "date")
@@ -0,0 +1,12 @@
+CREATE TABLE IF NOT EXISTS "log_daily_rollup" (
+    "date" INTEGER NOT NULL,
+    "activity_id" INTEGER NOT NULL,
+    "count" INTEGER NOT NULL,
+    "sum_length" INTEGER NOT NULL,
+    "sum_actual_length" INTEGER NOT NULL,
+    "sum_percent" REAL NOT NULL,
+    "total_actual_length" INTEGER NOT NULL,
+
+    PRIMARY KEY("date", "activity_id"),
+    FOREIGN KEY("activity_id") REFERENCES activities("id")
+) WITHOUT ROWID
@@ -0,0 +1,2 @@
+CREATE INDEX IF NOT EXISTS "log_hourly_rollup_activity_date"
+ON "log_hourly_rollup"("activity_id", "date")
@@ -0,0 +1,12 @@
+CREATE TABLE IF NOT EXISTS "log_hourly_rollup" (
+    "date" INTEGER NOT NULL,
+    "hour" INTEGER NOT NULL,
+    "activity_id" INTEGER NOT NULL,
+    "count" INTEGER NOT NULL,
+    "sum_length" INTEGER NOT NULL,
+    "sum_actual_length" INTEGER NOT NULL,
+    "sum_percent" REAL NOT NULL,
+
+    PRIMARY KEY("date", "hour", "activity_id"),
+    FOREIGN KEY("activity_id") REFERENCES activities("id")
+) WITHOUT ROWID
@@ -0,0 +1,2 @@
+CREATE INDEX IF NOT EXISTS "activity_log_activity_date"
+ON "activity_log"("activity_id", "date")
@@ -1,8 +1,8 @@
 CREATE TABLE IF NOT EXISTS "activity_log" (
     "id" INTEGER NOT NULL,
-    "date" TEXT NOT NULL CHECK (length("date") <= 10),
+    "date" INTEGER NOT NULL,
     "order" INTEGER NOT NULL,
-    "start_time" TEXT NOT NULL CHECK (length("start_time") <= 5),
+    "start_time" INTEGER CHECK ("start_time" BETWEEN 0 AND 1439),
     "activity_id" INTEGER NOT NULL,
     "length" INTEGER NOT NULL,
     "actual_length" INTEGER NOT NULL,
@@ -0,0 +1,12 @@
+CREATE TABLE IF NOT EXISTS "log_period_rollup" (
+    "granularity" TEXT NOT NULL,
+    "period_start" INTEGER NOT NULL,
+    "activity_id" INTEGER NOT NULL,
+    "count" INTEGER NOT NULL,
+    "sum_length" INTEGER NOT NULL,
+    "sum_actual_length" INTEGER NOT NULL,
+    "sum_percent" REAL NOT NULL,
+
+    PRIMARY KEY("granularity", "period_start", "activity_id"),
+    FOREIGN KEY("activity_id") REFERENCES activities("id")
+) WITHOUT ROWID
@@ -0,0 +1,6 @@
+CREATE TRIGGER IF NOT EXISTS "plan_search_delete"
+AFTER DELETE ON "plan"
+BEGIN
+    INSERT INTO "plan_search"("plan_search", "rowid", "name")
+    VALUES ('delete', old."id", old."name");
+END
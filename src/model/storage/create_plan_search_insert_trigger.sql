@@ -0,0 +1,6 @@
+CREATE TRIGGER IF NOT EXISTS "plan_search_insert"
+AFTER INSERT ON "plan"
+BEGIN
+    INSERT INTO "plan_search"("rowid", "name")
+    VALUES (new."id", new."name");
+END
@@ -0,0 +1,6 @@
+CREATE VIRTUAL TABLE IF NOT EXISTS "plan_search" USING fts5(
+    "name",
+    content="plan",
+    content_rowid="id",
+    tokenize="unicode61 remove_diacritics 2"
+)
@@ -0,0 +1,8 @@
+CREATE TRIGGER IF NOT EXISTS "plan_search_update"
+AFTER UPDATE OF "id", "name" ON "plan"
+BEGIN
+    INSERT INTO "plan_search"("plan_search", "rowid", "name")
+    VALUES ('delete', old."id", old."name");
+    INSERT INTO "plan_search"("rowid", "name")
+    VALUES (new."id", new."name");
+END
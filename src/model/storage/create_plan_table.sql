@@ -1,7 +1,7 @@
 CREATE TABLE IF NOT EXISTS "plan" (
     "id" INTEGER PRIMARY KEY,
     "order" INTEGER NOT NULL,
-    "start_time" TEXT NOT NULL CHECK (length("start_time") <= 5),
+    "start_time" INTEGER CHECK ("start_time" BETWEEN 0 AND 1439),
     "name" TEXT NOT NULL CHECK (length("name") < 256) DEFAULT "Activity",
     "length" INTEGER NOT NULL DEFAULT 0,
     "actual_length" INTEGER NOT NULL DEFAULT 0,
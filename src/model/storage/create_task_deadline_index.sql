@@ -0,0 +1,2 @@
+CREATE INDEX IF NOT EXISTS "tasks_deadline"
+ON "tasks"("deadline")
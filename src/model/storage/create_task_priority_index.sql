@@ -0,0 +1,2 @@
+CREATE INDEX IF NOT EXISTS "tasks_priority"
+ON "tasks"("priority" DESC, "id")
@@ -0,0 +1,6 @@
+CREATE TRIGGER IF NOT EXISTS "tasks_search_delete"
+AFTER DELETE ON "tasks"
+BEGIN
+    INSERT INTO "tasks_search"("tasks_search", "rowid", "name")
+    VALUES ('delete', old."id", old."name");
+END
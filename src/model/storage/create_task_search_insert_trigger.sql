@@ -0,0 +1,6 @@
+CREATE TRIGGER IF NOT EXISTS "tasks_search_insert"
+AFTER INSERT ON "tasks"
+BEGIN
+    INSERT INTO "tasks_search"("rowid", "name")
+    VALUES (new."id", new."name");
+END
@@ -0,0 +1,6 @@
+CREATE VIRTUAL TABLE IF NOT EXISTS "tasks_search" USING fts5(
+    "name",
+    content="tasks",
+    content_rowid="id",
+    tokenize="unicode61 remove_diacritics 2"
+)
@@ -0,0 +1,8 @@
+CREATE TRIGGER IF NOT EXISTS "tasks_search_update"
+AFTER UPDATE OF "id", "name" ON "tasks"
+BEGIN
+    INSERT INTO "tasks_search"("tasks_search", "rowid", "name")
+    VALUES ('delete', old."id", old."name");
+    INSERT INTO "tasks_search"("rowid", "name")
+    VALUES (new."id", new."name");
+END
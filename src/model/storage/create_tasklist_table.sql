@@ -3,7 +3,8 @@ CREATE TABLE IF NOT EXISTS "tasks" (
     "name" TEXT NOT NULL CHECK (length("name") < 256) DEFAULT "Task",
     "value" INTEGER NOT NULL DEFAULT 0,
     "cost" INTEGER NOT NULL DEFAULT 0,
-    "date_created" TEXT NOT NULL CHECK (length("date_created") <= 10),
-    "deadline" TEXT CHECK (length("deadline") <= 10),
-    "deadline_type" INTEGER NOT NULL DEFAULT 1
+    "date_created" INTEGER NOT NULL,
+    "deadline" INTEGER,
+    "deadline_type" INTEGER NOT NULL DEFAULT 1,
+    "priority" REAL NOT NULL DEFAULT 0
 )
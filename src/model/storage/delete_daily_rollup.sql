@@ -0,0 +1 @@
+DELETE FROM "log_daily_rollup"
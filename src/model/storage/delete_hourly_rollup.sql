@@ -0,0 +1 @@
+DELETE FROM "log_hourly_rollup"
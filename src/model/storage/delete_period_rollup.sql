@@ -0,0 +1 @@
+DELETE FROM "log_period_rollup"
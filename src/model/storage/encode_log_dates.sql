@@ -0,0 +1,24 @@
+INSERT INTO "activity_log" (
+    "id",
+    "date",
+    "order",
+    "start_time",
+    "activity_id",
+    "length",
+    "actual_length",
+    "optimal_length",
+    "is_fixed",
+    "is_rigid"
+)
+SELECT
+    "id",
+    CAST(julianday("date") + 0.5 AS INTEGER),
+    "order",
+    cast(strftime('%H', "start_time") AS INTEGER) * 60 + cast(strftime('%M', "start_time") AS INTEGER),
+    "activity_id",
+    "length",
+    "actual_length",
+    "optimal_length",
+    "is_fixed",
+    "is_rigid"
+FROM "activity_log_text"
@@ -0,0 +1,20 @@
+INSERT INTO "plan" (
+    "id",
+    "order",
+    "start_time",
+    "name",
+    "length",
+    "actual_length",
+    "is_fixed",
+    "is_rigid"
+)
+SELECT
+    "id",
+    "order",
+    cast(strftime('%H', "start_time") AS INTEGER) * 60 + cast(strftime('%M', "start_time") AS INTEGER),
+    "name",
+    "length",
+    "actual_length",
+    "is_fixed",
+    "is_rigid"
+FROM "plan_text"
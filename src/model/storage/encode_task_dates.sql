@@ -0,0 +1,20 @@
+INSERT INTO "tasks" (
+    "id",
+    "name",
+    "value",
+    "cost",
+    "date_created",
+    "deadline",
+    "deadline_type",
+    "priority"
+)
+SELECT
+    "id",
+    "name",
+    "value",
+    "cost",
+    CAST(julianday("date_created") + 0.5 AS INTEGER),
+    CAST(julianday("deadline") + 0.5 AS INTEGER),
+    "deadline_type",
+    "priority"
+FROM "tasks_text"
@@ -0,0 +1,2 @@
+INSERT INTO "activities_search"("activities_search")
+VALUES ('rebuild')
@@ -0,0 +1,21 @@
+INSERT INTO "log_hourly_rollup" (
+    "date",
+    "hour",
+    "activity_id",
+    "count",
+    "sum_length",
+    "sum_actual_length",
+    "sum_percent"
+)
+SELECT
+    "date",
+    "start_time" / 60,
+    "activity_id",
+    COUNT(*),
+    SUM("length"),
+    SUM("actual_length"),
+    TOTAL("actual_length" * 100/CAST("length" AS REAL))
+FROM "activity_log"
+WHERE "length" <> 0
+    AND "start_time" IS NOT NULL
+GROUP BY 1, 2, 3
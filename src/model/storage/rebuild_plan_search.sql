@@ -0,0 +1,2 @@
+INSERT INTO "plan_search"("plan_search")
+VALUES ('rebuild')
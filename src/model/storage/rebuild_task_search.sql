@@ -0,0 +1,2 @@
+INSERT INTO "tasks_search"("tasks_search")
+VALUES ('rebuild')
@@ -0,0 +1,7 @@
+UPDATE "tasks"
+SET "priority" = (
+    CASE
+        WHEN "cost" = 0 THEN 0.0
+        ELSE "value" / CAST("cost" AS REAL)
+    END
+)
@@ -0,0 +1,35 @@
+INSERT OR REPLACE INTO "log_period_rollup" (
+    "granularity",
+    "period_start",
+    "activity_id",
+    "count",
+    "sum_length",
+    "sum_actual_length",
+    "sum_percent"
+)
+-- Days are Julian day numbers, so every multiple of 7 is a Monday
+SELECT
+    :granularity,
+    CASE :granularity
+        WHEN 'week' THEN "date" - "date" % 7
+        WHEN 'month' THEN CAST(julianday("date", 'start of month') + 0.5 AS INTEGER)
+        WHEN 'quarter' THEN CAST(julianday("date", 'start of month', '-' || ((cast(strftime('%m', "date") AS INTEGER) - 1) % 3) || ' months') + 0.5 AS INTEGER)
+        WHEN 'year' THEN CAST(julianday("date", 'start of year') + 0.5 AS INTEGER)
+    END AS "period",
+    "activity_id",
+    SUM("count"),
+    SUM("sum_length"),
+    SUM("sum_actual_length"),
+    TOTAL("sum_percent")
+FROM "log_daily_rollup"
+-- Only the periods from the one containing :since onwards are updated
+WHERE "date" >= COALESCE(
+    CASE :granularity
+        WHEN 'week' THEN :since - :since % 7
+        WHEN 'month' THEN CAST(julianday(:since, 'start of month') + 0.5 AS INTEGER)
+        WHEN 'quarter' THEN CAST(julianday(:since, 'start of month', '-' || ((cast(strftime('%m', :since) AS INTEGER) - 1) % 3) || ' months') + 0.5 AS INTEGER)
+        WHEN 'year' THEN CAST(julianday(:since, 'start of year') + 0.5 AS INTEGER)
+    END,
+    0
+)
+GROUP BY "period", "activity_id"
@@ -5,11 +5,17 @@ from PyQt5.QtCore import (
     Qt,
     QAbstractTableModel,
     QSortFilterProxyModel,
+    QObject,
     QModelIndex,
+    QTimer,
     QDate,
-    QDateTime
+    QDateTime,
+    QRegularExpression,
+
+    pyqtSignal,
 )
 
+from model.search import SearchIndex
 from model.storage import Database
 from ui.importing import ReplaceOption
 from ui.item_delegates import (
@@ -44,12 +50,14 @@ class Task:
             "label": "Value",
             "user_editable": True,
             "delegate": GenericDelegate,
+            "bulk_edit_type": int,
         },
         {
             "attr": "cost",
             "label": "Cost",
             "user_editable": True,
             "delegate": GenericDelegate,
+            "bulk_edit_type": int,
         },
         {
             "attr": "name",
@@ -68,6 +76,7 @@ class Task:
             "label": "Deadline",
             "user_editable": True,
             "delegate": DeadlineDelegate,
+            "bulk_edit_type": QDate,
         },
         {
             "attr": "get_halftime",
@@ -80,6 +89,7 @@ class Task:
             "label": "Deadline Type",
             "user_editable": True,
             "delegate": DeadlineTypeDelegate,
+            "bulk_edit_type": DeadlineType,
         },
     ]
 
@@ -87,6 +97,11 @@ class Task:
 
     EDITABLE_COLUMNS = [i for i, col in enumerate(COLUMNS) if col["user_editable"]]
 
+    BULK_EDIT_FIELDS = [
+        (col["attr"], col["label"], col["bulk_edit_type"])
+        for col in COLUMNS if "bulk_edit_type" in col
+    ]
+
     def __init__(self,
         id=None,
         name="Task",
@@ -185,31 +200,111 @@ class Task:
         setattr(self, Task.COLUMNS[index]["attr"], value)
 
 class TasklistTableModel(QAbstractTableModel):
+    """Table model over the tasks table.
+
+    Tasks are loaded lazily, a page at a time, in order of their stored
+    priority as the view asks for more rows.
+    """
+
+    PAGE_SIZE = 256
+
     def __init__(self, parent, database, config, *args):
         QAbstractTableModel.__init__(self, parent, *args)
         self._tasks = []
+        self._task_ids = set()
+        self._last_key = None
+        self._has_more = True
+        self._last_id = 0
         self.config = config
         self.database = database
+        self.search_index = SearchIndex()
+
+        self._prepare_queries()
+        self._refresh_priorities()
+        self._read_tasks()
+
+    def reload(self):
+        """Reads the tasks again after the database was reconnected."""
 
+        self.beginResetModel()
+        self._prepare_queries()
+        self._refresh_priorities()
+        self._read_tasks()
+        self.endResetModel()
+
+    def _prepare_queries(self):
         self.query_count = self.database.get_prepared_query(queries.count)
         self.query_create = self.database.get_prepared_query(queries.insert_task)
-        self.query_read = self.database.get_prepared_query(queries.get_tasks)
+        self.query_read_first = self.database.get_prepared_query(queries.get_first_tasks_page)
+        self.query_read_next = self.database.get_prepared_query(queries.get_next_tasks_page)
+        self.query_read_ids = self.database.get_prepared_query(queries.get_tasks_by_id)
+        self.query_read_all = self.database.get_prepared_query(queries.get_all_tasks)
+        self.query_read_names = self.database.get_prepared_query(queries.get_task_names)
+        self.query_read_deadlines = self.database.get_prepared_query(queries.get_deadline_tasks)
+        self.query_due = self.database.get_prepared_query(queries.get_due_tasks)
+        self.query_next_deadline = self.database.get_prepared_query(queries.get_next_deadline)
         self.query_update = self.database.get_prepared_query(queries.update_task)
+        self.query_update_priority = self.database.get_prepared_query(queries.update_priority)
         self.query_delete = self.database.get_prepared_query(queries.delete_task)
         self.query_clear = self.database.get_prepared_query(queries.delete_all_tasks)
 
-        self._read_tasks()
-
     def get_task(self, index):
         return self._tasks[index]
 
+    def task_count(self):
+        """Returns the number of tasks in the database, loaded or not."""
+
+        self.database.execute_query(self.query_count)
+        self.query_count.first()
+        return self.query_count.value("count")
+
+    def get_due_tasks(self, date_from, date_to):
+        """Returns `(id, name, deadline)` for every task with a deadline
+        between the two dates, soonest first."""
+
+        self.query_due.bindValue(":date_from", Database.to_day(date_from))
+        self.query_due.bindValue(":date_to", Database.to_day(date_to))
+        self.database.execute_query(self.query_due)
+
+        tasks = []
+        while self.query_due.next():
+            tasks.append((
+                self.query_due.value("id"),
+                self.query_due.value("name"),
+                Database.from_day(self.query_due.value("deadline")),
+            ))
+        return tasks
+
+    def get_due_task_ids(self, days, today=None):
+        """Returns the ids of tasks due within the next `days` days."""
+
+        today = today or QDate.currentDate()
+        return {id for id, _, _ in self.get_due_tasks(today, today.addDays(days))}
+
+    def get_overdue_task_ids(self, today=None):
+        today = today or QDate.currentDate()
+        return {id for id, _, _ in self.get_due_tasks(QDate(1, 1, 1), today.addDays(-1))}
+
+    def get_next_deadline(self, date):
+        """Returns the first deadline after `date`, or an invalid date if there is none."""
+
+        self.query_next_deadline.bindValue(":date", Database.to_day(date))
+        self.database.execute_query(self.query_next_deadline)
+        if self.query_next_deadline.first():
+            return Database.from_day(self.query_next_deadline.value("deadline"))
+        return QDate()
+
     def add_task(self, task=None):
         if task is None:
             task = Task()
         self.add_tasks([task])
 
     def add_tasks(self, tasks):
-        max_id = QDateTime.currentDateTime().toMSecsSinceEpoch()
+        # Ids are creation times, kept unique when several are
+        # created within the same millisecond
+        max_id = max(QDateTime.currentDateTime().toMSecsSinceEpoch(), self._last_id + 1)
+        self._last_id = max_id + len(tasks) - 1
+        today = QDate.currentDate()
 
         for i, task in enumerate(tasks):
             task.id = max_id + i
@@ -218,12 +313,14 @@ class TasklistTableModel(QAbstractTableModel):
         self.query_create.bindValue(":name", [t.name for t in tasks])
         self.query_create.bindValue(":value", [t.value for t in tasks])
         self.query_create.bindValue(":cost", [t.cost for t in tasks])
-        self.query_create.bindValue(":date_created", [t.DATE_CREATED for t in tasks])
-        self.query_create.bindValue(":deadline", [t.deadline for t in tasks])
+        self.query_create.bindValue(":date_created", [Database.to_day(t.DATE_CREATED) for t in tasks])
+        self.query_create.bindValue(":deadline", [Database.to_day(t.deadline) for t in tasks])
         self.query_create.bindValue(":deadline_type", [t.deadline_type.value for t in tasks])
+        self.query_create.bindValue(":priority", [t.get_priority(today) for t in tasks])
         if self.database.execute_batch_query(self.query_create):
             self.layoutAboutToBeChanged.emit()
-            self._tasks.extend(tasks)
+            self._append_tasks(tasks)
+            self.search_index.add_all((t.id, t.name) for t in tasks)
             self.layoutChanged.emit()
 
     def delete_tasks(self, indices):
@@ -233,20 +330,157 @@ class TasklistTableModel(QAbstractTableModel):
 
         self.layoutAboutToBeChanged.emit()
         self._tasks = [t for i, t in enumerate(self._tasks) if i not in indices]
+        for id in ids:
+            self._task_ids.discard(id)
+            self.search_index.remove(id)
         self.layoutChanged.emit()
 
     def clear(self):
         self.layoutAboutToBeChanged.emit()
         self._tasks = []
+        self._task_ids.clear()
+        self._has_more = False
+        self.search_index.clear()
         self.database.execute_query(self.query_clear)
         self.layoutChanged.emit()
 
+    def bulk_edit(self, indices, options):
+        """Applies one change to all of the given tasks at once.
+
+        The tasks are written with a single batched update in one
+        transaction, and the view is notified with one `dataChanged`.
+        """
+
+        if not indices:
+            return
+
+        attr = options["attr"]
+        tasks = [self._tasks[i] for i in indices]
+        if attr == "deadline_type":
+            # Deadline types only make sense for tasks that have a deadline
+            tasks = [t for t in tasks if t.deadline.isValid()]
+
+        for task in tasks:
+            setattr(task, attr, options["operation"].apply(getattr(task, attr), options["value"]))
+
+        today = QDate.currentDate()
+        self.query_update.bindValue(":id", [t.id for t in tasks])
+        self.query_update.bindValue(":name", [t.name for t in tasks])
+        self.query_update.bindValue(":value", [t.value for t in tasks])
+        self.query_update.bindValue(":cost", [t.cost for t in tasks])
+        self.query_update.bindValue(":date_created", [Database.to_day(t.DATE_CREATED) for t in tasks])
+        self.query_update.bindValue(":deadline", [Database.to_day(t.deadline) for t in tasks])
+        self.query_update.bindValue(":deadline_type", [t.deadline_type.value for t in tasks])
+        self.query_update.bindValue(":priority", [t.get_priority(today) for t in tasks])
+        self.database.execute_batch_query(self.query_update)
+
+        self.dataChanged.emit(
+            self.index(min(indices), 0),
+            self.index(max(indices), self.columnCount() - 1)
+        )
+
+    def ensure_loaded(self, ids):
+        """Loads the given tasks if their pages have not been fetched yet."""
+
+        missing_ids = [id for id in ids if id not in self._task_ids]
+        if not missing_ids:
+            return
+
+        # The ids are passed as one JSON array, so any number of them
+        # is read with a single query
+        self.query_read_ids.bindValue(":ids", json.dumps(missing_ids))
+        self.database.execute_query(self.query_read_ids)
+        tasks = []
+        while self.query_read_ids.next():
+            tasks.append(self._get_task_from_db(self.query_read_ids))
+        self.query_read_ids.finish()
+
+        if tasks:
+            self.beginInsertRows(QModelIndex(), len(self._tasks), len(self._tasks) + len(tasks) - 1)
+            self._append_tasks(tasks)
+            self.endInsertRows()
+
+    def load_all(self):
+        """Loads the tasks of every page not fetched yet."""
+
+        while self.canFetchMore():
+            self.fetchMore()
+
     def _read_tasks(self):
         self._tasks = []
-        self.database.execute_query(self.query_read)
-        while self.query_read.next():
-            task = self._get_task_from_db()
-            self._tasks.append(task)
+        self._task_ids = set()
+        self._last_key = None
+        self._has_more = True
+        self._append_tasks(self._fetch_page())
+
+        self.search_index.clear()
+        self.database.execute_query(self.query_read_names)
+        while self.query_read_names.next():
+            self.search_index.add(
+                self.query_read_names.value("id"),
+                self.query_read_names.value("name")
+            )
+
+    def _fetch_page(self):
+        """Reads the next page of tasks, returning the ones not loaded yet.
+
+        Pages are read with keyset pagination over the
+        ("priority", "id") index, so each page costs the same no matter
+        how far into the tasklist it is.
+        """
+
+        if self._last_key is None:
+            query = self.query_read_first
+        else:
+            query = self.query_read_next
+            query.bindValue(":priority", self._last_key[0])
+            query.bindValue(":id", self._last_key[1])
+        query.bindValue(":limit", self.PAGE_SIZE)
+        self.database.execute_query(query)
+
+        tasks = []
+        row_count = 0
+        while query.next():
+            row_count += 1
+            self._last_key = (query.value("priority"), query.value("id"))
+
+            # Tasks added or loaded since the previous page are skipped
+            if self._last_key[1] not in self._task_ids:
+                tasks.append(self._get_task_from_db(query))
+
+        self._has_more = row_count == self.PAGE_SIZE
+        return tasks
+
+    def _append_tasks(self, tasks):
+        self._tasks.extend(tasks)
+        self._task_ids.update(t.id for t in tasks)
+
+    def _refresh_priorities(self):
+        """Updates the stored priorities of tasks with deadlines.
+
+        Priorities of tasks with deadlines change from day to day, so
+        they are recalculated once on the first start of each day.
+        """
+
+        today = QDate.currentDate()
+        today_str = today.toString(Database.DATE_FORMAT)
+        if self.config.get_setting("tasklist/priorities_updated", "") == today_str:
+            return
+
+        ids = []
+        priorities = []
+        self.database.execute_query(self.query_read_deadlines)
+        while self.query_read_deadlines.next():
+            task = self._get_task_from_db(self.query_read_deadlines)
+            ids.append(task.id)
+            priorities.append(task.get_priority(today))
+
+        if ids:
+            self.query_update_priority.bindValue(":id", ids)
+            self.query_update_priority.bindValue(":priority", priorities)
+            self.database.execute_batch_query(self.query_update_priority)
+
+        self.config.set_setting("tasklist/priorities_updated", today_str)
 
     def import_tasks(self, path, options):
         if options["replace_option"] == ReplaceOption.REPLACE:
@@ -258,14 +492,20 @@ class TasklistTableModel(QAbstractTableModel):
 
         with open(path) as f:
             tasks_json = json.load(f)
+            today = QDate.currentDate()
 
             query_import.bindValue(":id", [t["id"] for t in tasks_json])
             query_import.bindValue(":name", [t["name"] for t in tasks_json])
             query_import.bindValue(":value", [t["value"] for t in tasks_json])
             query_import.bindValue(":cost", [t["cost"] for t in tasks_json])
-            query_import.bindValue(":date_created", [t["DATE_CREATED"] for t in tasks_json])
-            query_import.bindValue(":deadline", [t["deadline"] for t in tasks_json])
+            query_import.bindValue(":date_created", [
+                Database.to_day(QDate.fromString(t["DATE_CREATED"], Database.DATE_FORMAT)) for t in tasks_json
+            ])
+            query_import.bindValue(":deadline", [
+                Database.to_day(QDate.fromString(t["deadline"], Database.DATE_FORMAT)) for t in tasks_json
+            ])
             query_import.bindValue(":deadline_type", [DeadlineType[t["deadline_type"]].value for t in tasks_json])
+            query_import.bindValue(":priority", [self._get_task_from_json(t).get_priority(today) for t in tasks_json])
 
         self.database.execute_batch_query(query_import)
 
@@ -274,12 +514,18 @@ class TasklistTableModel(QAbstractTableModel):
         self.layoutChanged.emit()
 
     def export_tasks(self, path, indices=[]):
-        with open(path, "w") as f:
-            if indices:
-                tasks = [self._tasks[index] for index in indices]
-            else:
-                tasks = self._tasks
+        """Exports the tasks at `indices`, or every task if there are none.
+
+        Every task is read from the database, since only the pages
+        fetched so far are loaded.
+        """
 
+        if indices:
+            tasks = [self._tasks[index] for index in indices]
+        else:
+            tasks = self._read_all_tasks()
+
+        with open(path, "w") as f:
             tasks_properties = []
             for task in tasks:
                 properties = {
@@ -300,30 +546,51 @@ class TasklistTableModel(QAbstractTableModel):
     # Private methods
     ################################################################################
 
-    def _get_task_from_db(self):
+    def _read_all_tasks(self):
+        self.database.execute_query(self.query_read_all)
+        tasks = []
+        while self.query_read_all.next():
+            tasks.append(self._get_task_from_db(self.query_read_all))
+        self.query_read_all.finish()
+        return tasks
+
+    @staticmethod
+    def _get_task_from_db(query):
         return Task(
-            id=self.query_read.value("id"),
-            name=self.query_read.value("name"),
-            value=self.query_read.value("value"),
-            cost=self.query_read.value("cost"),
+            id=query.value("id"),
+            name=query.value("name"),
+            value=query.value("value"),
+            cost=query.value("cost"),
+            date_created=Database.from_day(query.value("date_created")),
+            deadline=Database.from_day(query.value("deadline")),
+            deadline_type=DeadlineType(query.value("deadline_type"))
+        )
+
+    @staticmethod
+    def _get_task_from_json(properties):
+        return Task(
+            id=properties["id"],
+            name=properties["name"],
+            value=properties["value"],
+            cost=properties["cost"],
             date_created=QDate.fromString(
-                self.query_read.value("date_created"),
+                properties["DATE_CREATED"],
                 Database.DATE_FORMAT
             ),
             deadline=QDate.fromString(
-                self.query_read.value("deadline"),
+                properties["deadline"],
                 Database.DATE_FORMAT
             ),
-            deadline_type=DeadlineType(self.query_read.value("deadline_type"))
+            deadline_type=DeadlineType[properties["deadline_type"]]
         )
 
     # Qt API Implementation
     ################################################################################
 
     def rowCount(self, parent=QModelIndex()):
-        self.database.execute_query(self.query_count)
-        self.query_count.first()
-        return self.query_count.value("count")
+        if parent.isValid():
+            return 0
+        return len(self._tasks)
 
     def columnCount(self, parent=QModelIndex()):
         return len(Task.COLUMNS)
@@ -350,14 +617,32 @@ class TasklistTableModel(QAbstractTableModel):
             self.query_update.bindValue(":name", task.name)
             self.query_update.bindValue(":value", task.value)
             self.query_update.bindValue(":cost", task.cost)
-            self.query_update.bindValue(":date_created", task.DATE_CREATED)
-            self.query_update.bindValue(":deadline", task.deadline)
+            self.query_update.bindValue(":date_created", Database.to_day(task.DATE_CREATED))
+            self.query_update.bindValue(":deadline", Database.to_day(task.deadline))
             self.query_update.bindValue(":deadline_type", task.deadline_type.value)
+            self.query_update.bindValue(":priority", task.get_priority(QDate.currentDate()))
             self.database.execute_query(self.query_update)
 
+            if index.column() == Task.COLUMN_INDICES["name"]:
+                self.search_index.add(task.id, task.name)
+
             self.dataChanged.emit(index, index)
             return True
 
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+
+        tasks = self._fetch_page()
+        if tasks:
+            start = len(self._tasks)
+            self.beginInsertRows(QModelIndex(), start, start + len(tasks) - 1)
+            self._append_tasks(tasks)
+            self.endInsertRows()
+
     def flags(self, index):
         if index.column() in Task.EDITABLE_COLUMNS:
             # Disable the user selection of deadline type before deadline is set
@@ -375,11 +660,178 @@ class TasklistProxyModel(QSortFilterProxyModel):
 
     Classes must have the '<' operator implemented in order to be
     properly sorted by the model.
+
+    Plain-text filters are answered from the source model's search
+    index; only filters containing regular expression syntax fall back
+    to matching every row against a `QRegularExpression`. Since those
+    and sorting by anything but descending priority need every row,
+    they load all of the source model's pages first.
     """
 
+    REGEX_METACHARACTERS = set(".^$*+?{}[]\\|()")
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.setFilterKeyColumn(Task.COLUMN_INDICES["name"])
+        self._filter_text = ""
+        self._matching_ids = None
+        self._get_allowed_ids = None
+        self._allowed_ids = None
+
+    def set_allowed_ids(self, get_ids):
+        """Only shows the tasks whose ids are returned by `get_ids`, or
+        every task if it is `None`.
+
+        The ids are asked for again whenever the source tasks change, e.g.
+        when a deadline is edited. This is applied on top of the text filter.
+        """
+
+        self._get_allowed_ids = get_ids
+        self.refresh_allowed_ids()
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        for signal in [model.layoutChanged, model.modelReset]:
+            signal.connect(self.refresh_filter)
+            signal.connect(self.refresh_allowed_ids)
+        model.dataChanged.connect(self._source_data_changed)
+        model.modelReset.connect(self._reload_regex_rows)
+
+    def _source_data_changed(self, top_left, bottom_right):
+        # Only edits of the columns a filter depends on re-run it
+        columns = range(top_left.column(), bottom_right.column() + 1)
+        if Task.COLUMN_INDICES["name"] in columns:
+            self.refresh_filter()
+        if any(Task.COLUMN_INDICES[attr] in columns for attr in ["deadline", "deadline_type"]):
+            self.refresh_allowed_ids()
+
+    def _reload_regex_rows(self):
+        # A reset source model only has its first page loaded again
+        if self.filterRegularExpression().pattern():
+            self.sourceModel().load_all()
+
+    def set_filter_text(self, text):
+        if not text:
+            self._matching_ids = None
+            self.setFilterRegularExpression(QRegularExpression())
+        elif self.REGEX_METACHARACTERS.isdisjoint(text):
+            # A query containing the previous one can only match a
+            # subset of the previous matches, so only those are searched.
+            # Names are matched normalized, so the queries are compared so.
+            if (self._matching_ids is not None
+                    and SearchIndex.normalize(self._filter_text) in SearchIndex.normalize(text)):
+                candidates = self._matching_ids
+            else:
+                candidates = None
+
+            self._matching_ids = self.sourceModel().search_index.search(text, candidates)
+            self.sourceModel().ensure_loaded(self._matching_ids)
+            self.setFilterRegularExpression(QRegularExpression())
+        else:
+            self._matching_ids = None
+            # Rows are only loaded when a regex filter is first applied;
+            # the ones added after that are appended to the loaded rows
+            if not self.filterRegularExpression().pattern():
+                self.sourceModel().load_all()
+            self.setFilterRegularExpression(
+                QRegularExpression(
+                    text,
+                    QRegularExpression.CaseInsensitiveOption
+                    | QRegularExpression.UseUnicodePropertiesOption
+                )
+            )
+
+        self._filter_text = text
+        self.invalidateFilter()
+
+    def refresh_filter(self):
+        """Re-runs the current filter after the source tasks changed."""
+
+        if self._matching_ids is not None:
+            self._matching_ids = None
+            self.set_filter_text(self._filter_text)
+
+    def refresh_allowed_ids(self):
+        if self._get_allowed_ids is None:
+            if self._allowed_ids is not None:
+                self._allowed_ids = None
+                self.invalidateFilter()
+            return
+
+        ids = self._get_allowed_ids()
+        if ids == self._allowed_ids:
+            return
+
+        self._allowed_ids = ids
+        self.sourceModel().ensure_loaded(ids)
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        task = self.sourceModel().get_task(source_row)
+        if self._allowed_ids is not None and task.id not in self._allowed_ids:
+            return False
+        if self._matching_ids is not None:
+            return task.id in self._matching_ids
+        return super().filterAcceptsRow(source_row, source_parent)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # Pages are loaded by descending priority, so only that order
+        # is right without the rest of the pages
+        if column >= 0 and (column, order) != (Task.COLUMN_INDICES["get_priority"], Qt.DescendingOrder):
+            self.sourceModel().load_all()
+        super().sort(column, order)
 
     def lessThan(self, source_left, source_right):
         return source_left.data() < source_right.data()
+
+class DeadlineNotifier(QObject):
+    """Announces task deadlines as their days arrive.
+
+    Instead of polling every task, a single timer is set to go off at
+    the start of the day of the next deadline in the deadline index.
+    """
+
+    deadlinesReached = pyqtSignal(list)
+
+    # QTimer intervals are limited to a signed 32-bit number of milliseconds
+    MAX_INTERVAL = 24 * 24 * 60 * 60 * 1000
+
+    def __init__(self, model, *args, **kwargs):
+        super().__init__(model, *args, **kwargs)
+        self.model = model
+        self._last_notified = QDate()
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+
+        self._connectSignals()
+
+    def _connectSignals(self):
+        self.timer.timeout.connect(self.notify)
+        self.model.layoutChanged.connect(self.schedule)
+        self.model.dataChanged.connect(self.schedule)
+
+    def start(self):
+        self.notify()
+
+    def notify(self):
+        """Announces the tasks due today, once per day, then waits for the next deadline."""
+
+        today = QDate.currentDate()
+        if self._last_notified != today:
+            names = [name for _, name, _ in self.model.get_due_tasks(today, today)]
+            if names:
+                self._last_notified = today
+                self.deadlinesReached.emit(names)
+
+        self.schedule()
+
+    def schedule(self):
+        now = QDateTime.currentDateTime()
+        next_deadline = self.model.get_next_deadline(now.date())
+        if not next_deadline.isValid():
+            self.timer.stop()
+            return
+
+        msecs = now.msecsTo(QDateTime(next_deadline))
+        self.timer.start(min(msecs, self.MAX_INTERVAL))
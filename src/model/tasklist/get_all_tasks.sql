@@ -0,0 +1,3 @@
+SELECT *
+FROM "tasks"
+ORDER BY "priority" DESC, "id" ASC
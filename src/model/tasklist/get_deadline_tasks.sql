@@ -0,0 +1,3 @@
+SELECT *
+FROM "tasks"
+WHERE "deadline_type" <> 0
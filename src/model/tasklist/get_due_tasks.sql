@@ -0,0 +1,5 @@
+SELECT "id", "name", "deadline"
+FROM "tasks"
+WHERE "deadline" BETWEEN :date_from AND :date_to
+    AND "deadline_type" <> 0
+ORDER BY "deadline" ASC
@@ -0,0 +1,4 @@
+SELECT *
+FROM "tasks"
+ORDER BY "priority" DESC, "id" ASC
+LIMIT :limit
@@ -0,0 +1,6 @@
+SELECT "deadline"
+FROM "tasks"
+WHERE "deadline" > :date
+    AND "deadline_type" <> 0
+ORDER BY "deadline" ASC
+LIMIT 1
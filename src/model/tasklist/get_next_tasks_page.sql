@@ -0,0 +1,6 @@
+SELECT *
+FROM "tasks"
+WHERE "priority" <= :priority
+    AND NOT ("priority" = :priority AND "id" <= :id)
+ORDER BY "priority" DESC, "id" ASC
+LIMIT :limit
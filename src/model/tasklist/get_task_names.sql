@@ -0,0 +1,2 @@
+SELECT "id", "name"
+FROM "tasks"
@@ -1,2 +0,0 @@
-SELECT *
-FROM "tasks"
@@ -0,0 +1,4 @@
+SELECT *
+FROM "tasks"
+WHERE "id" IN (SELECT "value" FROM json_each(:ids))
+ORDER BY "priority" DESC, "id" ASC
@@ -5,7 +5,8 @@ INSERT INTO "tasks" (
     "cost",
     "date_created",
     "deadline",
-    "deadline_type"
+    "deadline_type",
+    "priority"
 )
 VALUES (
     (
@@ -25,5 +26,6 @@ VALUES (
     :cost,
     :date_created,
     :deadline,
-    :deadline_type
+    :deadline_type,
+    :priority
 )
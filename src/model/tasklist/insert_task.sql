@@ -5,7 +5,8 @@ INSERT INTO "tasks" (
     "cost",
     "date_created",
     "deadline",
-    "deadline_type"
+    "deadline_type",
+    "priority"
 )
 VALUES (
     :id,
@@ -14,5 +15,6 @@ VALUES (
     :cost,
     :date_created,
     :deadline,
-    :deadline_type
+    :deadline_type,
+    :priority
 )
@@ -0,0 +1,3 @@
+UPDATE "tasks"
+SET "priority" = :priority
+WHERE "id" = :id
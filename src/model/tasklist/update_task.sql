@@ -5,5 +5,6 @@ SET
 	cost = :cost,
 	date_created = :date_created,
 	deadline = :deadline,
-	deadline_type = :deadline_type
+	deadline_type = :deadline_type,
+	priority = :priority
 WHERE "id" = :id
@@ -0,0 +1,75 @@
+"""Times the phases of starting LibrePlan.
+
+Profiling is enabled with the `--profile-startup` flag or by setting the
+`LIBREPLAN_PROFILE_STARTUP` environment variable, and the phases are
+printed to standard error once the main window is first painted:
+
+    python main.py --profile-startup
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+FLAG = "--profile-startup"
+ENVIRONMENT_VARIABLE = "LIBREPLAN_PROFILE_STARTUP"
+
+class StartupProfiler:
+    """Records how long each phase of startup takes.
+
+    Phases can be nested, e.g. creating the tables while connecting to
+    the database. A disabled profiler records nothing.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.phases = []
+        self._depth = 0
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        index = len(self.phases)
+        self.phases.append((name, self._depth, None))
+        self._depth += 1
+        phase_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self.phases[index] = (name, self._depth, time.perf_counter() - phase_start)
+
+    def mark(self, name):
+        """Records the time since startup began, e.g. of the first paint."""
+
+        if self.enabled:
+            self.phases.append((name, 0, time.perf_counter() - self.start))
+
+    def report(self, file=None):
+        if not self.enabled:
+            return
+
+        file = file or sys.stderr
+        print("Startup profile (ms):", file=file)
+        for name, depth, seconds in self.phases:
+            print(f"{seconds * 1000:10.1f}  {'  ' * depth}{name}", file=file)
+        file.flush()
+
+profiler = StartupProfiler()
+
+def enable_from(argv):
+    """Enables the profiler if requested by `argv` or the environment,
+    removing the flag from `argv` so Qt does not see it.
+    """
+
+    if FLAG in argv:
+        argv.remove(FLAG)
+        profiler.enabled = True
+    if os.environ.get(ENVIRONMENT_VARIABLE):
+        profiler.enabled = True
+    return profiler
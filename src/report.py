@@ -0,0 +1,145 @@
+"""Writes a statistics report of the activity log without starting the GUI.
+
+Example, suitable for a nightly job:
+
+    python report.py --format csv --output reports/ --from 2020-01-01
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+from PyQt5.QtCore import QCoreApplication, QDate, QDir
+
+from model.aggregates import FilterMode, StatsReader
+from model.storage import Database
+
+SECTIONS = ["activities", "days", "hours"]
+
+CHART_SIZE = (1200, 800)
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Write per-activity, per-day and per-hour statistics of the activity log."
+    )
+    parser.add_argument("--database", help="path of the database (default: the application's database)")
+    parser.add_argument("--output", default=".", help="directory the report is written to")
+    parser.add_argument("--format", choices=["json", "csv"], default="json")
+    parser.add_argument("--from", dest="date_from", help="first day of the report, as yyyy-MM-dd (default: first logged day)")
+    parser.add_argument("--to", dest="date_to", help="last day of the report, as yyyy-MM-dd (default: last logged day)")
+    parser.add_argument("--filter", default="", help="only report activities whose names match")
+    parser.add_argument(
+        "--filter-mode",
+        choices=[mode.name.lower() for mode in FilterMode],
+        default=FilterMode.CONTAINS.name.lower()
+    )
+    parser.add_argument("--charts", action="store_true", help="also render the charts as PNG images")
+    return parser.parse_args(argv)
+
+def parse_date(text, default):
+    if text is None:
+        return default
+
+    date = QDate.fromString(text, Database.DATE_FORMAT)
+    if not date.isValid():
+        raise ValueError(f"Invalid date: {text}")
+    return date
+
+def write_json(report, directory):
+    with open(os.path.join(directory, "report.json"), "w") as f:
+        json.dump(report, f, indent=4)
+
+def write_csv(report, directory):
+    for section in SECTIONS:
+        rows = report[section]
+        fieldnames = []
+        for row in rows:
+            fieldnames += [key for key in row if key not in fieldnames]
+
+        with open(os.path.join(directory, f"{section}.csv"), "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames, restval="")
+            writer.writeheader()
+            writer.writerows(rows)
+
+def write_charts(database, filter_text, filter_mode, date_from, date_to, directory):
+    # Charts are only needed here, so the report does not otherwise
+    # depend on QtChart or a display
+    from PyQt5.QtChart import QChartView
+    from model.stats import StatsModel
+
+    model = StatsModel(database, animated=False)
+    model.set_filter(filter_text, filter_mode)
+    model.set_date_range(date_from, date_to)
+    model.set_point_budget(CHART_SIZE[0])
+
+    charts = {
+        "pie": model.get_pie_chart(),
+        "perf": model.get_perf_chart(),
+        "daily": model.get_daily_chart(),
+        "circadian": model.get_circadian_chart(),
+    }
+    model.update_plots()
+
+    for name, chart in charts.items():
+        view = QChartView(chart)
+        view.resize(*CHART_SIZE)
+        view.grab().save(os.path.join(directory, f"{name}.png"))
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    if args.charts:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication(sys.argv[:1])
+    else:
+        app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+
+    if args.database is None:
+        from application import Application
+        args.database = Application.PATH_DB
+
+    if not os.path.exists(args.database):
+        print(f"Database not found: {args.database}", file=sys.stderr)
+        return 1
+
+    database = Database(args.database, name=f"{args.database}#report", read_only=True)
+    database.connect()
+    try:
+        return write_report(args, database)
+    finally:
+        database.disconnect()
+
+def write_report(args, database):
+    if database.get_schema_version() < Database.SCHEMA_VERSION:
+        print("The database is outdated; open it in LibrePlan once to upgrade it.", file=sys.stderr)
+        return 1
+
+    reader = StatsReader(database)
+    min_date, max_date = reader.get_log_date_range()
+    try:
+        date_from = parse_date(args.date_from, min_date)
+        date_to = parse_date(args.date_to, max_date)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    filter_mode = FilterMode[args.filter_mode.upper()]
+    activity_ids = reader.resolve_filter(args.filter, filter_mode)
+    report = reader.report(activity_ids, date_from, date_to)
+
+    QDir().mkpath(args.output)
+    if args.format == "json":
+        write_json(report, args.output)
+    else:
+        write_csv(report, args.output)
+
+    if args.charts:
+        write_charts(database, args.filter, filter_mode, date_from, date_to, args.output)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Keeps a single instance of LibrePlan running per user.
+
+The first instance listens on a local socket. Later launches send their
+options to it and exit instead of starting a second application on the
+same database.
+"""
+
+import getpass
+import json
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtNetwork import QAbstractSocket, QLocalServer, QLocalSocket
+
+SERVER_NAME = f"LibrePlan-{getpass.getuser()}"
+
+# Milliseconds to wait for a running instance. It is local, so it either
+# answers right away or is not there.
+TIMEOUT = 200
+
+def _connect(name):
+    socket = QLocalSocket()
+    socket.connectToServer(name)
+    return socket if socket.waitForConnected(TIMEOUT) else None
+
+def is_running(name=SERVER_NAME):
+    socket = _connect(name)
+    if socket is None:
+        return False
+    socket.disconnectFromServer()
+    return True
+
+def send_to_running_instance(options, name=SERVER_NAME):
+    """Sends `options` to the running instance.
+
+    Returns `False` if there is no running instance to send them to.
+    """
+
+    socket = _connect(name)
+    if socket is None:
+        return False
+
+    socket.write(json.dumps(options).encode())
+    socket.waitForBytesWritten(TIMEOUT)
+    socket.disconnectFromServer()
+    if socket.state() != QLocalSocket.UnconnectedState:
+        socket.waitForDisconnected(TIMEOUT)
+    return True
+
+class InstanceServer(QObject):
+    """Receives the options of later launches."""
+
+    optionsReceived = pyqtSignal(dict)
+
+    def __init__(self, name=SERVER_NAME, parent=None):
+        super().__init__(parent)
+        self.name = name
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self._accept)
+
+    def listen(self):
+        """Starts listening, returning `False` if another instance already is."""
+
+        if self.server.listen(self.name):
+            return True
+
+        # A socket left behind by an instance that crashed still takes
+        # the name until it is removed
+        if self.server.serverError() == QAbstractSocket.AddressInUseError and not is_running(self.name):
+            QLocalServer.removeServer(self.name)
+            return self.server.listen(self.name)
+        return False
+
+    def close(self):
+        self.server.close()
+
+    def _accept(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            if socket.state() == QLocalSocket.UnconnectedState:
+                self._read(socket)
+            else:
+                socket.disconnected.connect(lambda socket=socket: self._read(socket))
+
+    def _read(self, socket):
+        data = bytes(socket.readAll())
+        socket.deleteLater()
+
+        # Connections without data only check whether this instance runs
+        if not data:
+            return
+        try:
+            options = json.loads(data)
+        except ValueError:
+            return
+        if isinstance(options, dict):
+            self.optionsReceived.emit(options)
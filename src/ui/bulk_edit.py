@@ -0,0 +1,131 @@
+from enum import Enum, auto
+
+from PyQt5.QtCore import QDate
+from PyQt5.QtWidgets import QDialog
+
+from ui.forms.bulk_edit import Ui_BulkEditDialog
+
+class BulkOperation(Enum):
+    SET = 0
+    ADD = auto()
+    MULTIPLY = auto()
+
+    def apply(self, old_value, value):
+        """Returns the result of applying the operation to `old_value`.
+
+        Adding to a date adds `value` days. Integer results are rounded
+        and kept non-negative.
+        """
+
+        if self == BulkOperation.SET:
+            return value
+
+        if isinstance(old_value, QDate):
+            if old_value.isValid():
+                return old_value.addDays(int(value))
+            return old_value
+
+        if self == BulkOperation.ADD:
+            new_value = old_value + value
+        else:
+            new_value = old_value * value
+
+        if isinstance(old_value, int):
+            return max(round(new_value), 0)
+        return new_value
+
+class BulkEditDialog(QDialog, Ui_BulkEditDialog):
+    """Dialog for choosing a change to apply to every selected row.
+
+    `fields` is a list of `(attr, label, type)` tuples, where `type` is
+    `int`, `bool`, `QDate` or an `Enum` subclass.
+    """
+
+    def __init__(self, parent, fields, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.setupUi(self)
+
+        self.fields = fields
+        self.date_editor.setDate(QDate.currentDate())
+
+        for (_, label, _) in self.fields:
+            self.field_options.addItem(label)
+
+        self._connectSignals()
+        self.set_field(0)
+
+    @staticmethod
+    def get_bulk_edit_options(parent, fields):
+        dialog = BulkEditDialog(parent, fields)
+        if dialog.exec_():
+            return dialog.options()
+        return None
+
+    def _connectSignals(self):
+        self.field_options.currentIndexChanged.connect(self.set_field)
+        self.operation_options.currentIndexChanged.connect(self._show_value_editor)
+
+    def _field_type(self):
+        return self.fields[self.field_options.currentIndex()][2]
+
+    def _operation(self):
+        return BulkOperation[self.operation_options.currentText()]
+
+    def set_field(self, index):
+        field_type = self._field_type()
+
+        if field_type is int:
+            operations = list(BulkOperation)
+        elif field_type is QDate:
+            operations = [BulkOperation.SET, BulkOperation.ADD]
+        else:
+            operations = [BulkOperation.SET]
+
+        self.operation_options.blockSignals(True)
+        self.operation_options.clear()
+        for operation in operations:
+            self.operation_options.addItem(operation.name)
+        self.operation_options.blockSignals(False)
+
+        if issubclass(field_type, Enum):
+            self.choice_editor.clear()
+            for option in list(field_type):
+                self.choice_editor.addItem(option.name)
+
+        self._show_value_editor()
+
+    def _show_value_editor(self):
+        field_type = self._field_type()
+        operation = self._operation()
+
+        if field_type is bool:
+            self.value_editors.setCurrentWidget(self.page_bool)
+        elif issubclass(field_type, Enum):
+            self.value_editors.setCurrentWidget(self.page_choice)
+        elif field_type is QDate and operation == BulkOperation.SET:
+            self.value_editors.setCurrentWidget(self.page_date)
+        else:
+            self.value_editors.setCurrentWidget(self.page_number)
+
+        self.number_editor.setDecimals(2 if operation == BulkOperation.MULTIPLY else 0)
+
+    def options(self):
+        attr, _, field_type = self.fields[self.field_options.currentIndex()]
+        operation = self._operation()
+
+        if field_type is bool:
+            value = self.bool_editor.isChecked()
+        elif issubclass(field_type, Enum):
+            value = field_type[self.choice_editor.currentText()]
+        elif field_type is QDate and operation == BulkOperation.SET:
+            value = self.date_editor.date()
+        elif operation == BulkOperation.MULTIPLY:
+            value = self.number_editor.value()
+        else:
+            value = round(self.number_editor.value())
+
+        return {
+            "attr": attr,
+            "operation": operation,
+            "value": value,
+        }
@@ -3,7 +3,6 @@ from typing import Callable, Sequence, Tuple, List
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtCore import (
     Qt,
-    QRegularExpression,
     QEvent,
     QTime,
     pyqtSignal,
@@ -26,8 +25,6 @@ from model.plan import PlanTableModel, Activity
 from model.tasklist import TasklistTableModel, TasklistProxyModel, Task
 from ui.forms.main_window import Ui_MainWindow
 from ui.importing import ImportDialog, ReplaceOption
-from ui.settings import SettingsDialog
-from ui.stats import StatsDialog
 
 class MainWindow(QMainWindow, Ui_MainWindow):
     planNewRequested = pyqtSignal()
@@ -49,12 +46,15 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     planCutActivities = pyqtSignal(list)
     planCopyActivities = pyqtSignal(list)
     planPasteActivities = pyqtSignal(int)
+    planBulkEditActivities = pyqtSignal(list, dict)
 
     tasklistNewTask = pyqtSignal()
     tasklistDeleteTasks = pyqtSignal(list)
+    tasklistBulkEditTasks = pyqtSignal(list, dict)
 
     backupExportRequested = pyqtSignal(str)
     backupRestoreRequested = pyqtSignal(str)
+    statsRebuildRequested = pyqtSignal()
     appExitRequested = pyqtSignal()
 
     def __init__(self, application, config, *args, **kwargs):
@@ -80,6 +80,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.actionAbout.triggered.connect(self.show_about_dialog)
         self.actionExport_Backup.triggered.connect(self.export_backup_dialog)
         self.actionRestore_Backup.triggered.connect(self.restore_backup_dialog)
+        self.actionRebuild_Statistics.triggered.connect(self.statsRebuildRequested)
         self.actionSettings.triggered.connect(self.show_settings_dialog)
         self.actionExit.triggered.connect(self.appExitRequested)
         self.actionNew_Plan.triggered.connect(self.new_plan_dialog)
@@ -128,6 +129,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.actionExport_Selected_Activities.triggered.connect(
             lambda: self.export_activities_dialog(False)
         )
+        self.actionEdit_Selected_Activities.triggered.connect(self.bulk_edit_activities_dialog)
 
         self.actionPlan_Cut_Selected_Activities.triggered.connect(
             lambda: self.planCutActivities.emit(
@@ -159,6 +161,10 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.actionExport_Selected_Tasks.triggered.connect(
             lambda: self.export_tasks_dialog(False)
         )
+        self.actionEdit_Selected_Tasks.triggered.connect(self.bulk_edit_tasks_dialog)
+        self.actionShow_All_Tasks.triggered.connect(self.show_all_tasks)
+        self.actionShow_Tasks_Due_Soon.triggered.connect(self.show_tasks_due_soon_dialog)
+        self.actionShow_Overdue_Tasks.triggered.connect(self.show_overdue_tasks)
         self.actionDelete_Selected_Tasks.triggered.connect(
             lambda: self.tasklistDeleteTasks.emit(
                 self._get_selected_tasklist_indices()
@@ -183,7 +189,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         )
 
         # Other widgets
-        self.tasklist_filter.returnPressed.connect(self.filter_tasklist)
+        self.tasklist_filter.textChanged.connect(self.filter_tasklist)
 
         self.tray_icon.activated.connect(self.tray_icon_activated)
         self.tray_icon.messageClicked.connect(self.show)
@@ -280,10 +286,15 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         )
         QMessageBox.about(self, "About LibrePlan", text)
 
+    # Dialogs are imported when first opened, which keeps the charts
+    # library and their forms out of startup
+
     def show_settings_dialog(self):
+        from ui.settings import SettingsDialog
         SettingsDialog(self, self.config)
 
     def show_stats_dialog(self):
+        from ui.stats import StatsDialog
         StatsDialog(self, self.application)
 
     def import_tasks_dialog(self):
@@ -301,6 +312,29 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             indices = [] if export_all else self._get_selected_tasklist_indices()
             self.tasklistExportRequested.emit(path, indices)
 
+    def bulk_edit_tasks_dialog(self):
+        indices = self._get_selected_tasklist_indices()
+
+        if indices:
+            from ui.bulk_edit import BulkEditDialog
+            options = BulkEditDialog.get_bulk_edit_options(self, Task.BULK_EDIT_FIELDS)
+            if options:
+                self.tasklistBulkEditTasks.emit(indices, options)
+
+    def show_tasks_due_soon_dialog(self):
+        days, ok = QInputDialog().getInt(
+                    self,
+                    "Show Tasks Due Soon",
+                    "Show tasks due within this many days:",
+                    self.config.get_setting("ui.tasklist/due_soon_days", 7),
+                    0
+                )
+
+        if ok:
+            self.config.set_setting("ui.tasklist/due_soon_days", days)
+            tasklist_model = self._tasklist_proxy.sourceModel()
+            self._show_only_tasks(lambda: tasklist_model.get_due_task_ids(days))
+
     def new_plan_dialog(self):
         if self.table_plan.model().rowCount() != 0:
             discard = QMessageBox.warning(
@@ -327,6 +361,15 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             indices = [] if export_all else self._get_selected_plan_indices()
             self.planExportRequested.emit(path, indices)
 
+    def bulk_edit_activities_dialog(self):
+        indices = self._get_selected_plan_indices()
+
+        if indices:
+            from ui.bulk_edit import BulkEditDialog
+            options = BulkEditDialog.get_bulk_edit_options(self, Activity.BULK_EDIT_FIELDS)
+            if options:
+                self.planBulkEditActivities.emit(indices, options)
+
     def plan_interrupt_dialog(self):
         input_text, ok = QInputDialog().getText(
                     self,
@@ -364,7 +407,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             dialog = QMessageBox.warning(
                 self,
                 "Restore from Backup?",
-                "Do you want to restore from backup and restart? A backup of the current database will be made.",
+                "Do you want to restore from backup? A backup of the current database will be made.",
                 QMessageBox.Ok | QMessageBox.Cancel
             )
 
@@ -435,6 +478,26 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             "Click \"Finish\" to stop countdown."
         )
 
+    def deadlines_reached(self, task_names):
+        if len(task_names) == 1:
+            title = f"Task \"{task_names[0]}\" is due today."
+        else:
+            title = f"{len(task_names)} tasks are due today."
+        self.tray_icon.showMessage(title, "\n".join(task_names))
+
+    def backup_progress(self, copied_pages, total_pages):
+        percent = 100 * copied_pages // total_pages if total_pages else 100
+        self.statusbar.showMessage(f"Backing up database... {percent}%")
+
+    def backup_written(self, path):
+        self.statusbar.showMessage(f"Backup saved to {path}", 5000)
+
+    def backup_failed(self, message):
+        self.statusbar.showMessage(f"Backup failed: {message}")
+
+    def restore_failed(self, message):
+        QMessageBox.critical(self, "Cannot restore from backup", message, QMessageBox.Ok)
+
     def _setupTables(self, plan_model, tasklist_model):
         # Plan
 
@@ -505,14 +568,21 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             for index in self.table_tasklist.selectionModel().selectedRows()]
         )
 
+    def show_all_tasks(self):
+        self._show_only_tasks(None)
+
+    def show_overdue_tasks(self):
+        tasklist_model = self._tasklist_proxy.sourceModel()
+        self._show_only_tasks(tasklist_model.get_overdue_task_ids)
+
+    def _show_only_tasks(self, get_ids):
+        self.tabWidget.setCurrentWidget(self.tab_tasklist)
+        self._tasklist_proxy.set_allowed_ids(get_ids)
+        count = self._tasklist_proxy.rowCount()
+        self.statusbar.showMessage(f"{count} tasks found")
+
     def filter_tasklist(self):
-        self._tasklist_proxy.setFilterRegularExpression(
-            QRegularExpression(
-                self.tasklist_filter.text(),
-                QRegularExpression.CaseInsensitiveOption
-                | QRegularExpression.UseUnicodePropertiesOption
-            )
-        )
+        self._tasklist_proxy.set_filter_text(self.tasklist_filter.text())
         count = self._tasklist_proxy.rowCount()
         self.statusbar.showMessage(f"{count} tasks found")
 
@@ -526,7 +596,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     def table_count_changed(self):
         activity_count = self.table_plan.model().rowCount() - 1
-        task_count = self._tasklist_proxy.sourceModel().rowCount()
+        task_count = self._tasklist_proxy.sourceModel().task_count()
 
         self.set_title(f"{activity_count} Activities, {task_count} Tasks - LibrePlan")
 
@@ -3,6 +3,7 @@ from PyQt5.QtWidgets import (
     QDialog,
     QDialogButtonBox,
     QCheckBox,
+    QComboBox,
     QSpinBox,
 )
 
@@ -22,6 +23,12 @@ class SettingsDialog(QDialog, Ui_SettingsDialog):
             ("user.backup/on_exit", True, self.checkBoxOnExit),
             ("user.backup/on_plan_complete", False, self.checkBoxOnPlanComplete),
             ("user.backup/number_of_backups", 50, self.spinBoxBackupNum),
+            ("user.backup/keep_days", 7, self.spinBoxKeepDays),
+            ("user.backup/keep_weeks", 4, self.spinBoxKeepWeeks),
+            ("user.backup/keep_months", 12, self.spinBoxKeepMonths),
+            ("user.backup/deduplicate", False, self.checkBoxDeduplicate),
+            ("user.backup/compression", 0, self.comboBoxCompression),
+            ("user.backup/compression_level", 6, self.spinBoxCompressionLevel),
         ]
 
         for (name, value, widget) in self.settings:
@@ -35,6 +42,18 @@ class SettingsDialog(QDialog, Ui_SettingsDialog):
                 widget.valueChanged.connect(
                     lambda: self.apply_button.setEnabled(True)
                 )
+            elif isinstance(widget, QComboBox):
+                widget.setCurrentIndex(self.config.get_setting(name, value))
+                widget.currentIndexChanged.connect(
+                    lambda: self.apply_button.setEnabled(True)
+                )
+
+        if self.config.has_setting("user.backup/last_compression_ratio"):
+            ratio = self.config.get_setting("user.backup/last_compression_ratio", 1.0)
+            seconds = self.config.get_setting("user.backup/last_compression_seconds", 0.0)
+            self.labelCompressionStats.setText(
+                f"The last compressed backup took {seconds:.1f} s and is {ratio:.0%} of the database's size."
+            )
 
         self.apply_button.clicked.connect(self.apply)
         self.setModal(True)
@@ -47,6 +66,8 @@ class SettingsDialog(QDialog, Ui_SettingsDialog):
                 self.config.set_setting(name, widget.isChecked())
             elif isinstance(widget, QSpinBox):
                 self.config.set_setting(name, widget.value())
+            elif isinstance(widget, QComboBox):
+                self.config.set_setting(name, widget.currentIndex())
 
     def accept(self):
         self.apply()
@@ -2,7 +2,7 @@ from PyQt5.QtChart import QChartView
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtWidgets import QApplication, QCompleter, QDialog
 
-from model.stats import StatsModel
+from model.stats import FilterMode, Granularity, StatsModel
 from ui.forms.stats import Ui_StatsDialog
 
 class StatsDialog(QDialog, Ui_StatsDialog):
@@ -10,15 +10,16 @@ class StatsDialog(QDialog, Ui_StatsDialog):
         super().__init__(parent, *args, **kwargs)
 
         self.application = application
-        self.model = StatsModel(self.application.database)
+        self.model = StatsModel(self.application.database, self.application.stats_cache)
 
         self.setupUi(self)
 
         self._setupWidgets()
         self._setupCharts()
-        self._plot_days_ago(0)
 
         self._connectSignals()
+        self.model.start_worker()
+        self._plot_days_ago(0)
         self.setModal(True)
         self.open()
 
@@ -26,10 +27,9 @@ class StatsDialog(QDialog, Ui_StatsDialog):
     ################################################################################
 
     def _connectSignals(self):
-        self.nameFilter.editingFinished.connect(
-            lambda: self.model.set_filter(self.nameFilter.text())
-        )
-        self.nameFilter.editingFinished.connect(self.model.update_plots)
+        self.nameFilter.editingFinished.connect(self._filter_changed)
+        self.filterMode.currentIndexChanged.connect(self._filter_changed)
+        self.granularity.currentIndexChanged.connect(self._granularity_changed)
 
         self.radioButtonToday.clicked.connect(
             lambda: self._plot_days_ago(0)
@@ -54,9 +54,24 @@ class StatsDialog(QDialog, Ui_StatsDialog):
 
         self.chart_view_pie.chart().series()[0].hovered.connect(self._pie_slice_hover)
 
+        self.model.chartLoading.connect(self._chart_loading)
+        self.model.chartLoaded.connect(self._chart_loaded)
+        self.finished.connect(self.model.stop_worker)
+
     # UI functionality
     ################################################################################
 
+    def _filter_changed(self):
+        # The combo box items are in the same order as the modes
+        mode = list(FilterMode)[self.filterMode.currentIndex()]
+        self.model.set_filter(self.nameFilter.text(), mode)
+        self._request_plots()
+
+    def _granularity_changed(self, index):
+        # "Auto" comes first, then the granularities in order
+        self.model.set_granularity(list(Granularity)[index - 1] if index else None)
+        self._request_plots()
+
     def _limit_date_range(self):
         self.dateEditTo.setMinimumDate(self.dateEditFrom.date())
         self.dateEditFrom.setMaximumDate(self.dateEditTo.date())
@@ -64,6 +79,20 @@ class StatsDialog(QDialog, Ui_StatsDialog):
     def _pie_slice_hover(self, slice, hovered):
         slice.setLabelVisible(hovered)
 
+    def _set_chart_title(self, chart, title):
+        if chart == "quantiles":
+            self.labelQuantiles.setText(title)
+        else:
+            self._chart_views[chart].chart().setTitle(title)
+
+    def _chart_loading(self, chart):
+        self._set_chart_title(chart, f"{self._chart_titles[chart]} (Loading...)")
+        self._chart_views[chart].setEnabled(False)
+
+    def _chart_loaded(self, chart):
+        self._set_chart_title(chart, self._chart_titles[chart])
+        self._chart_views[chart].setEnabled(True)
+
     # Set up widgets/charts
     ################################################################################
 
@@ -82,9 +111,29 @@ class StatsDialog(QDialog, Ui_StatsDialog):
         self.chart_view_daily_avg.setChart(self.model.get_daily_chart())
         self.chart_view_circadian.setChart(self.model.get_circadian_chart())
 
+        self._chart_views = {
+            "pie": self.chart_view_pie,
+            "perf": self.chart_view_perf,
+            "daily": self.chart_view_daily_avg,
+            "circadian": self.chart_view_circadian,
+        }
+        self._chart_titles = {
+            chart: view.chart().title()
+            for chart, view in self._chart_views.items()
+        }
+
+        self.quantile_table.setModel(self.model.quantile_model)
+        self._chart_views["quantiles"] = self.quantile_table
+        self._chart_titles["quantiles"] = self.labelQuantiles.text()
+
     # Plotting dispatcher
     ################################################################################
 
+    def _request_plots(self):
+        # Long ranges are downsampled to the width of the line charts
+        self.model.set_point_budget(self.chart_view_daily_avg.width())
+        self.model.request_plots()
+
     def _plot_all_time(self):
         self.dateEditFrom.setDate(self.dateEditFrom.minimumDate())
         self.dateEditTo.setDate(self.dateEditFrom.maximumDate())
@@ -93,7 +142,7 @@ class StatsDialog(QDialog, Ui_StatsDialog):
             self.dateEditFrom.date(),
             self.dateEditTo.date()
         )
-        self.model.update_plots()
+        self._request_plots()
 
     def _plot_days_ago(self, days):
         if days >= 0:
@@ -106,4 +155,4 @@ class StatsDialog(QDialog, Ui_StatsDialog):
             self.dateEditFrom.date(),
             self.dateEditTo.date()
         )
-        self.model.update_plots()
+        self._request_plots()
@@ -1,4 +1,5 @@
 import pytest
+from PyQt5.QtWidgets import QApplication
 
 from model.storage import Database
 from model.config import Config
@@ -13,3 +14,9 @@ def database(tmp_path):
 @pytest.fixture
 def config(database):
     return Config(database)
+
+# Qt allows a single application, which is kept for all tests so it is
+# not collected while objects created under it are still used
+@pytest.fixture(scope="session")
+def application():
+    return QApplication.instance() or QApplication([])
@@ -0,0 +1,91 @@
+import pytest
+from PyQt5.QtCore import QByteArray, QTime
+
+from model.backup import Backup
+from model.config import Config
+from model.plan import Activity, PlanTableModel
+from model.storage import Database, QueryError
+from model.storage.backends import BACKENDS, StorageBackend
+
+@pytest.fixture(params=list(BACKENDS))
+def backend_database(request, tmp_path, application):
+    database = Database(str(tmp_path / f"{request.param}.db"), backend=request.param)
+    assert database.connect()
+    yield database
+    database.disconnect()
+
+def test_values_are_read_alike(backend_database):
+    query = backend_database.get_prepared_query("SELECT :text AS text, :blob AS blob, :missing AS missing, 1.5 AS number")
+    query.bindValue(":text", "text")
+    query.bindValue(":blob", QByteArray(b"\x00\xff"))
+    backend_database.execute_query(query)
+
+    assert query.first()
+    assert query.value("text") == "text"
+    assert query.value("blob") == QByteArray(b"\x00\xff")
+    assert query.value("missing") == ""
+    assert query.value(3) == 1.5
+
+def test_failed_transactions_are_rolled_back(backend_database):
+    config = Config(backend_database)
+    config.set_setting("kept", 1)
+    config.flush()
+
+    with pytest.raises(QueryError):
+        with backend_database.transaction():
+            config.set_setting("discarded", 1)
+            config.flush()
+            backend_database.execute_query(backend_database.get_prepared_query("SELECT * FROM missing_table"))
+
+    assert Config(backend_database).has_setting("kept")
+    assert not Config(backend_database).has_setting("discarded")
+
+def test_plan_is_archived(backend_database):
+    config = Config(backend_database)
+    plan = PlanTableModel(None, backend_database, config)
+    plan.insert_activities(0, [
+        Activity(name="Work", start_time=QTime(8, 0), is_fixed=True, length=60),
+        Activity(start_time=QTime(9, 0), is_fixed=True),
+    ])
+    plan._archive()
+
+    query = backend_database.get_prepared_query(
+        'SELECT "activities"."name", "start_time" FROM "activity_log" '
+        'JOIN "activities" ON "activities"."id" = "activity_id"'
+    )
+    backend_database.execute_query(query)
+    assert query.next()
+    assert (query.value("name"), query.value("start_time")) == ("Work", 8 * 60)
+    assert not query.next()
+
+def test_memory_databases_are_shared_by_name(application):
+    database = Database("shared", backend="memory")
+    database.connect()
+    config = Config(database)
+    config.set_setting("shared_key", 123)
+    config.flush()
+
+    reader = Database("shared", name="shared#reader", read_only=True, backend="memory")
+    reader.connect()
+    try:
+        assert Config(reader).has_setting("shared_key")
+    finally:
+        reader.disconnect()
+        database.disconnect()
+
+def test_memory_databases_are_not_backed_up(tmp_path, application):
+    database = Database("unsaved", backend="memory")
+    database.connect()
+    try:
+        with pytest.raises(ValueError):
+            Backup(str(tmp_path), database, Config(database))
+    finally:
+        database.disconnect()
+
+def test_incomplete_backends_cannot_be_created():
+    class IncompleteBackend(StorageBackend):
+        def open(self):
+            return True
+
+    with pytest.raises(TypeError):
+        IncompleteBackend("incomplete.db", "incomplete")
@@ -1,9 +1,12 @@
+import lzma
+import os
 import pytest
 import time
 
-from PyQt5.QtCore import QDir
+from PyQt5.QtCore import QDate, QDir, QEventLoop, QTimer
 
-from model.backup import Backup
+from model.backup import Backup, BackupIntegrityError, Compression, DecompressionError, RetentionPolicy, decompress_file
+from model.chunk_store import ChunkStore
 from model.config import Config
 from model.storage import Database
 
@@ -27,16 +30,30 @@ def test_creation_restoration(tmp_path, backup, database, config):
     config.set_setting(new_key, 123)
     backup.restore(backup_path)
 
-    new_database = Database(str(tmp_path / "test.db"))
-    assert new_database.connect()
+    # The connection is reopened in place
+    config.reload()
+    assert config.has_setting(old_key)
+    assert not config.has_setting(new_key)
 
-    new_config = Config(new_database)
-    assert new_config.has_setting(old_key)
-    assert not new_config.has_setting(new_key)
+def test_damaged_backup_is_not_restored(tmp_path, backup, database, config):
+    config.set_setting("kept_key", 123)
+    config.flush()
+
+    damaged_path = str(tmp_path / "damaged.db")
+    with open(damaged_path, "wb") as f:
+        f.write(b"SQLite format 3\0" + bytes(4096))
+
+    with pytest.raises(BackupIntegrityError):
+        backup.restore(damaged_path)
+
+    assert not os.path.exists(database.path + ".restore")
+    config.reload()
+    assert config.get_setting("kept_key", 0) == 123
 
 def test_backup_rotation(backup, backup_path, config):
     backup_dir = QDir(backup_path)
     backup_dir.setFilter(QDir.Files)
+    backup_dir.setNameFilters(Backup.NAME_FILTERS)
 
     number_of_backups = 5
     config.set_setting("user.backup/number_of_backups", number_of_backups)
@@ -45,3 +62,144 @@ def test_backup_rotation(backup, backup_path, config):
         backup.create()
 
     assert len(backup_dir.entryInfoList()) == number_of_backups
+    assert sorted(backup.read_manifest()) == sorted(backup_dir.entryList())
+
+def test_retention_keeps_one_backup_per_period():
+    # Two backups a day, from Monday 2024-01-01 through 2024-03-31
+    names = [
+        f"backup-{QDate(2024, 1, 1).addDays(day).toString('yyyy-MM-dd')}-{hour:02}-00-00-0000.db"
+        for day in range(91)
+        for hour in [9, 21]
+    ]
+
+    kept = sorted(RetentionPolicy(recent=3, days=2, weeks=2, months=3).select(names))
+
+    assert kept == [
+        "backup-2024-01-31-21-00-00-0000.db",  # January
+        "backup-2024-02-29-21-00-00-0000.db",  # February
+        "backup-2024-03-24-21-00-00-0000.db",  # The week before
+        "backup-2024-03-30-21-00-00-0000.db",  # The day before
+        "backup-2024-03-31-09-00-00-0000.db",
+        "backup-2024-03-31-21-00-00-0000.db",
+    ]
+
+def test_backup_is_written_on_worker(backup, backup_path, config, application):
+    config.set_setting("pending_key", 123)
+
+    progress = []
+    written = []
+    loop = QEventLoop()
+    backup.progressChanged.connect(lambda copied, total: progress.append((copied, total)))
+    backup.backupWritten.connect(written.append)
+    backup.backupsFinished.connect(loop.quit)
+
+    backup.create_async()
+    QTimer.singleShot(5000, loop.quit)
+    loop.exec_()
+    backup.stop_worker()
+
+    assert len(written) == 1
+    assert progress[-1][0] == progress[-1][1]
+
+    # The copy includes settings that were not yet written
+    copy = Database(written[0], name="copy", read_only=True)
+    copy.connect()
+    assert Config(copy).get_setting("pending_key", 0) == 123
+    copy.disconnect()
+
+def test_deduplicated_backups_share_chunks(tmp_path, backup, backup_path, database, config, application):
+    config.set_setting("user.backup/deduplicate", True)
+    backup.create()
+    chunk_count = sum(len(files) for _, _, files in os.walk(backup.chunk_store.chunk_path))
+
+    # Nothing changed, so no chunk is stored twice
+    backup.create()
+    snapshots = sorted(QDir(backup_path).entryList(["*" + ChunkStore.EXTENSION]))
+    assert len(snapshots) == 2
+    assert sum(len(files) for _, _, files in os.walk(backup.chunk_store.chunk_path)) == chunk_count
+
+    restored_path = str(tmp_path / "restored.db")
+    backup.chunk_store.read_snapshot(os.path.join(backup_path, snapshots[-1]), restored_path)
+    restored = Database(restored_path, name="restored", read_only=True)
+    assert restored.connect()
+    assert Config(restored).get_setting("user.backup/deduplicate", False)
+    restored.disconnect()
+
+def test_damaged_snapshot_manifests_do_not_stop_backups(backup, backup_path, config, application):
+    config.set_setting("user.backup/deduplicate", True)
+    backup.create()
+    snapshot = QDir(backup_path).entryList(["*" + ChunkStore.EXTENSION])[0]
+    with open(os.path.join(backup_path, snapshot), "rb+") as f:
+        f.truncate(10)
+    with pytest.raises(ValueError):
+        backup.chunk_store.read_manifest(os.path.join(backup_path, snapshot))
+
+    written = []
+    finished = []
+    loop = QEventLoop()
+    backup.backupWritten.connect(written.append)
+    backup.backupsFinished.connect(lambda: finished.append(True))
+    backup.backupsFinished.connect(loop.quit)
+
+    backup.create_async()
+    QTimer.singleShot(5000, loop.quit)
+    loop.exec_()
+    backup.stop_worker()
+
+    assert finished and len(written) == 1
+    assert backup.chunk_store.read_manifest(written[0])
+
+@pytest.mark.parametrize("compression", [Compression.GZIP, Compression.XZ])
+def test_compressed_backups_are_restored(tmp_path, backup, backup_path, config, application, compression):
+    config.set_setting("user.backup/compression", compression.value)
+    config.set_setting("restored_key", 123)
+    backup.create()
+
+    backups = QDir(backup_path).entryList(["*.db" + compression.extension])
+    assert len(backups) == 1
+    assert config.has_setting("user.backup/last_compression_ratio")
+
+    config.set_setting("restored_key", 456)
+    backup.restore(os.path.join(backup_path, backups[0]))
+
+    restored = Database(str(tmp_path / "test.db"), name="restored")
+    assert restored.connect()
+    assert Config(restored).get_setting("restored_key", 0) == 123
+    restored.disconnect()
+
+@pytest.mark.parametrize("extension, data", [
+    (".db.xz", lzma.compress(os.urandom(65536))[:1024]),
+    (".db.gz", b"not gzip data"),
+    (ChunkStore.EXTENSION, b""),
+])
+def test_backups_that_cannot_be_unpacked_are_not_restored(tmp_path, backup, database, config, extension, data):
+    config.set_setting("kept_key", 123)
+    config.flush()
+
+    damaged_path = str(tmp_path / ("damaged" + extension))
+    with open(damaged_path, "wb") as f:
+        f.write(data)
+
+    with pytest.raises(BackupIntegrityError):
+        backup.restore(damaged_path)
+
+    assert not os.path.exists(database.path + ".restore")
+    config.reload()
+    assert config.get_setting("kept_key", 0) == 123
+
+def test_damaged_compressed_backups_are_not_decompressed(tmp_path):
+    truncated_path = str(tmp_path / "truncated.db.xz")
+    with Compression.XZ.open(truncated_path, "wb") as f:
+        f.write(os.urandom(65536))
+    with open(truncated_path, "rb+") as f:
+        f.truncate(os.path.getsize(truncated_path) // 2)
+
+    junk_path = str(tmp_path / "junk.db.gz")
+    with open(junk_path, "wb") as f:
+        f.write(b"not gzip data")
+
+    for path in [truncated_path, junk_path]:
+        destination_path = str(tmp_path / "plain.db")
+        with pytest.raises(DecompressionError):
+            decompress_file(path, destination_path)
+        assert not os.path.exists(destination_path)
@@ -0,0 +1,23 @@
+from model.config import Config
+
+def read_stored_setting(database, key):
+    query = database.get_prepared_query('SELECT "value" FROM "config" WHERE "key" = :key')
+    query.bindValue(":key", key)
+    database.execute_query(query)
+    return query.value("value") if query.first() else None
+
+def test_default_is_stored_on_first_read(config, application):
+    assert not config.has_setting("user.backup/on_exit")
+    assert config.get_setting("user.backup/on_exit", True) is True
+    assert config.has_setting("user.backup/on_exit")
+
+def test_changes_are_written_on_flush(database, config, application):
+    config.set_setting("current_activity_index", 3)
+    config.set_setting("ui.tasklist/due_soon_days", 7)
+
+    assert config.get_setting("current_activity_index", 0) == 3
+    assert read_stored_setting(database, "current_activity_index") is None
+
+    config.flush()
+    assert read_stored_setting(database, "current_activity_index") == 3
+    assert Config(database).get_setting("ui.tasklist/due_soon_days", 0) == 7
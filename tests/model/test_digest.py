@@ -0,0 +1,32 @@
+import random
+
+from model.digest import TDigest
+
+def test_small_digests_are_exact():
+    digest = TDigest()
+    for value in [10, 20, 30]:
+        digest.add(value)
+
+    assert digest.quantile(0) == 10
+    assert digest.quantile(0.5) == 20
+    assert digest.quantile(1) == 30
+    assert TDigest().quantile(0.5) is None
+
+def test_merged_digests_estimate_quantiles():
+    rng = random.Random(1)
+    values = [rng.expovariate(1 / 30) for _ in range(20000)]
+
+    # One digest per "day", merged after a round trip through bytes
+    days = [TDigest() for _ in range(50)]
+    for i, value in enumerate(values):
+        days[i % len(days)].add(value)
+
+    merged = TDigest()
+    for day in days:
+        merged.merge(TDigest.from_bytes(day.to_bytes()))
+
+    values.sort()
+    assert merged.count == len(values)
+    for q in [0.5, 0.9, 0.99]:
+        exact = values[int(q * len(values))]
+        assert abs(merged.quantile(q) - exact) / exact < 0.02
@@ -1,8 +1,8 @@
 import pytest
 from PyQt5.QtCore import QTime
-from PyQt5.QtWidgets import QApplication
 
 from model.plan import Activity, PlanTableModel
+from ui.bulk_edit import BulkOperation
 from ui.importing import ReplaceOption
 
 TEST_ACTIVITY = Activity(
@@ -24,10 +24,6 @@ def test_inserting_deleting(plan):
 
     assert plan.rowCount() == 0
 
-@pytest.fixture
-def application():
-    return QApplication([])
-
 def test_copying_pasting(plan, application):
     plan.insert_activity(0)
     plan.insert_activity(0)
@@ -86,6 +82,52 @@ def test_plan_calculations(plan):
         assert activity.actual_length == expecteds[0]
         assert activity.optimal_length == expecteds[1]
 
+def test_bulk_edit(plan):
+    plan.insert_activities(0, [
+        Activity(start_time=QTime(8, 0), is_fixed=True, length=30),
+        Activity(length=30),
+        Activity(length=60),
+        Activity(start_time=QTime(10, 0), is_fixed=True),
+    ])
+
+    plan.bulk_edit([1, 2], {"attr": "length", "operation": BulkOperation.ADD, "value": 15})
+    plan.bulk_edit([2], {"attr": "is_rigid", "operation": BulkOperation.SET, "value": True})
+
+    assert [plan.get_activity(i).length for i in range(3)] == [30, 45, 75]
+    assert plan.get_activity(2).is_rigid
+    assert plan.get_activity(2).actual_length == 75
+
+    reloaded = PlanTableModel(None, plan.database, plan.config)
+    assert [reloaded.get_activity(i).length for i in range(3)] == [30, 45, 75]
+
+def get_rollup_rows(database, table):
+    query = database.get_prepared_query(f'SELECT * FROM "{table}" ORDER BY 1, 2, 3')
+    database.execute_query(query)
+
+    rows = []
+    while query.next():
+        rows.append(tuple(query.value(i) for i in range(query.record().count())))
+    return rows
+
+def test_archive_updates_rollups(plan):
+    plan.insert_activities(0, [
+        Activity(name="Work", start_time=QTime(8, 0), is_fixed=True, length=60),
+        Activity(name="Rest", length=15),
+        Activity(name="Work", length=45),
+        Activity(start_time=QTime(10, 0), is_fixed=True),
+    ])
+    plan._archive()
+
+    daily = get_rollup_rows(plan.database, "log_daily_rollup")
+    hourly = get_rollup_rows(plan.database, "log_hourly_rollup")
+    assert sum(row[2] for row in daily) == 3
+    assert sum(row[3] for row in daily) == 120
+
+    # The incrementally maintained rollups match a full rebuild
+    plan.database.rebuild_rollups()
+    assert get_rollup_rows(plan.database, "log_daily_rollup") == daily
+    assert get_rollup_rows(plan.database, "log_hourly_rollup") == hourly
+
 def export_and_import(plan, path, import_options):
     plan.insert_activity(0, TEST_ACTIVITY)
 
@@ -0,0 +1,67 @@
+import pytest
+
+from model.search import FullTextSearch, SearchIndex
+from model.tasklist import Task, TasklistTableModel
+
+@pytest.fixture
+def search_index():
+    search_index = SearchIndex()
+    search_index.add_all([
+        (1, "Write report"),
+        (2, "Read REPORTS"),
+        (3, "Call mom"),
+        (4, "Straße reparieren"),
+    ])
+    return search_index
+
+def test_substring_search_is_case_insensitive(search_index):
+    assert search_index.search("report") == {1, 2}
+
+def test_short_queries_match_substrings(search_index):
+    assert search_index.search("ca") == {3}
+    assert search_index.search("") == {1, 2, 3, 4}
+
+def test_unicode_names_are_case_folded(search_index):
+    assert search_index.search("STRASSE") == {4}
+
+def test_trigrams_must_appear_in_order(search_index):
+    assert search_index.search("portre") == set()
+
+def test_search_within_candidates(search_index):
+    assert search_index.search("report", {2, 3}) == {2}
+
+def test_prefix_and_exact_search(search_index):
+    assert search_index.search_prefix("re") == {2}
+    assert search_index.search_exact("read reports") == {2}
+    assert search_index.search_exact("read") == set()
+
+def test_removing_and_renaming(search_index):
+    search_index.remove(1)
+    search_index.add(3, "Report to mom")
+
+    assert search_index.search("report") == {2, 3}
+    assert search_index.search("call") == set()
+    assert 1 not in search_index
+
+@pytest.fixture
+def tasklist(database, config):
+    return TasklistTableModel(None, database, config)
+
+@pytest.fixture
+def full_text_search(database):
+    return FullTextSearch(database)
+
+def test_full_text_search_follows_task_changes(tasklist, full_text_search):
+    tasklist.add_tasks([Task(name="Write quarterly report"), Task(name="Call mom")])
+    assert [hit.name for hit in full_text_search.search("quart rep")] == ["Write quarterly report"]
+
+    tasklist.setData(tasklist.index(0, Task.COLUMN_INDICES["name"]), "Write essay")
+    assert full_text_search.search("report") == []
+    assert full_text_search.search("essay")[0].source == "tasks"
+
+    tasklist.delete_tasks([0])
+    assert full_text_search.search("essay") == []
+
+def test_full_text_search_ignores_query_syntax(full_text_search):
+    assert full_text_search.search('"') == []
+    assert full_text_search.search("   ") == []
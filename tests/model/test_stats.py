@@ -0,0 +1,216 @@
+import pytest
+from PyQt5.QtCore import Qt, QDate, QDateTime, QEventLoop, QTime, QTimer
+
+from model.plan import Activity, PlanTableModel
+from model.storage import Database
+from model.stats import FilterMode, Granularity, StatsCache, StatsModel, StatsReader, downsample
+
+# The log is dated in UTC
+LOG_DATE = QDateTime.currentDateTimeUtc().date()
+
+@pytest.fixture
+def plan(database, config, application):
+    plan = PlanTableModel(None, database, config)
+    plan.insert_activities(0, [
+        Activity(name="Work", start_time=QTime(8, 0), is_fixed=True, length=60),
+        Activity(name="Rest", length=15),
+        Activity(name="Work", length=30),
+        Activity(start_time=QTime(10, 0), is_fixed=True),
+    ])
+    plan._archive()
+    return plan
+
+@pytest.fixture
+def stats(plan):
+    stats = StatsModel(plan.database)
+    stats.set_date_range(LOG_DATE, LOG_DATE)
+    return stats
+
+def test_charts_are_plotted(stats):
+    stats.update_plots()
+
+    assert stats.pie_series.count() == 2
+    assert stats.perf_x_axis.categories() == ["Work", "Rest"]
+
+    actual_length_set = stats.perf_length_series.barSets()[1]
+    actual_lengths = [actual_length_set.at(i) for i in range(actual_length_set.count())]
+    assert stats.perf_minute_axis.min() == min(actual_lengths) - 1
+    assert stats.perf_minute_axis.max() == max(actual_lengths) + 1
+
+    assert stats.daily_actual_length_series.count() == 1
+    assert stats.circadian_percent_series.count() == 2
+
+def test_filter_narrows_every_chart(stats):
+    stats.set_filter("rest")
+    stats.update_plots()
+
+    assert stats.pie_series.count() == 1
+    assert stats.perf_x_axis.categories() == ["Rest"]
+    assert stats.daily_length_series.at(0).y() == 15
+
+    stats.set_filter("nothing")
+    stats.update_plots()
+
+    assert stats.pie_series.count() == 0
+    assert stats.daily_length_series.count() == 0
+    assert stats.daily_minute_axis.min() == -1
+
+def test_worker_plots_latest_request(stats):
+    loaded = []
+    loop = QEventLoop()
+    def chart_loaded(chart):
+        loaded.append(chart)
+        if len(loaded) == len(StatsReader.CHARTS):
+            loop.quit()
+    stats.chartLoaded.connect(chart_loaded)
+
+    stats.start_worker()
+    try:
+        stats.set_filter("nothing")
+        stats.request_plots()
+        stats.set_filter("rest")
+        stats.request_plots()
+
+        QTimer.singleShot(5000, loop.quit)
+        loop.exec_()
+    finally:
+        stats.stop_worker()
+
+    # Only the charts of the latest request are plotted
+    assert sorted(loaded) == sorted(StatsReader.CHARTS)
+    assert stats.perf_x_axis.categories() == ["Rest"]
+
+def test_cache_evicts_least_recently_used():
+    cache = StatsCache(max_rows=3)
+    cache.put("a", [1], cache.generation)
+    cache.put("b", [1], cache.generation)
+    cache.put("c", [1], cache.generation)
+    cache.get("a")
+    cache.put("d", [1], cache.generation)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == [1]
+    assert len(cache) == 3
+
+def test_cache_invalidates_changed_days():
+    cache = StatsCache()
+    today = QDate(2024, 5, 10)
+    past = ("pie", "", today.addDays(-7), today.addDays(-1))
+    current = ("pie", "", today.addDays(-7), today)
+
+    generation = cache.generation
+    cache.put(past, [("Work", 60)], generation)
+    cache.put(current, [("Work", 60)], generation)
+    cache.log_changed(today)
+
+    assert cache.get(past) == [("Work", 60)]
+    assert cache.get(current) is None
+
+    # Rows read before the change are not stored
+    cache.put(current, [("Work", 60)], generation)
+    assert cache.get(current) is None
+
+def test_model_serves_cached_charts(stats, plan):
+    stats.update_plots()
+    assert len(stats.cache) == len(StatsReader.CHARTS)
+
+    plan.insert_activity(0, Activity(name="Play", length=10))
+    plan._archive()
+    stats.update_plots()
+    assert "Play" not in stats.perf_x_axis.categories()
+
+    # New activities are matched once the filter is resolved again
+    stats.cache.log_changed(LOG_DATE)
+    stats.reader.reload_names()
+    stats.set_filter("")
+    stats.update_plots()
+    assert "Play" in stats.perf_x_axis.categories()
+
+def test_filter_modes(stats):
+    def names(text, mode):
+        stats.set_filter(text, mode)
+        stats.update_plots()
+        return sorted(stats.perf_x_axis.categories())
+
+    assert names("or", FilterMode.CONTAINS) == ["Work"]
+    assert names("re", FilterMode.PREFIX) == ["Rest"]
+    assert names("wor", FilterMode.EXACT) == []
+    assert names("work", FilterMode.EXACT) == ["Work"]
+    assert names("rest, work", FilterMode.ANY_OF) == ["Rest", "Work"]
+
+def test_downsample_keeps_endpoints_and_peaks():
+    points = [(x, 0) for x in range(100)]
+    points[50] = (50, 10)
+
+    sampled = downsample(points, 10)
+
+    assert len(sampled) == 10
+    assert sampled[0] == (0, 0)
+    assert sampled[-1] == (99, 0)
+    assert (50, 10) in sampled
+    assert downsample(points[:5], 10) == points[:5]
+
+def test_quantiles_are_merged_from_daily_digests(stats, plan):
+    stats.update_plots()
+
+    model = stats.quantile_model
+    rows = {
+        model.item(row, 0).text(): [model.item(row, column).data(Qt.UserRole) for column in range(1, 8)]
+        for row in range(model.rowCount())
+    }
+    assert sorted(rows) == ["Rest", "Work"]
+    assert rows["Work"][0] == 2
+    assert rows["Rest"][0] == 1
+
+    # Rebuilding the digests from the log gives the same quantiles
+    plan.database.rebuild_rollups()
+    stats.cache.clear()
+    stats.update_plots()
+    assert model.item(0, 0).text() in rows
+    assert [model.item(0, column).data(Qt.UserRole) for column in range(1, 8)] == rows[model.item(0, 0).text()]
+
+def test_granularity_follows_range_length():
+    day = QDate(2024, 5, 15)
+
+    assert Granularity.for_range(day, day.addDays(30)) == Granularity.DAY
+    assert Granularity.for_range(day, day.addYears(1)) == Granularity.WEEK
+    assert Granularity.for_range(day, day.addYears(5)) == Granularity.MONTH
+    assert Granularity.for_range(day, day.addYears(100)) == Granularity.YEAR
+
+    assert Granularity.WEEK.period_start(day) == QDate(2024, 5, 13)
+    assert Granularity.QUARTER.period_start(day) == QDate(2024, 4, 1)
+    assert Granularity.QUARTER.next_period_start(day) == QDate(2024, 7, 1)
+
+def test_trend_is_averaged_over_periods(stats):
+    stats.update_plots()
+    daily = stats.daily_length_series.at(0).y()
+
+    # Today's month is partly covered, then wholly covered by the range
+    stats.set_granularity(Granularity.MONTH)
+    for date_from, date_to in [
+        (LOG_DATE, LOG_DATE),
+        (LOG_DATE.addYears(-1), LOG_DATE.addYears(1)),
+    ]:
+        stats.set_date_range(date_from, date_to)
+        stats.update_plots()
+
+        assert stats.daily_length_series.count() == 1
+        point = stats.daily_length_series.at(0)
+        month_start = QDate(LOG_DATE.year(), LOG_DATE.month(), 1)
+        assert QDateTime.fromMSecsSinceEpoch(int(point.x())).date() == month_start
+        assert point.y() == daily
+
+def test_period_rollups_start_on_period_boundaries(stats, plan):
+    query = plan.database.get_prepared_query(
+        'SELECT DISTINCT "granularity", "period_start" FROM "log_period_rollup"'
+    )
+    plan.database.execute_query(query)
+
+    period_starts = {}
+    while query.next():
+        period_starts[query.value("granularity")] = Database.from_day(query.value("period_start"))
+
+    assert period_starts == {
+        granularity.value: granularity.period_start(LOG_DATE)
+        for granularity in Granularity if granularity != Granularity.DAY
+    }
@@ -1,7 +1,63 @@
+import sqlite3
+
 import pytest
 
+from model.search import FullTextSearch
+from PyQt5.QtCore import QDate, QTime
+
 from model.storage import Database, DbConnectionError, QueryError
 
+# Schema of databases created before schema versioning was introduced
+SCHEMA_VERSION_0 = [
+    '''CREATE TABLE "plan" (
+        "id" INTEGER PRIMARY KEY,
+        "order" INTEGER NOT NULL,
+        "start_time" TEXT NOT NULL CHECK (length("start_time") <= 5),
+        "name" TEXT NOT NULL CHECK (length("name") < 256) DEFAULT "Activity",
+        "length" INTEGER NOT NULL DEFAULT 0,
+        "actual_length" INTEGER NOT NULL DEFAULT 0,
+        "is_fixed" INTEGER NOT NULL CHECK ("is_fixed" IN (0, 1)),
+        "is_rigid" INTEGER NOT NULL CHECK ("is_rigid" IN (0, 1))
+    )''',
+    '''CREATE TABLE "tasks" (
+        "id" INTEGER PRIMARY KEY,
+        "name" TEXT NOT NULL CHECK (length("name") < 256) DEFAULT "Task",
+        "value" INTEGER NOT NULL DEFAULT 0,
+        "cost" INTEGER NOT NULL DEFAULT 0,
+        "date_created" TEXT NOT NULL CHECK (length("date_created") <= 10),
+        "deadline" TEXT CHECK (length("deadline") <= 10),
+        "deadline_type" INTEGER NOT NULL DEFAULT 1
+    )''',
+    '''CREATE TABLE "activities" (
+        "id" INTEGER PRIMARY KEY,
+        "name" TEXT UNIQUE NOT NULL CHECK (length("name") < 256) DEFAULT "Activity"
+    )''',
+    '''CREATE TABLE "activity_log" (
+        "id" INTEGER NOT NULL,
+        "date" TEXT NOT NULL CHECK (length("date") <= 10),
+        "order" INTEGER NOT NULL,
+        "start_time" TEXT NOT NULL CHECK (length("start_time") <= 5),
+        "activity_id" INTEGER NOT NULL,
+        "length" INTEGER NOT NULL,
+        "actual_length" INTEGER NOT NULL,
+        "optimal_length" INTEGER NOT NULL,
+        "is_fixed" INTEGER NOT NULL CHECK ("is_fixed" IN (0, 1)),
+        "is_rigid" INTEGER NOT NULL CHECK ("is_rigid" IN (0, 1)),
+        PRIMARY KEY("id" AUTOINCREMENT),
+        FOREIGN KEY("activity_id") REFERENCES activities("id")
+    )''',
+    '''CREATE TABLE "config" (
+        "key" TEXT NOT NULL UNIQUE,
+        "value" BLOB,
+        PRIMARY KEY("key")
+    )''',
+    'INSERT INTO "activities"("name") VALUES ("Morning run")',
+    '''INSERT INTO "tasks"("id", "name", "value", "cost", "date_created", "deadline", "deadline_type")
+        VALUES (1, "Write report", 6, 3, "2020-01-01", NULL, 0)''',
+    '''INSERT INTO "activity_log"("date", "order", "start_time", "activity_id", "length", "actual_length", "optimal_length", "is_fixed", "is_rigid")
+        VALUES ("2020-01-01", 0, "08:30", 1, 30, 45, 30, 1, 0)''',
+]
+
 @pytest.fixture
 def database_path(tmp_path):
     return str(tmp_path / "test.db")
@@ -61,3 +117,49 @@ def test_invalid_query(database):
 
     with pytest.raises(QueryError) as execinfo:
         database.execute_query(query)
+
+@pytest.fixture
+def old_database_path(database_path):
+    connection = sqlite3.connect(database_path)
+    for sql in SCHEMA_VERSION_0:
+        connection.execute(sql)
+    connection.commit()
+    connection.close()
+    return database_path
+
+def test_old_databases_are_migrated(old_database_path):
+    database = Database(old_database_path)
+    database.connect()
+
+    assert database.get_schema_version() == Database.SCHEMA_VERSION
+    assert [hit.name for hit in FullTextSearch(database).search("run")] == ["Morning run"]
+
+    query = database.get_prepared_query('SELECT "priority" FROM "tasks"')
+    database.execute_query(query)
+    query.first()
+    assert query.value("priority") == 2.0
+
+    query = database.get_prepared_query('SELECT "date_created", "deadline" FROM "tasks"')
+    database.execute_query(query)
+    query.first()
+    assert Database.from_day(query.value("date_created")) == QDate(2020, 1, 1)
+    assert not Database.from_day(query.value("deadline")).isValid()
+
+    query = database.get_prepared_query('SELECT "date", "hour", "sum_actual_length" FROM "log_hourly_rollup"')
+    database.execute_query(query)
+    query.first()
+    assert Database.from_day(query.value("date")) == QDate(2020, 1, 1)
+    assert query.value("hour") == 8
+    assert query.value("sum_actual_length") == 45
+
+    database.disconnect()
+
+def test_dates_and_times_are_stored_as_numbers():
+    assert Database.from_day(Database.to_day(QDate(2020, 2, 29))) == QDate(2020, 2, 29)
+    assert Database.to_day(QDate()) is None
+    assert not Database.from_day("").isValid()
+
+    assert Database.to_minute(QTime(8, 30)) == 510
+    assert Database.from_minute(510) == QTime(8, 30)
+    assert Database.to_minute(QTime()) is None
+    assert not Database.from_minute("").isValid()
@@ -1,7 +1,9 @@
+import json
 import pytest
-from PyQt5.QtCore import QDate
+from PyQt5.QtCore import Qt, QDate
 
-from model.tasklist import DeadlineType, Task, TasklistTableModel
+from model.tasklist import DeadlineNotifier, DeadlineType, Task, TasklistTableModel, TasklistProxyModel
+from ui.bulk_edit import BulkOperation
 from ui.importing import ReplaceOption
 
 TEST_TASK = Task(
@@ -105,3 +107,224 @@ def test_deadline_functions(deadline_type, date_created, deadline, expected_prio
     )
 
     assert task.get_priority() == pytest.approx(expected_priority)
+
+def test_proxy_filtering(tasklist):
+    proxy = TasklistProxyModel()
+    proxy.setSourceModel(tasklist)
+    tasklist.add_tasks([Task(name="Write report"), Task(name="Read reports"), Task(name="Call mom")])
+
+    proxy.set_filter_text("rep")
+    assert proxy.rowCount() == 2
+
+    proxy.set_filter_text("reports")
+    assert proxy.rowCount() == 1
+
+    proxy.set_filter_text("^(Call|Write)")
+    assert proxy.rowCount() == 2
+
+    proxy.set_filter_text("rep")
+    tasklist.add_task(Task(name="Report back"))
+    assert proxy.rowCount() == 3
+
+    proxy.set_filter_text("")
+    assert proxy.rowCount() == 4
+
+def test_proxy_filtering_narrows_normalized_queries(tasklist):
+    proxy = TasklistProxyModel()
+    proxy.setSourceModel(tasklist)
+    tasklist.add_tasks([Task(name="Caf\u00e9"), Task(name="Cafeteria")])
+
+    proxy.set_filter_text("Cafe")
+    assert proxy.rowCount() == 1
+
+    # Contains "Cafe" as typed, but not once normalized to "café"
+    proxy.set_filter_text("Cafe\u0301")
+    assert proxy.rowCount() == 1
+    assert tasklist.get_task(proxy.mapToSource(proxy.index(0, 0)).row()).name == "Caf\u00e9"
+
+def test_tasks_are_loaded_in_pages_by_priority(database, config):
+    tasklist = TasklistTableModel(None, database, config)
+    tasklist.add_tasks([Task(value=i, cost=1) for i in range(10)])
+
+    tasklist = TasklistTableModel(None, database, config)
+    tasklist.PAGE_SIZE = 4
+    tasklist._read_tasks()
+
+    assert tasklist.rowCount() == 4
+    while tasklist.canFetchMore():
+        tasklist.fetchMore()
+
+    assert tasklist.rowCount() == tasklist.task_count() == 10
+    assert [tasklist.get_task(i).value for i in range(10)] == list(reversed(range(10)))
+
+def test_filter_loads_matching_tasks_from_later_pages(database, config):
+    TasklistTableModel(None, database, config).add_tasks(
+        [Task(name=f"Task {i}", value=i, cost=1) for i in range(10)]
+    )
+
+    tasklist = TasklistTableModel(None, database, config)
+    tasklist.PAGE_SIZE = 4
+    tasklist._read_tasks()
+    proxy = TasklistProxyModel()
+    proxy.setSourceModel(tasklist)
+
+    proxy.set_filter_text("Task")
+    assert proxy.rowCount() == 10
+    assert len({tasklist.get_task(i).id for i in range(tasklist.rowCount())}) == 10
+
+def test_regex_filters_and_sorting_load_every_page(database, config):
+    TasklistTableModel(None, database, config).add_tasks(
+        [Task(name=f"Task {i}", value=i, cost=1) for i in range(10)]
+    )
+
+    tasklist = TasklistTableModel(None, database, config)
+    tasklist.PAGE_SIZE = 4
+    tasklist._read_tasks()
+    proxy = TasklistProxyModel()
+    proxy.setSourceModel(tasklist)
+
+    proxy.sort(Task.COLUMN_INDICES["get_priority"], Qt.DescendingOrder)
+    assert tasklist.rowCount() == 4
+
+    proxy.set_filter_text("^Task [0-2]$")
+    assert proxy.rowCount() == 3
+
+    proxy.set_filter_text("")
+    proxy.sort(Task.COLUMN_INDICES["value"], Qt.AscendingOrder)
+    assert proxy.rowCount() == 10
+    assert proxy.index(0, Task.COLUMN_INDICES["value"]).data() == 0
+
+def test_regex_filters_load_every_page_once(database, config, monkeypatch):
+    TasklistTableModel(None, database, config).add_tasks(
+        [Task(name=f"Task {i}", value=i, cost=1) for i in range(10)]
+    )
+
+    tasklist = TasklistTableModel(None, database, config)
+    tasklist.PAGE_SIZE = 4
+    tasklist._read_tasks()
+    proxy = TasklistProxyModel()
+    proxy.setSourceModel(tasklist)
+
+    loads = []
+    load_all = tasklist.load_all
+    monkeypatch.setattr(tasklist, "load_all", lambda: loads.append(1) or load_all())
+
+    for text in ["^T", "^Ta", "^Task [0-2]", "^Task [0-2]$"]:
+        proxy.set_filter_text(text)
+    assert loads == [1]
+    assert proxy.rowCount() == 3
+
+    # Reloading starts over from the first page
+    tasklist.reload()
+    assert loads == [1, 1]
+    assert proxy.rowCount() == 3
+
+def test_export_includes_unloaded_pages(database, config, tmp_path):
+    TasklistTableModel(None, database, config).add_tasks([Task(value=i) for i in range(600)])
+    path = str(tmp_path / "tasklist.json")
+
+    tasklist = TasklistTableModel(None, database, config)
+    assert tasklist.rowCount() == TasklistTableModel.PAGE_SIZE
+    tasklist.export_tasks(path)
+
+    with open(path) as f:
+        assert len(json.load(f)) == 600
+
+def test_bulk_edit(tasklist):
+    tasklist.add_tasks([Task(value=2, cost=1), Task(value=4, cost=1), Task(value=6, cost=1)])
+
+    tasklist.bulk_edit([0, 2], {"attr": "value", "operation": BulkOperation.MULTIPLY, "value": 1.5})
+    tasklist.bulk_edit([0, 1, 2], {"attr": "cost", "operation": BulkOperation.ADD, "value": 1})
+
+    assert [tasklist.get_task(i).value for i in range(3)] == [3, 4, 9]
+    assert [tasklist.get_task(i).cost for i in range(3)] == [2, 2, 2]
+
+    deadline = QDate.currentDate().addDays(7)
+    tasklist.bulk_edit([1], {"attr": "deadline", "operation": BulkOperation.SET, "value": deadline})
+    tasklist.bulk_edit([0, 1], {"attr": "deadline_type", "operation": BulkOperation.SET, "value": DeadlineType.POSTDATE})
+
+    assert tasklist.get_task(0).deadline_type == DeadlineType.NONE
+    assert tasklist.get_task(1).deadline_type == DeadlineType.POSTDATE
+
+    reloaded = TasklistTableModel(None, tasklist.database, tasklist.config)
+    assert sorted(reloaded.get_task(i).value for i in range(3)) == [3, 4, 9]
+    assert any(reloaded.get_task(i).deadline == deadline for i in range(3))
+
+def test_due_and_overdue_tasks(tasklist):
+    today = QDate.currentDate()
+    tasklist.add_tasks([
+        Task(name="Overdue", date_created=today.addDays(-10), deadline=today.addDays(-1), deadline_type=DeadlineType.STANDARD),
+        Task(name="Today", date_created=today.addDays(-10), deadline=today, deadline_type=DeadlineType.STANDARD),
+        Task(name="Next week", date_created=today, deadline=today.addDays(7), deadline_type=DeadlineType.STANDARD),
+        Task(name="No deadline"),
+    ])
+    ids = {tasklist.get_task(i).name: tasklist.get_task(i).id for i in range(4)}
+
+    assert tasklist.get_overdue_task_ids() == {ids["Overdue"]}
+    assert tasklist.get_due_task_ids(3) == {ids["Today"]}
+    assert tasklist.get_due_task_ids(7) == {ids["Today"], ids["Next week"]}
+    assert tasklist.get_next_deadline(today) == today.addDays(7)
+
+    proxy = TasklistProxyModel()
+    proxy.setSourceModel(tasklist)
+    proxy.set_allowed_ids(lambda: tasklist.get_due_task_ids(7))
+    assert proxy.rowCount() == 2
+
+    # The ids follow edited deadlines and added tasks
+    no_deadline = tasklist.index(3, Task.COLUMN_INDICES["deadline"])
+    tasklist.setData(no_deadline, today.addDays(1))
+    assert proxy.rowCount() == 3
+    tasklist.add_task(Task(name="Tomorrow", deadline=today.addDays(1), deadline_type=DeadlineType.STANDARD))
+    assert proxy.rowCount() == 4
+
+    proxy.set_allowed_ids(None)
+    assert proxy.rowCount() == 5
+
+def test_proxy_refreshes_filters_only_for_relevant_changes(database, config, monkeypatch):
+    today = QDate.currentDate()
+    TasklistTableModel(None, database, config).add_tasks(
+        [Task(name=f"Task {i}", value=i, cost=1) for i in range(10)]
+    )
+
+    tasklist = TasklistTableModel(None, database, config)
+    tasklist.PAGE_SIZE = 4
+    tasklist._read_tasks()
+    proxy = TasklistProxyModel()
+    proxy.setSourceModel(tasklist)
+    proxy.set_filter_text("Task")
+
+    lookups = []
+    search = tasklist.search_index.search
+    monkeypatch.setattr(tasklist.search_index, "search", lambda *args: lookups.append("search") or search(*args))
+    proxy.set_allowed_ids(lambda: lookups.append("due") or tasklist.get_due_task_ids(7))
+    lookups.clear()
+
+    tasklist.fetchMore()
+    tasklist.setData(tasklist.index(0, Task.COLUMN_INDICES["value"]), 100)
+    assert lookups == []
+
+    tasklist.setData(tasklist.index(0, Task.COLUMN_INDICES["name"]), "Renamed")
+    assert lookups == ["search"]
+    tasklist.setData(tasklist.index(0, Task.COLUMN_INDICES["deadline"]), today)
+    assert lookups == ["search", "due"]
+
+def test_deadline_notifier(tasklist, application):
+    today = QDate.currentDate()
+    notifier = DeadlineNotifier(tasklist)
+    notifications = []
+    notifier.deadlinesReached.connect(notifications.append)
+
+    notifier.start()
+    assert notifications == []
+    assert not notifier.timer.isActive()
+
+    tasklist.add_tasks([
+        Task(name="Today", date_created=today.addDays(-1), deadline=today, deadline_type=DeadlineType.STANDARD),
+        Task(name="Tomorrow", date_created=today, deadline=today.addDays(1), deadline_type=DeadlineType.STANDARD),
+    ])
+    assert notifier.timer.isActive()
+    assert notifier.timer.remainingTime() <= 24 * 60 * 60 * 1000
+
+    notifier.notify()
+    notifier.notify()
+    assert notifications == [["Today"]]
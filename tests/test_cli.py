@@ -0,0 +1,91 @@
+import json
+import os
+import subprocess
+import sys
+
+import cli
+
+def run(tmp_path, *argv):
+    return cli.main([
+        "--database", str(tmp_path / "cli.db"),
+        "--backups", str(tmp_path / "backups"),
+        *argv
+    ])
+
+def write_tasks(path, count):
+    with open(path, "w") as f:
+        json.dump([{
+            "id": i + 1,
+            "name": f"Scripted task {i}",
+            "value": 2,
+            "cost": 1,
+            "DATE_CREATED": "2024-01-01",
+            "deadline": "",
+            "deadline_type": "NONE",
+        } for i in range(count)], f)
+
+def test_tasks_are_imported_and_exported(tmp_path, application):
+    # More tasks than the tasklist loads in its first page
+    tasks_path = tmp_path / "tasks.json"
+    write_tasks(tasks_path, 600)
+
+    assert run(tmp_path, "import-tasks", str(tasks_path), "--replace", "add") == 0
+    assert run(tmp_path, "export-tasks", str(tmp_path / "exported.json")) == 0
+
+    with open(tmp_path / "exported.json") as f:
+        assert len(json.load(f)) == 600
+
+def test_batch_runs_commands_on_one_connection(tmp_path, application):
+    batch_path = tmp_path / "jobs.txt"
+    with open(batch_path, "w") as f:
+        f.write(
+            "# Nightly jobs\n"
+            "\n"
+            f"export-plan {tmp_path / 'plan.json'}\n"
+            "backup\n"
+            f"report --output {tmp_path / 'report'}\n"
+        )
+
+    assert run(tmp_path, "batch", str(batch_path)) == 0
+    assert os.path.exists(tmp_path / "plan.json")
+    assert len(os.listdir(tmp_path / "backups")) == 2  # The backup and its manifest
+    assert os.path.exists(tmp_path / "report" / "report.json")
+
+def test_batch_runs_on_an_in_memory_database(tmp_path, application):
+    write_tasks(tmp_path / "tasks.json", 3)
+    batch_path = tmp_path / "jobs.txt"
+    with open(batch_path, "w") as f:
+        f.write(
+            f"import-tasks {tmp_path / 'tasks.json'}\n"
+            f"export-tasks {tmp_path / 'exported.json'}\n"
+            f"report --output {tmp_path / 'report'}\n"
+        )
+
+    assert run(tmp_path, "--storage-backend", "memory", "batch", str(batch_path)) == 0
+    assert not os.path.exists(tmp_path / "cli.db")
+    with open(tmp_path / "exported.json") as f:
+        assert len(json.load(f)) == 3
+    assert os.path.exists(tmp_path / "report" / "report.json")
+
+def test_report_charts_are_rendered(tmp_path):
+    # In a process of its own, as only a new one starts without a QApplication
+    result = subprocess.run([
+        sys.executable, cli.__file__,
+        "--database", str(tmp_path / "cli.db"),
+        "--backups", str(tmp_path / "backups"),
+        "report", "--charts", "--output", str(tmp_path / "report"),
+    ], env={**os.environ, "QT_QPA_PLATFORM": "offscreen"})
+
+    assert result.returncode == 0
+    assert os.path.exists(tmp_path / "report" / "daily.png")
+
+def test_errors_are_reported(tmp_path, application, capsys):
+    assert run(tmp_path, "import-tasks", str(tmp_path / "missing.json")) == 1
+    assert "missing.json" in capsys.readouterr().err
+    assert run(tmp_path, "archive") == 1
+
+    damaged_path = tmp_path / "damaged.db.xz"
+    with open(damaged_path, "wb") as f:
+        f.write(b"not xz data")
+    assert run(tmp_path, "restore", str(damaged_path)) == 1
+    assert "damaged.db.xz" in capsys.readouterr().err
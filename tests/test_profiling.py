@@ -0,0 +1,37 @@
+import io
+
+import profiling
+from profiling import StartupProfiler
+
+def test_nested_phases_are_reported_in_order():
+    profiler = StartupProfiler(enabled=True)
+    with profiler.phase("connect"):
+        with profiler.phase("create tables"):
+            pass
+    profiler.mark("first paint")
+
+    assert [(name, depth) for name, depth, _ in profiler.phases] == [
+        ("connect", 0),
+        ("create tables", 1),
+        ("first paint", 0),
+    ]
+
+    output = io.StringIO()
+    profiler.report(output)
+    assert "    create tables" in output.getvalue()
+
+def test_disabled_profiler_records_nothing(monkeypatch):
+    monkeypatch.delenv(profiling.ENVIRONMENT_VARIABLE, raising=False)
+    monkeypatch.setattr(profiling, "profiler", StartupProfiler())
+
+    argv = ["main.py"]
+    profiler = profiling.enable_from(argv)
+    with profiler.phase("connect"):
+        pass
+
+    assert not profiler.enabled
+    assert profiler.phases == []
+
+    argv.append(profiling.FLAG)
+    assert profiling.enable_from(argv).enabled
+    assert argv == ["main.py"]
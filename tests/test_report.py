@@ -0,0 +1,46 @@
+import csv
+import json
+
+import pytest
+from PyQt5.QtCore import QTime
+
+import report
+from model.plan import Activity, PlanTableModel
+
+@pytest.fixture
+def database_path(database, config, application):
+    plan = PlanTableModel(None, database, config)
+    plan.insert_activities(0, [
+        Activity(name="Work", start_time=QTime(8, 0), is_fixed=True, length=60),
+        Activity(name="Rest", length=15),
+        Activity(start_time=QTime(10, 0), is_fixed=True),
+    ])
+    plan._archive()
+    return database.path
+
+def test_json_report(database_path, tmp_path):
+    assert report.main(["--database", database_path, "--output", str(tmp_path)]) == 0
+
+    with open(tmp_path / "report.json") as f:
+        data = json.load(f)
+    assert sorted(a["name"] for a in data["activities"]) == ["Rest", "Work"]
+    assert len(data["days"]) == 1
+    assert data["hours"]
+
+def test_filtered_csv_report(database_path, tmp_path):
+    assert report.main([
+        "--database", database_path,
+        "--output", str(tmp_path),
+        "--format", "csv",
+        "--filter", "work",
+        "--filter-mode", "exact",
+    ]) == 0
+
+    with open(tmp_path / "activities.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["name"] for row in rows] == ["Work"]
+    assert (tmp_path / "days.csv").exists()
+    assert (tmp_path / "hours.csv").exists()
+
+def test_invalid_date(database_path, tmp_path):
+    assert report.main(["--database", database_path, "--output", str(tmp_path), "--from", "yesterday"]) == 1
@@ -0,0 +1,27 @@
+import uuid
+
+from PyQt5.QtCore import QEventLoop, QTimer
+
+import single_instance
+from single_instance import InstanceServer
+
+def test_options_are_forwarded_to_running_instance(application):
+    name = f"LibrePlan-test-{uuid.uuid4().hex}"
+    assert not single_instance.send_to_running_instance({}, name)
+
+    server = InstanceServer(name)
+    assert server.listen()
+    # Only one instance listens at a time
+    assert not InstanceServer(name).listen()
+
+    received = []
+    loop = QEventLoop()
+    server.optionsReceived.connect(received.append)
+    server.optionsReceived.connect(loop.quit)
+
+    assert single_instance.send_to_running_instance({"start_plan": True}, name)
+    QTimer.singleShot(2000, loop.quit)
+    loop.exec_()
+    server.close()
+
+    assert received == [{"start_plan": True}]